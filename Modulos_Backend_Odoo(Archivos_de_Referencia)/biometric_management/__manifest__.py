@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Biometric Devices Management',
-    'version': '1.0.0',
+    'version': '1.0.1',
     'category': 'Human Resources',
     'summary': 'Gestión de dispositivos biométricos para autenticación de usuarios',
     'description': """
@@ -31,9 +31,11 @@
         'views/biometric_auth_log_views.xml',
         # 3. Vistas de dispositivos (usa action_biometric_auth_log_by_device)
         'views/biometric_device_views.xml',
-        # 4. Menús al final
+        # 4. Vistas del resumen diario de logs
+        'views/biometric_auth_log_daily_views.xml',
+        # 5. Menús al final
         'views/biometric_menu.xml',
-        # 5. Datos por defecto
+        # 6. Datos por defecto
         'data/biometric_data.xml',
     ],
     'demo': [],
@@ -137,14 +137,10 @@ class BiometricAPIController(http.Controller):
                 ('state', '!=', 'revoked')
             ], order='last_used_at desc, enrolled_at desc')
             
-            # Formatear con contexto del dispositivo actual
-            devices = []
-            for device in devices_records:
-                # Pasar current_device_id al contexto
-                device_data = device.with_context(
-                    current_device_id=current_device_id
-                )._format_device_data()
-                devices.append(device_data)
+            # Formatear todo el lote con contexto del dispositivo actual
+            devices = devices_records.with_context(
+                current_device_id=current_device_id
+            )._format_devices_data()
 
             return {
                 'success': True,
@@ -359,32 +355,93 @@ class BiometricAPIController(http.Controller):
                 'error': str(e)
             }
 
+    @http.route('/api/biometric/auth/log/batch', 
+                type='json', 
+                auth='user', 
+                methods=['POST'], 
+                csrf=False)
+    def log_authentication_batch(self, attempts=None, **kwargs):
+        """
+        Registra un lote de intentos de autenticación (reenvío desde modo sin conexión)
+        
+        POST /api/biometric/auth/log/batch
+        Body: {
+            "attempts": [{
+                "client_key": "string",
+                "device_id": int,
+                "success": boolean,
+                "auth_date": "ISO 8601",
+                "error_info": {"code": "string", "message": "string"},
+                "session_id": "string",
+                "duration_ms": int
+            }]
+        }
+        
+        Returns: {
+            "success": true,
+            "created": int,
+            "duplicates": int,
+            "errors": int,
+            "results": [{"index": int, "client_key": "string",
+                         "status": "created|duplicate|error", "log_id": int, "error": "string"}]
+        }
+        """
+        try:
+            if not isinstance(attempts, list):
+                return {
+                    'success': False,
+                    'error': 'attempts debe ser una lista'
+                }
+
+            AuthLog = request.env['biometric.auth.log']
+            return AuthLog.log_authentication_batch(attempts)
+
+        except Exception as e:
+            _logger.error(f'Error registrando lote de autenticaciones: {str(e)}')
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
     @http.route('/api/biometric/auth/history', 
                 type='json', 
                 auth='user', 
                 methods=['GET'], 
                 csrf=False)
-    def get_auth_history(self, limit=50, **kwargs):
+    def get_auth_history(self, limit=50, cursor=None, with_total=False, **kwargs):
         """
-        Obtiene el historial de autenticaciones del usuario
+        Obtiene el historial de autenticaciones del usuario (paginado por cursor)
         
-        GET /api/biometric/auth/history?limit=50
+        GET /api/biometric/auth/history?limit=50&cursor=...&with_total=approx
         
         Returns: {
             "success": true,
             "data": [...logs],
-            "count": int
+            "count": int,
+            "has_more": boolean,
+            "next_cursor": "string|null",
+            "total": int (solo si se pide with_total)
         }
         """
         try:
             AuthLog = request.env['biometric.auth.log']
-            history = AuthLog.get_user_auth_history(limit=limit)
+            history = AuthLog.get_user_auth_history(
+                limit=limit,
+                cursor=cursor,
+                with_total=with_total
+            )
 
-            return {
+            result = {
                 'success': True,
-                'data': history,
-                'count': len(history)
+                'data': history['records'],
+                'count': len(history['records']),
+                'has_more': history['has_more'],
+                'next_cursor': history['next_cursor'],
             }
+            if 'total' in history:
+                result['total'] = history['total']
+                result['total_is_exact'] = history['total_is_exact']
+            return result
 
         except Exception as e:
             _logger.error(f'Error obteniendo historial: {str(e)}')
@@ -398,11 +455,11 @@ class BiometricAPIController(http.Controller):
                 auth='user', 
                 methods=['GET'], 
                 csrf=False)
-    def get_device_stats(self, device_id, **kwargs):
+    def get_device_stats(self, device_id, date_from=None, date_to=None, **kwargs):
         """
         Obtiene estadísticas de autenticación de un dispositivo
         
-        GET /api/biometric/devices/{device_id}/stats
+        GET /api/biometric/devices/{device_id}/stats?date_from=...&date_to=...
         
         Returns: {
             "success": true,
@@ -411,7 +468,9 @@ class BiometricAPIController(http.Controller):
                 "successful": int,
                 "failed": int,
                 "success_rate": float,
-                "last_auth": "datetime"
+                "last_auth": "datetime",
+                "last_success": "datetime",
+                "daily": [{"date": "YYYY-MM-DD", "successful": int, "failed": int}]
             }
         }
         """
@@ -432,7 +491,45 @@ class BiometricAPIController(http.Controller):
                 }
 
             AuthLog = request.env['biometric.auth.log']
-            stats = AuthLog.get_device_auth_stats(device_id)
+            stats = AuthLog.get_device_auth_stats(device_id, date_from=date_from, date_to=date_to)
+
+            return {
+                'success': True,
+                'data': stats
+            }
+
+        except Exception as e:
+            _logger.error(f'Error obteniendo estadísticas: {str(e)}')
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @http.route('/api/biometric/auth/stats', 
+                type='json', 
+                auth='user', 
+                methods=['GET'], 
+                csrf=False)
+    def get_auth_stats(self, device_ids=None, date_from=None, date_to=None, group_by='device', **kwargs):
+        """
+        Obtiene estadísticas de autenticación de varios dispositivos del usuario
+        
+        GET /api/biometric/auth/stats?device_ids=[1,2]&date_from=...&group_by=device|user
+        
+        Returns: {
+            "success": true,
+            "data": [...stats por dispositivo o usuario]
+        }
+        """
+        try:
+            AuthLog = request.env['biometric.auth.log']
+            stats = AuthLog.get_auth_stats(
+                device_ids=device_ids,
+                user_ids=[request.env.user.id],
+                date_from=date_from,
+                date_to=date_to,
+                group_by=group_by
+            )
 
             return {
                 'success': True,
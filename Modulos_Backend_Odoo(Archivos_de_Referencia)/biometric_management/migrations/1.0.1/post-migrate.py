@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Inicializa el contador auth_count de los dispositivos existentes"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['biometric.device']._recompute_auth_count()
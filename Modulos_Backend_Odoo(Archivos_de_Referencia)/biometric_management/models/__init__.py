@@ -1,2 +1,3 @@
 from . import biometric_device
-from . import biometric_auth_log
\ No newline at end of file
+from . import biometric_auth_log
+from . import biometric_auth_log_daily
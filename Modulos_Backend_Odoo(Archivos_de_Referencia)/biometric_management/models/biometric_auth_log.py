@@ -1,16 +1,25 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api
+from odoo.exceptions import UserError
 from odoo.http import root
 import requests
 import logging
+from collections import defaultdict
+from datetime import datetime, time, timezone
 
 _logger = logging.getLogger(__name__)
 
+# Tope del total aproximado del historial de autenticaciones
+HISTORY_TOTAL_CAP = 1000
+
+# Máximo de intentos aceptados por lote en log_authentication_batch
+MAX_BATCH_SIZE = 500
+
 
 class BiometricAuthLog(models.Model):
     _name = 'biometric.auth.log'
     _description = 'Log de Autenticaciones Biométricas'
-    _order = 'auth_date desc'
+    _order = 'auth_date desc, id desc'
     _rec_name = 'display_name'
 
     # ============================================
@@ -115,6 +124,13 @@ class BiometricAuthLog(models.Model):
         help='Notas adicionales sobre el intento'
     )
     
+    client_key = fields.Char(
+        string='Clave de Idempotencia',
+        readonly=True,
+        copy=False,
+        help='Clave generada por la app para no registrar dos veces el mismo intento'
+    )
+    
     # ============================================
     # CAMPOS COMPUTADOS
     # ============================================
@@ -166,6 +182,58 @@ class BiometricAuthLog(models.Model):
             date_str = fields.Datetime.to_string(record.auth_date)
             record.display_name = f'{record.user_id.name} - {status} - {date_str}'
     
+    def init(self):
+        # Índice compuesto para el historial por usuario paginado por (auth_date, id)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS biometric_auth_log_user_date_idx
+                ON biometric_auth_log (user_id, auth_date DESC, id DESC)
+        """)
+        # Un intento reenviado por la app (misma clave) no se registra dos veces
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS biometric_auth_log_client_key_idx
+                ON biometric_auth_log (user_id, client_key)
+             WHERE client_key IS NOT NULL
+        """)
+    
+    # ============================================
+    # MÉTODOS CRUD
+    # ============================================
+    
+    def _successful_counts_by_device(self):
+        """Cantidad de logs exitosos por dispositivo: {id dispositivo: cantidad}"""
+        counts = defaultdict(int)
+        for log in self:
+            if log.success and log.device_id:
+                counts[log.device_id.id] += 1
+        return counts
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Incrementa el contador auth_count de los dispositivos"""
+        logs = super().create(vals_list)
+        self.env['biometric.device']._increment_auth_count(logs._successful_counts_by_device())
+        return logs
+    
+    def write(self, vals):
+        """Ajusta auth_count si cambia el dispositivo o el resultado del log"""
+        if not {'device_id', 'success'} & set(vals):
+            return super().write(vals)
+        deltas = defaultdict(int)
+        for device_id, count in self._successful_counts_by_device().items():
+            deltas[device_id] -= count
+        result = super().write(vals)
+        for device_id, count in self._successful_counts_by_device().items():
+            deltas[device_id] += count
+        self.env['biometric.device']._increment_auth_count(deltas)
+        return result
+    
+    def unlink(self):
+        """Descuenta los logs eliminados del contador auth_count"""
+        deltas = {device_id: -count for device_id, count in self._successful_counts_by_device().items()}
+        result = super().unlink()
+        self.env['biometric.device']._increment_auth_count(deltas)
+        return result
+    
     # ============================================
     # MÉTODOS API
     # ============================================
@@ -215,7 +283,8 @@ class BiometricAuthLog(models.Model):
                     'error_message': error_info.get('message'),
                 })
             
-            # Crear log (con sudo para evitar restricciones de acceso)
+            # Crear log (con sudo para evitar restricciones de acceso);
+            # create() incrementa el contador auth_count del dispositivo
             log = self.sudo().create(log_data)
             
             # Si fue exitoso, actualizar dispositivo
@@ -241,14 +310,184 @@ class BiometricAuthLog(models.Model):
             }
     
     @api.model
-    def get_user_auth_history(self, user_id=None, limit=20, offset=0):
+    def _parse_client_datetime(self, value, floor=None):
+        """
+        Fecha ISO 8601 enviada por la app a datetime UTC sin zona, acotada a
+        [floor, ahora]: nunca en el futuro ni antes de floor
+        """
+        now = fields.Datetime.now()
+        if not value:
+            return now
+        auth_date = datetime.fromisoformat(value) if isinstance(value, str) else value
+        if auth_date.tzinfo:
+            auth_date = auth_date.astimezone(timezone.utc).replace(tzinfo=None)
+        auth_date = min(auth_date.replace(microsecond=0), now)
+        return max(auth_date, floor) if floor else auth_date
+    
+    @api.model
+    def log_authentication_batch(self, attempts):
+        """
+        Registra varios intentos de autenticación en una sola sentencia
+        (p. ej. los que una app sin conexión reenvía al reconectarse)
+        
+        Args:
+            attempts (list): Intentos con las claves de log_authentication
+                (device_id, success, error_info, session_id, duration_ms),
+                client_key (texto requerido, idempotencia) y auth_date (opcional, ISO 8601)
+                
+        Returns:
+            dict: {'success', 'created', 'duplicates', 'errors',
+                   'results': [{'index', 'client_key', 'status', 'log_id', 'error'}]}
+        """
+        if len(attempts) > MAX_BATCH_SIZE:
+            raise UserError(f'El lote supera el máximo de {MAX_BATCH_SIZE} intentos')
+        
+        user = self.env.user
+        # La regla de registros limita la búsqueda a los dispositivos del usuario
+        device_ids = {
+            attempt.get('device_id') for attempt in attempts
+            if isinstance(attempt, dict) and isinstance(attempt.get('device_id'), int)
+        }
+        devices = {
+            device.id: device
+            for device in self.env['biometric.device'].search([('id', 'in', list(device_ids))])
+        }
+        # Los días anteriores a purged_before ya no tienen logs crudos y su
+        # resumen es definitivo: un reenvío con esas fechas se registra en el
+        # primer día que todavía se puede resumir
+        Daily = self.env['biometric.auth.log.daily']
+        purged_before = Daily._get_purged_before()
+        floor = datetime.combine(purged_before, time.min) if purged_before else None
+        
+        results = []
+        rows = []
+        seen_keys = {}
+        for index, attempt in enumerate(attempts):
+            result = {'index': index, 'client_key': None, 'status': 'error', 'log_id': None, 'error': None}
+            results.append(result)
+            if not isinstance(attempt, dict):
+                result['error'] = 'Intento inválido'
+                continue
+            client_key = attempt.get('client_key')
+            result['client_key'] = client_key
+            device = devices.get(attempt.get('device_id'))
+            if not client_key:
+                result['error'] = 'client_key es requerido'
+            elif not isinstance(client_key, str):
+                result['error'] = 'client_key debe ser texto'
+            elif not device:
+                result['error'] = 'Dispositivo no encontrado'
+            elif client_key in seen_keys:
+                result['status'] = 'duplicate'
+            else:
+                try:
+                    auth_date = self._parse_client_datetime(attempt.get('auth_date'), floor)
+                except (TypeError, ValueError):
+                    result['error'] = 'auth_date inválida'
+                    continue
+                result['status'] = 'pending'
+                seen_keys[client_key] = result
+                success = bool(attempt.get('success', True))
+                error_info = (attempt.get('error_info') or {}) if not success else {}
+                rows.append((
+                    user.id, device.id, auth_date, success, 'biometric', True,
+                    attempt.get('session_id'), attempt.get('duration_ms'),
+                    error_info.get('code'), error_info.get('message'),
+                    device.device_name, device.platform,
+                    device.device_name or 'Dispositivo', device.platform or 'unknown',
+                    client_key, user.id, user.id,
+                ))
+        
+        created_ids = []
+        if rows:
+            # Una sola sentencia; las claves ya registradas se ignoran
+            self.env.cr.execute(f"""
+                INSERT INTO biometric_auth_log
+                       (user_id, device_id, auth_date, success, auth_type, session_active,
+                        session_id, duration_ms, error_code, error_message,
+                        device_name_direct, device_platform_direct, device_name, device_platform,
+                        client_key, create_uid, write_uid, create_date, write_date)
+                VALUES {', '.join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, "
+                                   "now() at time zone 'UTC', now() at time zone 'UTC')"] * len(rows))}
+                ON CONFLICT (user_id, client_key) WHERE client_key IS NOT NULL DO NOTHING
+                RETURNING id, client_key
+            """, [value for row in rows for value in row])
+            for log_id, client_key in self.env.cr.fetchall():
+                seen_keys[client_key].update(status='created', log_id=log_id)
+                created_ids.append(log_id)
+        created = self.browse(created_ids)
+        
+        # Reenvíos de días que el cron ya resumió: el cron los vuelve a resumir
+        # antes de depurarlos (hasta entonces las estadísticas leen los logs crudos)
+        if created:
+            self.env.cr.execute("SELECT MAX(date) FROM biometric_auth_log_daily")
+            last_rolled = self.env.cr.fetchone()[0]
+            first_day = min(created.mapped('auth_date')).date()
+            if last_rolled and first_day <= last_rolled:
+                Daily._mark_days_dirty(first_day)
+        
+        # Claves que ya existían: devolver el log registrado anteriormente
+        pending = [result for result in results if result['status'] in ('pending', 'duplicate')]
+        if pending:
+            existing = dict(self.sudo()._read_group([
+                ('user_id', '=', user.id),
+                ('client_key', 'in', [result['client_key'] for result in pending]),
+            ], ['client_key'], ['id:min']))
+            for result in pending:
+                result.update(status='duplicate', log_id=existing.get(result['client_key']))
+        
+        # Contador auth_count y último uso: una actualización por dispositivo
+        self.env['biometric.device']._increment_auth_count(created._successful_counts_by_device())
+        last_used = {}
+        for log in created.filtered('success'):
+            if log.device_id not in last_used or log.auth_date > last_used[log.device_id]:
+                last_used[log.device_id] = log.auth_date
+        for device, auth_date in last_used.items():
+            if not device.last_used_at or auth_date > device.last_used_at:
+                device.write({'last_used_at': auth_date, 'state': 'active'})
+        
+        _logger.info(
+            f'Lote de autenticaciones para {user.name}: {len(created)} registradas '
+            f'de {len(attempts)} recibidas'
+        )
+        
+        return {
+            'success': True,
+            'created': len(created),
+            'duplicates': sum(1 for result in results if result['status'] == 'duplicate'),
+            'errors': sum(1 for result in results if result['status'] == 'error'),
+            'results': results,
+        }
+    
+    @api.model
+    def _encode_history_cursor(self, log):
+        """Cursor opaco 'fecha|id' del último registro de una página"""
+        return f'{fields.Datetime.to_string(log.auth_date)}|{log.id}'
+    
+    @api.model
+    def _decode_history_cursor(self, cursor):
+        try:
+            auth_date, log_id = cursor.split('|')
+            return fields.Datetime.to_datetime(auth_date), int(log_id)
+        except (AttributeError, TypeError, ValueError):
+            raise UserError(f'Cursor de paginación inválido: {cursor}')
+    
+    @api.model
+    def get_user_auth_history(self, user_id=None, limit=20, offset=None, cursor=None, with_total=False):
         """
         Obtiene el historial de autenticaciones de un usuario con paginación
+        por cursor sobre (auth_date, id), apoyada en el índice
+        biometric_auth_log_user_date_idx: cada página cuesta lo mismo sin
+        importar qué tan profunda sea.
         
         Args:
             user_id (int): ID del usuario (None = usuario actual)
             limit (int): Límite de registros por página
-            offset (int): Desplazamiento para paginación
+            offset (int): Desplazamiento (solo para clientes antiguos sin cursor)
+            cursor (str): next_cursor devuelto por la página anterior
+            with_total (bool|str): False = sin total, 'approx' = total acotado
+                a HISTORY_TOTAL_CAP, True = total exacto. Si se envía offset
+                (paginación de clientes antiguos) siempre se devuelve el total exacto
             
         Returns:
             dict: Historial formateado con información de paginación
@@ -259,12 +498,22 @@ class BiometricAuthLog(models.Model):
             user_id = self.env.user.id
         
         domain = [('user_id', '=', user_id)]
+        page_domain = list(domain)
+        # Solo los clientes antiguos envían offset: esperan el total exacto
+        legacy_offset = offset is not None and not cursor
+        offset = offset or 0
+        if cursor:
+            cursor_date, cursor_id = self._decode_history_cursor(cursor)
+            page_domain += [
+                '|', ('auth_date', '<', cursor_date),
+                '&', ('auth_date', '=', cursor_date), ('id', '<', cursor_id),
+            ]
+            offset = 0
         
-        # Obtener total para paginación
-        total_count = self.search_count(domain)
-        
-        # Obtener logs con paginación
-        logs = self.search(domain, order='auth_date desc', limit=limit, offset=offset)
+        # Un registro extra indica si hay más páginas sin contar el total
+        logs = self.search(page_domain, order='auth_date desc, id desc', limit=limit + 1, offset=offset)
+        has_more = len(logs) > limit
+        logs = logs[:limit]
         
         # Venezuela timezone offset (UTC-4)
         tz_offset = timedelta(hours=-4)
@@ -297,39 +546,141 @@ class BiometricAuthLog(models.Model):
             'session_id': log.session_id,
         } for log in logs]
         
-        return {
+        result = {
             'records': records,
-            'total': total_count,
             'limit': limit,
             'offset': offset,
-            'has_more': (offset + limit) < total_count,
+            'has_more': has_more,
+            'next_cursor': self._encode_history_cursor(logs[-1]) if has_more else None,
         }
+        
+        if with_total == 'approx':
+            # Conteo acotado: se detiene al llegar al tope
+            total = self.search_count(domain, limit=HISTORY_TOTAL_CAP)
+            result.update(total=total, total_is_exact=total < HISTORY_TOTAL_CAP)
+        elif with_total or legacy_offset:
+            # Los clientes por offset calculan las páginas con el total
+            result.update(total=self.search_count(domain), total_is_exact=True)
+        
+        return result
     
     @api.model
-    def get_device_auth_stats(self, device_id):
+    def get_device_auth_stats(self, device_id, date_from=None, date_to=None):
         """
         Obtiene estadísticas de autenticación de un dispositivo
         
         Args:
             device_id (int): ID del dispositivo
+            date_from (str|datetime): Inicio de la ventana de tiempo (opcional)
+            date_to (str|datetime): Fin de la ventana de tiempo (opcional)
             
         Returns:
             dict: Estadísticas
         """
-        logs = self.search([('device_id', '=', device_id)])
-        
-        total = len(logs)
-        successful = len(logs.filtered(lambda l: l.success))
-        failed = total - successful
-        
+        stats = self.get_auth_stats(device_ids=[device_id], date_from=date_from, date_to=date_to)
+        return stats[0] if stats else self._empty_auth_stats('device_id', device_id)
+    
+    @api.model
+    def _empty_auth_stats(self, key_field, key):
         return {
-            'total_attempts': total,
-            'successful': successful,
-            'failed': failed,
-            'success_rate': (successful / total * 100) if total > 0 else 0,
-            'last_auth': logs[0].auth_date.isoformat() if logs else None,
+            key_field: key,
+            'total_attempts': 0,
+            'successful': 0,
+            'failed': 0,
+            'success_rate': 0,
+            'last_auth': None,
+            'last_success': None,
+            'daily': [],
         }
     
+    @api.model
+    def get_auth_stats(self, device_ids=None, user_ids=None, date_from=None, date_to=None,
+                       group_by='device', daily=True):
+        """
+        Estadísticas de autenticación de varios dispositivos o usuarios a la vez,
+        calculadas con consultas agrupadas (sin cargar los logs en memoria)
+        
+        Args:
+            device_ids (list): IDs de dispositivos a incluir (None = todos)
+            user_ids (list): IDs de usuarios a incluir (None = todos)
+            date_from (str|datetime): Inicio de la ventana de tiempo (opcional)
+            date_to (str|datetime): Fin de la ventana de tiempo (opcional)
+            group_by (str): 'device' o 'user'
+            daily (bool): Incluir el desglose por día
+            
+        Returns:
+            list: Un dict por dispositivo/usuario con totales, tasa de éxito,
+                  última autenticación y desglose diario
+        """
+        key_field = 'user_id' if group_by == 'user' else 'device_id'
+        date_from = fields.Datetime.to_datetime(date_from) if date_from else None
+        date_to = fields.Datetime.to_datetime(date_to) if date_to else None
+        key_domain = []
+        if device_ids is not None:
+            key_domain.append(('device_id', 'in', device_ids))
+        if user_ids is not None:
+            key_domain.append(('user_id', 'in', user_ids))
+        
+        # Los días depurados por la retención se leen del resumen diario
+        Daily = self.env['biometric.auth.log.daily']
+        purged_before = Daily._get_purged_before()
+        
+        domain = list(key_domain)
+        if date_from:
+            domain.append(('auth_date', '>=', date_from))
+        if date_to:
+            domain.append(('auth_date', '<=', date_to))
+        if purged_before:
+            domain.append(('auth_date', '>=', purged_before))
+        
+        stats = {}
+        days = defaultdict(lambda: {'successful': 0, 'failed': 0})
+        
+        def add_totals(record, success, count, last_date):
+            key = record.id or None
+            if key not in stats:
+                stats[key] = self._empty_auth_stats(key_field, key)
+            entry = stats[key]
+            entry['total_attempts'] += count
+            entry['successful' if success else 'failed'] += count
+            last_date = last_date.isoformat() if last_date else None
+            if last_date and (not entry['last_auth'] or last_date > entry['last_auth']):
+                entry['last_auth'] = last_date
+            if success and last_date and (not entry['last_success'] or last_date > entry['last_success']):
+                entry['last_success'] = last_date
+        
+        for record, success, count, last_date in self._read_group(
+                domain, [key_field, 'success'], ['__count', 'auth_date:max']):
+            add_totals(record, success, count, last_date)
+        if daily:
+            # Días en UTC, igual que biometric.auth.log.daily (auth_date::date)
+            for record, day, success, count in self.with_context(tz='UTC')._read_group(
+                    domain, [key_field, 'auth_date:day', 'success'], ['__count']):
+                days[(record.id or None, fields.Date.to_string(day))]['successful' if success else 'failed'] += count
+        
+        if purged_before and (not date_from or date_from.date() < purged_before):
+            daily_domain = key_domain + [('date', '<', purged_before)]
+            if date_from:
+                daily_domain.append(('date', '>=', date_from.date()))
+            if date_to:
+                daily_domain.append(('date', '<=', date_to.date()))
+            for record, success, count, last_date in Daily._read_group(
+                    daily_domain, [key_field, 'success'], ['auth_count:sum', 'last_auth_date:max']):
+                add_totals(record, success, count, last_date)
+            if daily:
+                for record, day, success, count in Daily._read_group(
+                        daily_domain, [key_field, 'date:day', 'success'], ['auth_count:sum']):
+                    days[(record.id or None, fields.Date.to_string(day))]['successful' if success else 'failed'] += count
+        
+        for (key, day), counts in sorted(days.items(), key=lambda item: item[0][1]):
+            stats[key]['daily'].append({'date': day, **counts})
+        
+        for entry in stats.values():
+            total = entry['total_attempts']
+            entry['success_rate'] = round(entry['successful'] / total * 100, 2) if total else 0
+        
+        return list(stats.values())
+    
     @api.model
     def log_traditional_login(self, session_id=None, device_info=None):
         """
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Parámetros de retención (ir.config_parameter)
+RETENTION_DAYS_PARAM = 'biometric.auth.log.retention.days'
+PURGED_BEFORE_PARAM = 'biometric.auth.log.purged_before'
+# Primer día ya resumido que recibió logs tardíos (se vuelve a resumir en el cron)
+ROLLUP_FROM_PARAM = 'biometric.auth.log.rollup_from'
+
+# Logs eliminados por lote y tiempo máximo de cada ejecución del cron
+PURGE_CHUNK_SIZE = 5000
+PURGE_TIME_LIMIT = 60
+
+
+class BiometricAuthLogDaily(models.Model):
+    """
+    Resumen diario de autenticaciones por usuario, dispositivo, resultado y
+    código de error. Conserva las estadísticas de los logs que la política
+    de retención elimina: los días anteriores a biometric.auth.log.purged_before
+    se leen de aquí y los posteriores de biometric.auth.log.
+    """
+    _name = 'biometric.auth.log.daily'
+    _description = 'Resumen Diario de Autenticaciones'
+    _order = 'date desc, id desc'
+
+    date = fields.Date(
+        string='Fecha',
+        required=True,
+        readonly=True,
+        index=True
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Usuario',
+        readonly=True,
+        ondelete='cascade',
+        index=True
+    )
+
+    device_id = fields.Many2one(
+        'biometric.device',
+        string='Dispositivo',
+        readonly=True,
+        ondelete='set null',
+        index=True
+    )
+
+    success = fields.Boolean(
+        string='Exitoso',
+        readonly=True
+    )
+
+    error_code = fields.Char(
+        string='Código Error',
+        readonly=True
+    )
+
+    auth_count = fields.Integer(
+        string='Intentos',
+        readonly=True
+    )
+
+    last_auth_date = fields.Datetime(
+        string='Última Autenticación',
+        readonly=True
+    )
+
+    # ============================================
+    # PARÁMETROS DE RETENCIÓN
+    # ============================================
+
+    @api.model
+    def _get_retention_days(self):
+        """Días de logs crudos a conservar (0 = sin depuración)"""
+        value = self.env['ir.config_parameter'].sudo().get_param(RETENTION_DAYS_PARAM, '0')
+        try:
+            return max(0, int(value))
+        except ValueError:
+            _logger.warning(f'Valor inválido para {RETENTION_DAYS_PARAM}: {value}')
+            return 0
+
+    @api.model
+    def _get_purged_before(self):
+        """Primer día (UTC) cuyos logs crudos siguen completos; None si nunca se depuró"""
+        value = self.env['ir.config_parameter'].sudo().get_param(PURGED_BEFORE_PARAM)
+        return fields.Date.to_date(value) if value else None
+
+    @api.model
+    def _mark_days_dirty(self, date_from):
+        """Pide al cron volver a resumir desde date_from (se conserva el más antiguo)"""
+        params = self.env['ir.config_parameter'].sudo()
+        value = params.get_param(ROLLUP_FROM_PARAM)
+        if not value or date_from < fields.Date.to_date(value):
+            params.set_param(ROLLUP_FROM_PARAM, fields.Date.to_string(date_from))
+
+    # ============================================
+    # RESUMEN DIARIO
+    # ============================================
+
+    @api.model
+    def _rollup_days(self, date_from, date_to):
+        """
+        Recalcula por SQL el resumen de los días [date_from, date_to] desde los
+        logs crudos. Es idempotente: se puede repetir para incluir logs tardíos.
+        """
+        purged_before = self._get_purged_before()
+        if purged_before and date_from < purged_before:
+            # Esos días ya no tienen logs crudos: su resumen es definitivo
+            date_from = purged_before
+        if date_from > date_to:
+            return
+
+        self.env['biometric.auth.log'].flush_model(['auth_date', 'user_id', 'device_id', 'success', 'error_code'])
+        self.env.cr.execute("""
+            DELETE FROM biometric_auth_log_daily WHERE date BETWEEN %s AND %s
+        """, (date_from, date_to))
+        self.env.cr.execute("""
+            INSERT INTO biometric_auth_log_daily
+                   (date, user_id, device_id, success, error_code, auth_count, last_auth_date,
+                    create_uid, write_uid, create_date, write_date)
+            SELECT auth_date::date, user_id, device_id, COALESCE(success, FALSE), error_code,
+                   COUNT(*), MAX(auth_date),
+                   %s, %s, now() at time zone 'UTC', now() at time zone 'UTC'
+              FROM biometric_auth_log
+             WHERE auth_date >= %s AND auth_date < %s
+          GROUP BY auth_date::date, user_id, device_id, COALESCE(success, FALSE), error_code
+        """, (self.env.uid, self.env.uid, date_from, date_to + timedelta(days=1)))
+        self.invalidate_model()
+
+    @api.model
+    def _cron_rollup_and_purge(self):
+        """
+        Cron diario: resume los días cerrados y depura los logs crudos más
+        antiguos que la retención configurada, en lotes cortos con commit
+        entre lotes para no mantener bloqueos largos sobre la tabla.
+        """
+        today = fields.Date.today()
+        yesterday = today - timedelta(days=1)
+
+        # 1. Resumir desde el último día resumido (se repite por logs tardíos)
+        self.env.cr.execute("SELECT MAX(date) FROM biometric_auth_log_daily")
+        last_rolled = self.env.cr.fetchone()[0]
+        if not last_rolled:
+            self.env.cr.execute("SELECT MIN(auth_date)::date FROM biometric_auth_log")
+            last_rolled = self.env.cr.fetchone()[0]
+        if not last_rolled:
+            # Sin resumen ni logs: no hay nada que depurar
+            return
+        # Días ya resumidos que recibieron reenvíos con fechas antiguas
+        rollup_from = self.env['ir.config_parameter'].sudo().get_param(ROLLUP_FROM_PARAM)
+        if rollup_from:
+            last_rolled = min(last_rolled, fields.Date.to_date(rollup_from))
+        self._rollup_days(last_rolled, yesterday)
+        if rollup_from:
+            # Solo si nadie marcó un día anterior mientras tanto
+            self.env['ir.config_parameter'].sudo().search([
+                ('key', '=', ROLLUP_FROM_PARAM), ('value', '=', rollup_from),
+            ]).unlink()
+        self.env.cr.commit()
+        # Días con resumen al día: todos los anteriores a last_rolled y los recién resumidos
+        rolled_through = yesterday
+
+        # 2. Depurar: nunca más allá del último día resumido
+        retention_days = self._get_retention_days()
+        if not retention_days:
+            return
+        cutoff = min(today - timedelta(days=retention_days), rolled_through + timedelta(days=1))
+        purged_before = self._get_purged_before()
+        if not purged_before or cutoff > purged_before:
+            # Desde aquí las estadísticas de días anteriores salen del resumen,
+            # aunque la depuración de los logs quede a medias
+            self.env['ir.config_parameter'].sudo().set_param(PURGED_BEFORE_PARAM, fields.Date.to_string(cutoff))
+            self.env.cr.commit()
+        else:
+            cutoff = purged_before
+
+        # Las sesiones activas se conservan para poder cerrarlas
+        started = time.monotonic()
+        deleted = 0
+        while True:
+            self.env.cr.execute("""
+                DELETE FROM biometric_auth_log
+                 WHERE id IN (
+                    SELECT id FROM biometric_auth_log
+                     WHERE auth_date < %s
+                       AND NOT (COALESCE(success, FALSE) AND COALESCE(session_active, FALSE))
+                     LIMIT %s
+                 )
+            """, (cutoff, PURGE_CHUNK_SIZE))
+            count = self.env.cr.rowcount
+            self.env.cr.commit()
+            deleted += count
+            if count < PURGE_CHUNK_SIZE:
+                break
+            if time.monotonic() - started > PURGE_TIME_LIMIT:
+                # Quedan logs: continuar en otra ejecución
+                self.env.ref('biometric_management.ir_cron_biometric_auth_log_purge')._trigger()
+                break
+
+        self.env['biometric.auth.log'].invalidate_model()
+        _logger.info(f'Depuración de logs biométricos: {deleted} logs anteriores a {cutoff} eliminados')
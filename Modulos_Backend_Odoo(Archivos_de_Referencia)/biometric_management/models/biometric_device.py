@@ -176,9 +176,9 @@ class BiometricDevice(models.Model):
     
     auth_count = fields.Integer(
         string='Total Autenticaciones',
-        compute='_compute_auth_stats',
-        store=False,
-        help='Número total de autenticaciones exitosas'
+        default=0,
+        readonly=True,
+        help='Número total de autenticaciones exitosas (contador mantenido por biometric.auth.log)'
     )
     
     last_auth_date = fields.Datetime(
@@ -269,18 +269,61 @@ class BiometricDevice(models.Model):
     
     @api.depends('device_id')
     def _compute_auth_stats(self):
-        """Calcula estadísticas de autenticación"""
+        """Calcula la fecha de la última autenticación exitosa (una consulta para todo el lote)"""
+        device_ids = [record.id for record in self if record.id]
+        stats = {
+            entry['device_id']: entry
+            for entry in self.env['biometric.auth.log'].get_auth_stats(device_ids=device_ids, daily=False)
+        } if device_ids else {}
         for record in self:
-            if record.id:
-                auth_logs = self.env['biometric.auth.log'].search([
-                    ('device_id', '=', record.id),
-                    ('success', '=', True)
-                ])
-                record.auth_count = len(auth_logs)
-                record.last_auth_date = max(auth_logs.mapped('auth_date')) if auth_logs else False
-            else:
-                record.auth_count = 0
-                record.last_auth_date = False
+            last_success = stats.get(record.id, {}).get('last_success')
+            record.last_auth_date = datetime.fromisoformat(last_success) if last_success else False
+    
+    @api.model
+    def _recompute_auth_count(self):
+        """
+        Recalcula el contador de autenticaciones desde los logs existentes y,
+        para los días depurados por la retención, desde el resumen diario.
+        Solo se usa al migrar: en uso normal el contador se mantiene por deltas.
+        """
+        purged_before = self.env['biometric.auth.log.daily']._get_purged_before()
+        self.env.cr.execute("""
+            WITH counts AS (
+                SELECT d.id, COALESCE(raw.total, 0) + COALESCE(rolled.total, 0) AS total
+                  FROM biometric_device d
+             LEFT JOIN (SELECT device_id, COUNT(*) AS total
+                          FROM biometric_auth_log
+                         WHERE success AND (%(purged_before)s IS NULL OR auth_date >= %(purged_before)s)
+                      GROUP BY device_id) raw ON raw.device_id = d.id
+             LEFT JOIN (SELECT device_id, SUM(auth_count) AS total
+                          FROM biometric_auth_log_daily
+                         WHERE success AND date < %(purged_before)s
+                      GROUP BY device_id) rolled ON rolled.device_id = d.id
+            )
+            UPDATE biometric_device d
+               SET auth_count = counts.total
+              FROM counts
+             WHERE d.id = counts.id
+               AND d.auth_count IS DISTINCT FROM counts.total
+        """, {'purged_before': purged_before})
+    
+    @api.model
+    def _increment_auth_count(self, deltas):
+        """
+        Suma los deltas {id dispositivo: cantidad} al contador auth_count.
+        El UPDATE es relativo (auth_count + delta) para no perder incrementos
+        de autenticaciones concurrentes ni tocar write_date/tracking.
+        """
+        deltas = {device_id: delta for device_id, delta in deltas.items() if device_id and delta}
+        if not deltas:
+            return
+        self.env.cr.execute(f"""
+            UPDATE biometric_device d
+               SET auth_count = COALESCE(d.auth_count, 0) + v.delta
+              FROM (VALUES {', '.join(['(%s, %s)'] * len(deltas))}) AS v(id, delta)
+             WHERE d.id = v.id
+        """, [value for item in deltas.items() for value in item])
+        self.browse(list(deltas)).invalidate_recordset(['auth_count'])
     
     # ============================================
     # MÉTODOS CRUD
@@ -499,7 +542,7 @@ class BiometricDevice(models.Model):
         ], order='last_used_at desc, enrolled_at desc')
         
         # Pasar current_device_id al contexto para identificar dispositivo actual
-        return [device.with_context(current_device_id=current_device_id)._format_device_data() for device in devices]
+        return devices.with_context(current_device_id=current_device_id)._format_devices_data()
     
     @api.model
     def validate_device(self, device_id=None, **kwargs):
@@ -578,26 +621,32 @@ class BiometricDevice(models.Model):
     def _format_device_data(self):
         """Formatea los datos del dispositivo para la API - Compatible con Frontend"""
         self.ensure_one()
+        return self._format_devices_data()[0]
+    
+    def _get_active_session_device_ids(self):
+        """IDs de los dispositivos con alguna sesión activa de su propietario (una sola consulta)"""
+        groups = self.env['biometric.auth.log'].sudo()._read_group([
+            ('device_id', 'in', self.ids),
+            ('session_active', '=', True),
+        ], ['device_id', 'user_id'])
+        return {device.id for device, user in groups if device.user_id == user}
+    
+    def _format_devices_data(self):
+        """
+        Formatea varios dispositivos para la API.
+        auth_count es un contador almacenado y las sesiones activas se
+        obtienen con una consulta agrupada para todo el lote.
+        """
+        active_session_ids = self._get_active_session_device_ids() if self else set()
+        return [device._format_device_values(device.id in active_session_ids) for device in self]
+    
+    def _format_device_values(self, has_active_session):
+        self.ensure_one()
         
         # Determinar si es el dispositivo actual (comparando device_id del contexto)
         current_device_id = self.env.context.get('current_device_id')
         is_current = (current_device_id == self.device_id) if current_device_id else False
         
-        # Forzar recálculo de auth_count
-        auth_logs = self.env['biometric.auth.log'].search([
-            ('device_id', '=', self.id),
-            ('success', '=', True)
-        ])
-        auth_count = len(auth_logs)
-        
-        # 🆕 Verificar si hay sesiones activas en este dispositivo
-        active_sessions = self.env['biometric.auth.log'].search([
-            ('device_id', '=', self.id),
-            ('user_id', '=', self.user_id.id),
-            ('session_active', '=', True)
-        ], limit=1)
-        has_active_session = bool(active_sessions)
-        
         return {
             # Campos básicos
             'id': self.id,
@@ -622,7 +671,7 @@ class BiometricDevice(models.Model):
             'lastUsedAt': self.last_used_at.isoformat() if self.last_used_at else None,
             
             # Estadísticas
-            'authCount': auth_count,  # Recalculado en tiempo real
+            'authCount': self.auth_count,  # Contador almacenado
             'isRecentlyUsed': self.is_recently_used,
             'isStale': self.is_stale,
             'daysSinceLastUse': max(0, self.days_since_last_use),  # Nunca negativo
@@ -1,6 +1,6 @@
 {
     'name': 'Sistema educativo público',
-    'version': '19.0.0.6',
+    'version': '19.0.0.7',
     'description': 'Gestión de escuelas públicas, estudiantes, docentes y materias. En Venezuela',
     'summary': 'Módulo para la gestión de escuelas públicas en Odoo. En Venezuela',
     'author': "Pozzomire'z Agency",
@@ -30,6 +30,8 @@
         'views/school_attendance_view.xml',
         'views/school_schedule_view.xml',
         'views/school_time_slot_view.xml',
+        'views/school_student_grade_queue_view.xml',
+        'views/school_timetable_run_view.xml',
         'wizards/school_uninscription_wizard_view.xml',
         'wizards/school_mention_inscription_wizard_view.xml',
         'views/menu.xml',
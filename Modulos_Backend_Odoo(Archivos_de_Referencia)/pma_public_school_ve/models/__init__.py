@@ -9,13 +9,19 @@ from . import (
                 school_register_subject,
                 school_section,
                 school_student,
+                school_student_subject_aggregate,
+                school_student_grade_queue,
                 school_subject,
                 school_evaluation,
                 school_evaluation_type,
                 school_evaluation_score,
                 school_year,
+                school_year_analytics,
+                school_year_dashboard,
                 school_attendance,
+                school_attendance_rollup,
                 school_schedule,
+                school_timetable_run,
                 school_time_slot,
                 school_education_level,
                 school_modality,
@@ -216,50 +216,34 @@ class ResPartner(models.Model):
 
     current_performance_json = fields.Json(
         string='Rendimiento Actual (JSON)',
-        compute='_compute_current_performance_json',
+        compute='_compute_current_grades_json',
         store=True,
     )
 
     current_scores_json = fields.Json(
         string='Puntajes Actuales (JSON)',
-        compute='_compute_current_scores_json',
+        compute='_compute_current_grades_json',
         store=True,
     )
 
     @api.depends('inscription_ids', 'inscription_ids.current', 'inscription_ids.state',
-                 'inscription_ids.general_performance_json')
-    def _compute_current_performance_json(self):
-        """Obtiene el rendimiento actual del estudiante"""
+                 'inscription_ids.general_performance_json', 'inscription_ids.evaluation_scores_json')
+    def _compute_current_grades_json(self):
+        """Obtiene el rendimiento y los puntajes actuales del estudiante
+        (ambos salen de la misma pasada de school.student._compute_grades)
+        """
         for rec in self:
-            if rec.type_enrollment != 'student':
-                rec.current_performance_json = {}
-                continue
-
-            inscription = rec.inscription_ids.filtered(
-                lambda insc: insc.current and insc.state == 'done'
-            )
+            inscription = False
+            if rec.type_enrollment == 'student':
+                inscription = rec.inscription_ids.filtered(
+                    lambda insc: insc.current and insc.state == 'done'
+                )[:1]
             
             if inscription:
-                rec.current_performance_json = inscription[0].general_performance_json or {}
+                rec.current_performance_json = inscription.general_performance_json or {}
+                rec.current_scores_json = inscription.evaluation_scores_json or {}
             else:
                 rec.current_performance_json = {}
-
-    @api.depends('inscription_ids', 'inscription_ids.current', 'inscription_ids.state',
-                 'inscription_ids.evaluation_scores_json')
-    def _compute_current_scores_json(self):
-        """Obtiene los puntajes actuales del estudiante"""
-        for rec in self:
-            if rec.type_enrollment != 'student':
-                rec.current_scores_json = {}
-                continue
-
-            inscription = rec.inscription_ids.filtered(
-                lambda insc: insc.current and insc.state == 'done'
-            )
-            
-            if inscription:
-                rec.current_scores_json = inscription[0].evaluation_scores_json or {}
-            else:
                 rec.current_scores_json = {}
 
     def _update_performance_json(self):
@@ -8,6 +8,18 @@ class SchoolAttendance(models.Model):
     _order = 'date DESC, check_in_time DESC'
     _rec_name = 'display_name'
 
+    # Evita registros duplicados de asistencia:
+    # estudiantes por estudiante/fecha/horario y empleados por empleado/fecha
+    _student_unique_idx = models.UniqueIndex(
+        "(student_id, date, COALESCE(schedule_id, 0)) "
+        "WHERE attendance_type = 'student' AND student_id IS NOT NULL",
+        "Ya existe un registro de asistencia para este estudiante en el mismo horario y fecha.",
+    )
+    _employee_unique_idx = models.UniqueIndex(
+        "(employee_id, date) WHERE attendance_type = 'employee' AND employee_id IS NOT NULL",
+        "Ya existe un registro de asistencia para este empleado en la misma fecha.",
+    )
+
     display_name = fields.Char(string='Nombre', compute='_compute_display_name', store=True)
 
     @api.depends('student_id', 'employee_id', 'visitor_name', 'attendance_type', 'date', 'state')
@@ -267,40 +279,35 @@ class SchoolAttendance(models.Model):
                         "La hora de salida debe ser posterior a la hora de entrada"
                     )
 
-    @api.constrains('student_id', 'date', 'schedule_id', 'attendance_type')
-    def _check_unique_student_attendance(self):
-        """Evita registros duplicados de asistencia"""
-        for record in self:
-            # Para estudiantes: validar unicidad por estudiante/fecha/horario
-            if record.attendance_type == 'student' and record.student_id:
-                domain = [
-                    ('student_id', '=', record.student_id.id),
-                    ('date', '=', record.date),
-                    ('schedule_id', '=', record.schedule_id.id if record.schedule_id else False),
-                    ('id', '!=', record.id),
-                ]
-                
-                existing = self.search(domain, limit=1)
-                if existing:
-                    raise exceptions.ValidationError(
-                        f"Ya existe un registro de asistencia para {record.student_id.student_id.name} "
-                        f"en el horario de {record.schedule_id.display_name if record.schedule_id else 'sin horario'} "
-                        f"del {record.date}"
-                    )
-            
-            # Para empleados: validar unicidad por empleado/fecha
-            elif record.attendance_type == 'employee' and record.employee_id:
-                domain = [
-                    ('employee_id', '=', record.employee_id.id),
-                    ('date', '=', record.date),
-                    ('id', '!=', record.id),
-                ]
-                
-                existing = self.search(domain, limit=1)
-                if existing:
-                    raise exceptions.ValidationError(
-                        f"Ya existe un registro de asistencia para {record.employee_id.name} en la fecha {record.date}"
-                    )
+    # Campos que mueven la asistencia entre filas de school.attendance.rollup
+    # (student_id y schedule_id recalculan section_id)
+    _rollup_fields = {'date', 'state', 'attendance_type', 'student_id', 'schedule_id'}
+
+    @api.model
+    def _mark_rollup_dates(self, domain):
+        """Marca las fechas de las asistencias del dominio (p. ej. cuando cambia
+        la sección de su estudiante u horario y se recalcula section_id)"""
+        self.env['school.attendance.rollup']._mark_dates(
+            date for [date] in self._read_group(domain, ['date:day']))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['school.attendance.rollup']._mark_dates(records.mapped('date'))
+        return records
+
+    def write(self, vals):
+        dates = set(self.mapped('date')) if self._rollup_fields & set(vals) else set()
+        res = super().write(vals)
+        if dates:
+            self.env['school.attendance.rollup']._mark_dates(dates | set(self.mapped('date')))
+        return res
+
+    def unlink(self):
+        dates = set(self.mapped('date'))
+        res = super().unlink()
+        self.env['school.attendance.rollup']._mark_dates(dates)
+        return res
 
     # Métodos de utilidad
     def _float_to_time_string(self, float_time):
@@ -324,9 +331,13 @@ class SchoolAttendance(models.Model):
         if section_id:
             domain.append(('section_id', '=', section_id))
         
-        attendances = self.search(domain)
+        # Se lee del conteo diario (school.attendance.rollup), no de cada asistencia
+        self.flush_model()
+        Rollup = self.env['school.attendance.rollup']
+        Rollup._flush_pending()
+        counts = Rollup._get_state_counts(domain)
         
-        total = len(attendances)
+        total = sum(counts.values())
         if total == 0:
             return {
                 'total': 0,
@@ -337,10 +348,10 @@ class SchoolAttendance(models.Model):
                 'attendance_rate': 0.0
             }
         
-        present = len(attendances.filtered(lambda a: a.state == 'present'))
-        absent = len(attendances.filtered(lambda a: a.state == 'absent'))
-        late = len(attendances.filtered(lambda a: a.state == 'late'))
-        permission = len(attendances.filtered(lambda a: a.state == 'permission'))
+        present = counts.get('present', 0)
+        absent = counts.get('absent', 0)
+        late = counts.get('late', 0)
+        permission = counts.get('permission', 0)
         
         # Calcular tasa de asistencia (presente + tardanza + permiso)
         attendance_rate = ((present + late + permission) / total) * 100 if total > 0 else 0
@@ -384,6 +395,148 @@ class SchoolAttendance(models.Model):
         
         return self.create(attendance_vals)
 
+    # Campos que escribe upsert_student_attendance_for_schedule directamente por SQL
+    _upsert_fields = ['attendance_type', 'student_id', 'date', 'schedule_id', 'state',
+                      'observations', 'check_in_time', 'check_out_time']
+
+    def _check_time_values(self, check_in_time, check_out_time):
+        """Mismas reglas que _check_times; devuelve el mensaje de error o None"""
+        if check_in_time and (check_in_time < 0 or check_in_time >= 24):
+            return "La hora de entrada debe estar entre 0:00 y 23:59"
+        if check_out_time and (check_out_time < 0 or check_out_time >= 24):
+            return "La hora de salida debe estar entre 0:00 y 23:59"
+        if check_in_time and check_out_time and check_out_time <= check_in_time:
+            return "La hora de salida debe ser posterior a la hora de entrada"
+        return None
+
+    def _check_student_schedule_values(self, student, schedule):
+        """Reglas de _check_required_by_type para asistencias de estudiantes, más
+        la pertenencia del estudiante a la sección o mención del horario;
+        devuelve el mensaje de error o None"""
+        if not student:
+            return "Para asistencia de estudiantes es obligatorio seleccionar un estudiante"
+        if not schedule:
+            return "Para asistencia de estudiantes es obligatorio vincular a un horario de clase"
+        if schedule.section_id and student.section_id != schedule.section_id:
+            return f"El estudiante no pertenece a la sección {schedule.section_id.display_name} del horario."
+        if schedule.mention_section_id and student.mention_section_id != schedule.mention_section_id:
+            return f"El estudiante no está inscrito en la mención {schedule.mention_section_id.display_name} del horario."
+        return None
+
+    @api.model
+    def upsert_student_attendance_for_schedule(self, schedule_id, date, students_data):
+        """Toma la asistencia de toda una clase en una sola llamada.
+
+        Inserta o actualiza con una sola sentencia el registro de cada
+        estudiante para (estudiante, fecha, horario), así que enviar dos veces
+        la misma clase actualiza en lugar de fallar. Las filas inválidas se
+        informan y no detienen al resto.
+
+        :param schedule_id: ID del horario de clase
+        :param date: fecha de la clase
+        :param students_data: lista de dicts con student_id y opcionalmente
+            state, observations, check_in_time y check_out_time. Las
+            observaciones y horas no enviadas conservan su valor anterior.
+        :return: dict con created, updated, errors y lines (resultado por
+            estudiante: student_id, attendance_id, result y message)
+        """
+        self.check_access('create')
+        self.check_access('write')
+        schedule = self.env['school.schedule'].browse(schedule_id).exists()
+        if not schedule:
+            raise exceptions.UserError("El horario de clase solicitado no existe.")
+        date = fields.Date.to_date(date)
+        if not date:
+            raise exceptions.UserError("Debe indicar la fecha de la clase.")
+
+        states = dict(self._fields['state'].selection)
+        students = self.env['school.student'].browse(
+            [data.get('student_id') for data in students_data if data.get('student_id')]
+        ).exists()
+        students_by_id = {student.id: student for student in students}
+
+        lines = []
+        rows = []
+        params = []
+        seen = set()
+        for data in students_data:
+            student_id = data.get('student_id')
+            state = data.get('state') or 'present'
+            check_in_time = data.get('check_in_time') or None
+            check_out_time = data.get('check_out_time') or None
+            line = {'student_id': student_id, 'attendance_id': False, 'result': 'error', 'message': False}
+            lines.append(line)
+            if student_id not in students_by_id:
+                line['message'] = "El estudiante no existe."
+            elif student_id in seen:
+                line['message'] = "El estudiante está duplicado en la lista."
+            elif state not in states:
+                line['message'] = f"Estado de asistencia inválido: {state}"
+            else:
+                # Validaciones del ORM que la sentencia directa no ejecuta
+                line['message'] = (
+                    self._check_student_schedule_values(students_by_id[student_id], schedule)
+                    or self._check_time_values(check_in_time, check_out_time)
+                    or False
+                )
+            if line['message']:
+                continue
+            seen.add(student_id)
+            rows.append("('student', %s, %s, %s, %s, %s, %s, %s, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')")
+            params.extend([
+                student_id, date, schedule.id, state, data.get('observations') or None,
+                check_in_time, check_out_time, self.env.uid, self.env.uid,
+            ])
+
+        created = updated = 0
+        if rows:
+            self.flush_model(self._upsert_fields)
+            self.env.cr.execute(f"""
+                INSERT INTO school_attendance AS att
+                       (attendance_type, student_id, date, schedule_id, state, observations,
+                        check_in_time, check_out_time, create_uid, write_uid, create_date, write_date)
+                VALUES {', '.join(rows)}
+                ON CONFLICT (student_id, date, (COALESCE(schedule_id, 0)))
+                   WHERE attendance_type = 'student' AND student_id IS NOT NULL
+                DO UPDATE
+                   SET state = EXCLUDED.state,
+                       observations = COALESCE(EXCLUDED.observations, att.observations),
+                       check_in_time = COALESCE(EXCLUDED.check_in_time, att.check_in_time),
+                       check_out_time = COALESCE(EXCLUDED.check_out_time, att.check_out_time),
+                       write_uid = EXCLUDED.write_uid,
+                       write_date = EXCLUDED.write_date
+             RETURNING id, student_id, (xmax = 0) AS inserted
+            """, params)
+            outcome = {student_id: (attendance_id, inserted)
+                       for attendance_id, student_id, inserted in self.env.cr.fetchall()}
+
+            for line in lines:
+                if line['message'] or line['student_id'] not in outcome:
+                    continue
+                attendance_id, inserted = outcome[line['student_id']]
+                line.update(attendance_id=attendance_id, result='created' if inserted else 'updated')
+                if inserted:
+                    created += 1
+                else:
+                    updated += 1
+
+            # Los campos almacenados computados (sección, año, mes, nombre...) se
+            # recalculan por el ORM para las filas tocadas
+            records = self.browse([attendance_id for attendance_id, _inserted in outcome.values()])
+            self.invalidate_model(self._upsert_fields)
+            records.modified(self._upsert_fields)
+            self.flush_model()
+            self.env['school.attendance.rollup']._mark_dates([date])
+
+        return {
+            'schedule_id': schedule.id,
+            'date': fields.Date.to_string(date),
+            'created': created,
+            'updated': updated,
+            'errors': len(lines) - created - updated,
+            'lines': lines,
+        }
+
     @api.model
     def create_employee_daily_attendance(self, employee_ids, date, state='present'):
         """
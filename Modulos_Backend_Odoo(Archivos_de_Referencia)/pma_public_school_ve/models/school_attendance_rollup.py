@@ -0,0 +1,212 @@
+from odoo import api, fields, models
+from odoo.tools import sql
+
+
+ATTENDANCE_TYPES = [
+    ('student', 'Estudiante'),
+    ('employee', 'Personal'),
+    ('visitor', 'Visitante Externo'),
+]
+
+ATTENDANCE_STATES = [
+    ('present', 'Presente'),
+    ('absent', 'Ausente'),
+    ('late', 'Tardanza'),
+    ('permission', 'Permiso'),
+]
+
+MONTHS = [
+    ('1', 'Enero'), ('2', 'Febrero'), ('3', 'Marzo'),
+    ('4', 'Abril'), ('5', 'Mayo'), ('6', 'Junio'),
+    ('7', 'Julio'), ('8', 'Agosto'), ('9', 'Septiembre'),
+    ('10', 'Octubre'), ('11', 'Noviembre'), ('12', 'Diciembre'),
+]
+
+
+class SchoolAttendanceRollup(models.Model):
+    """Conteo diario de asistencias por sección, tipo y estado.
+
+    Cada cambio en school.attendance marca su fecha como pendiente y al
+    confirmar la transacción se recalculan solo las filas de esas fechas.
+    Las estadísticas leen unos cientos de filas en lugar de todo el histórico.
+    Un índice único sobre la clave (fecha, sección, tipo, estado) evita que
+    dos recálculos concurrentes dupliquen filas: cada uno actualiza la suya.
+    """
+    _name = 'school.attendance.rollup'
+    _description = 'School Attendance Daily Rollup'
+    _order = 'date desc, id'
+
+    date = fields.Date(string='Fecha', required=True, index=True, readonly=True)
+
+    section_id = fields.Many2one(comodel_name='school.section', string='Sección', index=True, readonly=True)
+
+    year_id = fields.Many2one(comodel_name='school.year', string='Año Escolar', index=True, readonly=True)
+
+    attendance_type = fields.Selection(selection=ATTENDANCE_TYPES, string='Tipo de Asistencia', readonly=True)
+
+    state = fields.Selection(selection=ATTENDANCE_STATES, string='Estado', readonly=True)
+
+    month = fields.Selection(selection=MONTHS, string='Mes', readonly=True)
+
+    week_number = fields.Integer(string='Número de Semana', readonly=True)
+
+    attendance_count = fields.Integer(string='Cantidad', readonly=True)
+
+    _key_index = 'school_attendance_rollup_key_uniq'
+
+    def init(self):
+        if not sql.index_exists(self.env.cr, self._key_index):
+            # Filas previas al índice (pueden estar duplicadas): se recalculan todas
+            self.env.cr.execute("DELETE FROM school_attendance_rollup")
+            self.env.cr.execute(f"""
+                CREATE UNIQUE INDEX {self._key_index} ON school_attendance_rollup
+                       (date, COALESCE(section_id, 0), attendance_type, state)
+            """)
+        # Al instalar o actualizar el módulo se llena la tabla desde las asistencias existentes
+        self.env.cr.execute("SELECT 1 FROM school_attendance_rollup LIMIT 1")
+        if not self.env.cr.fetchone():
+            self._rebuild_dates()
+
+    @api.model
+    def _mark_dates(self, dates):
+        """Agrega fechas al conjunto pendiente de la transacción actual"""
+        dates = {date for date in dates if date}
+        if not dates:
+            return
+        precommit = self.env.cr.precommit
+        pending = precommit.data.get('school.attendance.rollup')
+        if pending is None:
+            pending = precommit.data['school.attendance.rollup'] = set()
+            precommit.add(self._flush_pending)
+        pending.update(dates)
+
+    @api.model
+    def _flush_pending(self):
+        """Recalcula las fechas pendientes (se ejecuta una vez, al confirmar)"""
+        dates = self.env.cr.precommit.data.pop('school.attendance.rollup', None)
+        if dates:
+            self._rebuild_dates(dates)
+
+    @api.model
+    def _rebuild_dates(self, dates=None):
+        """Recalcula por SQL las filas de las fechas dadas (None = todas)"""
+        self.env['school.attendance'].flush_model(
+            ['date', 'section_id', 'year_id', 'attendance_type', 'state', 'month', 'week_number'])
+        where = ''
+        params = [self.env.uid, self.env.uid]
+        if dates is not None:
+            if not dates:
+                return
+            where = 'WHERE att.date IN %s'
+            params.append(tuple(dates))
+
+        # Upsert sobre la clave única: un recálculo concurrente de las mismas
+        # fechas espera a este y sobrescribe los conteos en lugar de sumarlos
+        self.env.cr.execute(f"""
+            INSERT INTO school_attendance_rollup
+                   (date, section_id, year_id, attendance_type, state, month, week_number, attendance_count,
+                    create_uid, write_uid, create_date, write_date)
+            SELECT att.date, att.section_id, MAX(att.year_id), att.attendance_type, att.state,
+                   MAX(att.month), MAX(att.week_number), COUNT(*),
+                   %s, %s, now() at time zone 'UTC', now() at time zone 'UTC'
+              FROM school_attendance att
+              {where}
+          GROUP BY att.date, att.section_id, att.attendance_type, att.state
+            ON CONFLICT (date, COALESCE(section_id, 0), attendance_type, state) DO UPDATE
+               SET year_id = EXCLUDED.year_id,
+                   month = EXCLUDED.month,
+                   week_number = EXCLUDED.week_number,
+                   attendance_count = EXCLUDED.attendance_count,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, params)
+
+        # Filas cuya combinación ya no tiene asistencias
+        stale_where = 'WHERE r.date IN %s AND' if dates is not None else 'WHERE'
+        self.env.cr.execute(f"""
+            DELETE FROM school_attendance_rollup r
+              {stale_where} NOT EXISTS (
+                    SELECT 1 FROM school_attendance att
+                     WHERE att.date = r.date
+                       AND COALESCE(att.section_id, 0) = COALESCE(r.section_id, 0)
+                       AND att.attendance_type = r.attendance_type
+                       AND att.state = r.state
+              )
+        """, params[2:])
+        self.invalidate_model()
+
+    @api.model
+    def _get_state_counts(self, domain):
+        """Suma los conteos por estado: {estado: cantidad}"""
+        return {
+            state: count
+            for state, count in self._read_group(domain, ['state'], ['attendance_count:sum'])
+        }
+
+
+class SchoolAttendanceRollupMonthly(models.Model):
+    """Asistencias por mes (vista SQL sobre el conteo diario)"""
+    _name = 'school.attendance.rollup.monthly'
+    _description = 'School Attendance Monthly Rollup'
+    _auto = False
+    _order = 'calendar_year desc, month_number desc'
+
+    calendar_year = fields.Integer(string='Año', readonly=True)
+    month = fields.Selection(selection=MONTHS, string='Mes', readonly=True)
+    month_number = fields.Integer(string='Número de Mes', readonly=True)
+    section_id = fields.Many2one(comodel_name='school.section', string='Sección', readonly=True)
+    year_id = fields.Many2one(comodel_name='school.year', string='Año Escolar', readonly=True)
+    attendance_type = fields.Selection(selection=ATTENDANCE_TYPES, string='Tipo de Asistencia', readonly=True)
+    state = fields.Selection(selection=ATTENDANCE_STATES, string='Estado', readonly=True)
+    attendance_count = fields.Integer(string='Cantidad', readonly=True)
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT MIN(r.id) AS id,
+                       EXTRACT(YEAR FROM r.date)::int AS calendar_year,
+                       r.month,
+                       r.month::int AS month_number,
+                       r.section_id,
+                       MAX(r.year_id) AS year_id,
+                       r.attendance_type,
+                       r.state,
+                       SUM(r.attendance_count)::int AS attendance_count
+                  FROM school_attendance_rollup r
+              GROUP BY EXTRACT(YEAR FROM r.date), r.month, r.section_id, r.attendance_type, r.state
+            )
+        """)
+
+
+class SchoolAttendanceRollupWeekly(models.Model):
+    """Asistencias por semana ISO (vista SQL sobre el conteo diario)"""
+    _name = 'school.attendance.rollup.weekly'
+    _description = 'School Attendance Weekly Rollup'
+    _auto = False
+    _order = 'iso_year desc, week_number desc'
+
+    iso_year = fields.Integer(string='Año (ISO)', readonly=True)
+    week_number = fields.Integer(string='Número de Semana', readonly=True)
+    date_start = fields.Date(string='Primer día registrado', readonly=True)
+    section_id = fields.Many2one(comodel_name='school.section', string='Sección', readonly=True)
+    year_id = fields.Many2one(comodel_name='school.year', string='Año Escolar', readonly=True)
+    attendance_type = fields.Selection(selection=ATTENDANCE_TYPES, string='Tipo de Asistencia', readonly=True)
+    state = fields.Selection(selection=ATTENDANCE_STATES, string='Estado', readonly=True)
+    attendance_count = fields.Integer(string='Cantidad', readonly=True)
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT MIN(r.id) AS id,
+                       EXTRACT(ISOYEAR FROM r.date)::int AS iso_year,
+                       r.week_number,
+                       MIN(r.date) AS date_start,
+                       r.section_id,
+                       MAX(r.year_id) AS year_id,
+                       r.attendance_type,
+                       r.state,
+                       SUM(r.attendance_count)::int AS attendance_count
+                  FROM school_attendance_rollup r
+              GROUP BY EXTRACT(ISOYEAR FROM r.date), r.week_number, r.section_id, r.attendance_type, r.state
+            )
+        """)
@@ -210,26 +210,126 @@ class SchoolEvaluation(models.Model):
                     )
         
         res = super().create(vals)
-        for rec in res:
-            # Crear líneas de calificación para estudiantes
-            if rec.section_id:
-                # Estudiantes de la sección regular
-                students = rec.section_id.student_ids.filtered(
-                    lambda s: s.current and s.state == 'done'
+        # Crear las líneas de calificación (en borrador) de todas las evaluaciones
+        # en un solo INSERT; no afectan el rendimiento hasta que se califiquen
+        res.mapped('section_id.student_ids')
+        res.mapped('mention_section_id.student_ids')
+        score_vals = [{
+            'evaluation_id': rec.id,
+            'student_id': st.id
+        } for rec in res for st in rec._get_gradable_students()]
+        if score_vals:
+            self.env['school.evaluation.score'].with_context(school_bulk_scores=True).create(score_vals)
+        res.mapped('year_id')._on_dashboard_data_changed()
+        return res
+
+    def _get_gradable_students(self):
+        """Estudiantes que se califican en esta evaluación"""
+        self.ensure_one()
+        if self.section_id:
+            # Estudiantes de la sección regular
+            return self.section_id.student_ids.filtered(
+                lambda s: s.current and s.state == 'done'
+            )
+        if self.mention_section_id:
+            # Estudiantes inscritos en la mención
+            return self.mention_section_id.student_ids.filtered(
+                lambda s: s.current and s.state == 'done' and s.mention_state == 'enrolled'
+            )
+        return self.env['school.student']
+
+    @api.model
+    def submit_scores(self, evaluation_id, lines):
+        """Carga las notas de toda una evaluación en una sola llamada.
+        
+        Crea o actualiza la línea de cada estudiante, valida una sola vez y
+        actualiza los acumulados de los estudiantes y el dashboard del año una
+        sola vez para todo el lote.
+        
+        :param evaluation_id: ID de la evaluación
+        :param lines: lista de dicts con 'student_id' y 'score', 'literal'
+            (o 'literal_type') y/o 'observation'
+        :return: dict con evaluation_id, created, updated, state y score_average
+        """
+        evaluation = self.browse(evaluation_id).exists()
+        if not evaluation:
+            raise exceptions.UserError("La evaluación solicitada no existe.")
+        evaluation.check_access('write')
+        if evaluation.year_id.state == 'finished':
+            raise exceptions.UserError(
+                f"No se pueden cargar notas en el año escolar '{evaluation.year_id.name}' porque está finalizado."
+            )
+        
+        gradable = evaluation._get_gradable_students()
+        values_by_student = {}
+        for line in lines:
+            student_id = line.get('student_id')
+            if student_id in values_by_student:
+                student = self.env['school.student'].browse(student_id)
+                raise exceptions.UserError(f"El {student.name} está duplicado")
+            if student_id not in gradable.ids:
+                raise exceptions.UserError(
+                    f"El estudiante {student_id} no pertenece a la sección o mención de la evaluación '{evaluation.name}'."
                 )
-            elif rec.mention_section_id:
-                # Estudiantes inscritos en la mención
-                students = rec.mention_section_id.student_ids.filtered(
-                    lambda s: s.current and s.state == 'done' and s.mention_state == 'enrolled'
+            vals = {}
+            if 'score' in line:
+                vals['score'] = line['score'] or 0.0
+            if 'literal' in line or 'literal_type' in line:
+                vals['literal_type'] = line.get('literal', line.get('literal_type')) or False
+            if 'observation' in line:
+                vals['observation'] = line['observation'] or False
+            values_by_student[student_id] = vals
+        
+        Score = self.env['school.evaluation.score'].with_context(school_bulk_scores=True)
+        Aggregate = self.env['school.student.subject.aggregate']
+        existing = {
+            score.student_id.id: score
+            for score in Score.search([('evaluation_id', '=', evaluation.id),
+                                       ('student_id', 'in', list(values_by_student))])
+        }
+        
+        to_update = Score.browse([existing[sid].id for sid in values_by_student if sid in existing])
+        removed = Aggregate._score_contributions(to_update)
+        updates = {}
+        for student_id, vals in values_by_student.items():
+            score = existing.get(student_id)
+            if score:
+                evaluation._check_score_values(
+                    vals.get('score', score.score),
+                    vals.get('literal_type', score.literal_type),
+                    vals.get('observation', score.observation),
                 )
+                if vals:
+                    updates[score] = vals
             else:
-                students = self.env['school.student']
-            
-            # if students:
-            #     rec.evaluation_score_ids.create([{
-            #         'evaluation_id': rec.id,
-            #         'student_id': st.id
-            #     } for st in students])
+                evaluation._check_score_values(
+                    vals.get('score', 0.0), vals.get('literal_type'), vals.get('observation'))
+        if updates:
+            Score.browse([score.id for score in updates])._write_submitted_scores(updates)
+        created = Score.create([
+            dict(vals, evaluation_id=evaluation.id, student_id=student_id)
+            for student_id, vals in values_by_student.items()
+            if student_id not in existing
+        ])
+        
+        Aggregate._apply_deltas(removed, Aggregate._score_contributions(to_update | created))
+        evaluation.year_id._on_dashboard_data_changed()
+        return {
+            'evaluation_id': evaluation.id,
+            'created': len(created),
+            'updated': len(to_update),
+            'state': evaluation.state,
+            'score_average': evaluation.score_average,
+        }
+
+    def write(self, vals):
+        years = self.mapped('year_id')
+        res = super().write(vals)
+        # Las notas cambian de materia/lapso/sección sin pasar por su write:
+        # recalcular los acumulados de los estudiantes afectados
+        if {'subject_id', 'lapso', 'section_id', 'mention_section_id'} & set(vals):
+            self.env['school.student.subject.aggregate']._rebuild(self.evaluation_score_ids.student_id)
+        (years | self.mapped('year_id'))._on_dashboard_data_changed()
         return res
 
 
@@ -245,59 +345,64 @@ class SchoolEvaluation(models.Model):
             else:
                 rec.state = 'draft'
     
+    def _check_score_values(self, score, literal_type, observation):
+        """Valida una nota según el tipo de evaluación"""
+        self.ensure_one()
+        if self.type == 'secundary':
+            # Solo validar base 20 para secundaria
+            if score > 20:
+                raise exceptions.UserError("La nota debe ser igual o menor a 20")
+            elif score < 0:
+                raise exceptions.UserError("La nota no puede tener valores negativos")
+
+        elif self.type == 'primary':
+            if self.year_id.evalution_type_primary.type_evaluation == 'literal':
+                if not literal_type:
+                    raise exceptions.UserError("Debe tener un literal el estudiante")
+            else:
+                # Primaria con notas numéricas (base 20)
+                if score > 20:
+                    raise exceptions.UserError("La nota debe ser igual o menor a 20")
+                elif score < 0:
+                    raise exceptions.UserError("La nota no puede tener valores negativos")
+
+        elif self.type == 'pre':
+            if not observation:
+                raise exceptions.UserError("Debe tener una observación el estudiante")
+
     @api.constrains('evaluation_score_ids')
     def _check_evaluation_score_ids(self):
+        # Los estudiantes duplicados los rechaza el índice único de school.evaluation.score.
+        # Las líneas en borrador (aún sin calificar) no se validan
         for rec in self:
-            students = []
-            for scores in rec.evaluation_score_ids:
-                if rec.type == 'secundary':
-                    # Solo validar base 20 para secundaria
-                    if scores.score > 20:
-                        raise exceptions.UserError("La nota debe ser igual o menor a 20")
-                    elif scores.score < 0:
-                        raise exceptions.UserError("La nota no puede tener valores negativos")
-
-                elif rec.type == 'primary':
-                    if rec.year_id.evalution_type_primary.type_evaluation == 'literal':
-                        if not scores.literal_type:
-                            raise exceptions.UserError("Debe tener un literal el estudiante")
-                    else:
-                        # Primaria con notas numéricas (base 20)
-                        if scores.score > 20:
-                            raise exceptions.UserError("La nota debe ser igual o menor a 20")
-                        elif scores.score < 0:
-                            raise exceptions.UserError("La nota no puede tener valores negativos")
-
-                elif rec.type == 'pre':
-                    if not scores.observation:
-                            raise exceptions.UserError("Debe tener una observación el estudiante")
-                            
-                if scores.student_id in students:
-                    raise exceptions.UserError(f"El {scores.student_id.name} está duplicado")
-
-                students.append(scores.student_id)
+            for scores in rec.evaluation_score_ids.filtered(lambda score: score.state != 'draft'):
+                rec._check_score_values(scores.score, scores.literal_type, scores.observation)
     
     state_score = fields.Selection(string='Estado de nota', selection=[('approve', 'La mayoría aprobó'), ('failed', 'La mayoría desaprobó'),], compute="_compute_state_score", store=True)
 
-    @api.depends('evaluation_score_ids', 'evaluation_score_ids.state_score')
+    @api.depends('evaluation_score_ids', 'evaluation_score_ids.state_score', 'evaluation_score_ids.state')
     def _compute_state_score(self):
         for rec in self:
-            minimun = int(len(rec.evaluation_score_ids) / 2)
-            approved = len(rec.evaluation_score_ids.filtered(lambda x: x.state_score == 'approve'))
+            # Solo cuentan las notas calificadas, no las líneas en borrador
+            qualified = rec.evaluation_score_ids.filtered(lambda x: x.state != 'draft')
+            minimun = int(len(qualified) / 2)
+            approved = len(qualified.filtered(lambda x: x.state_score == 'approve'))
             rec.state_score = 'approve' if approved > minimun else 'failed'
     
     score_average = fields.Char(string='Promedio', compute="_compute_score_average", store=True)
 
-    @api.depends('invisible_score', 'invisible_literal', 'invisible_observation', 'evaluation_score_ids', 'evaluation_score_ids.literal_type', 'evaluation_score_ids.points_20')
+    @api.depends('invisible_score', 'invisible_literal', 'invisible_observation', 'evaluation_score_ids', 'evaluation_score_ids.literal_type', 'evaluation_score_ids.points_20', 'evaluation_score_ids.state')
     def _compute_score_average(self):
         for rec in self:
             average = ' '
+            # Solo cuentan las notas calificadas, no las líneas en borrador
+            qualified = rec.evaluation_score_ids.filtered(lambda x: x.state != 'draft')
             if not rec.invisible_score:
-                all_scores = rec.evaluation_score_ids.mapped('points_20')
+                all_scores = qualified.mapped('points_20')
                 average = f"{sum(all_scores) / len(all_scores)} pts".replace('.', ',') if all_scores else '0 pts'
             
             elif not rec.invisible_literal:
-                all_scores = Counter(rec.evaluation_score_ids.mapped('literal_type'))
+                all_scores = Counter(qualified.mapped('literal_type'))
                 average = f"{all_scores.most_common(1)[0][0] if all_scores else ' '}"
             
             elif not rec.invisible_observation:
@@ -316,11 +421,16 @@ class SchoolEvaluation(models.Model):
                     f"'{record.year_id.name}' está finalizado."
                 )
             
-            # Check for evaluation scores
-            if record.evaluation_score_ids:
+            # Check for evaluation scores (las líneas en borrador se crean solas y no cuentan)
+            qualified = record.evaluation_score_ids.filtered(lambda score: score.state == 'qualified')
+            if qualified:
                 raise exceptions.UserError(
-                    f"No se puede eliminar la evaluación '{record.name}' porque tiene {len(record.evaluation_score_ids)} "
+                    f"No se puede eliminar la evaluación '{record.name}' porque tiene {len(qualified)} "
                     f"puntaje(s) registrado(s). Elimine primero todos los puntajes de esta evaluación."
                 )
         
-        return super().unlink()
+        years = self.mapped('year_id')
+        self.evaluation_score_ids.unlink()
+        res = super().unlink()
+        years._on_dashboard_data_changed()
+        return res
@@ -1,4 +1,4 @@
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, exceptions
 
 
 
@@ -7,9 +7,15 @@ class SchoolEvaluationScore(models.Model):
     _name = 'school.evaluation.score'
     _description = 'School Evaluation Score'
 
+    # Un estudiante aparece una sola vez en cada evaluación
+    _student_unique_idx = models.UniqueIndex(
+        "(evaluation_id, student_id) WHERE student_id IS NOT NULL",
+        "Un estudiante está duplicado en la evaluación.",
+    )
+
     evaluation_id = fields.Many2one(comodel_name='school.evaluation', string='Evaluación', required=True)
 
-    year_id = fields.Many2one(comodel_name='school.year', string='Año escolar', related='evaluation_id.year_id', store=True)
+    year_id = fields.Many2one(comodel_name='school.year', string='Año escolar', related='evaluation_id.year_id', store=True, index=True)
     
     lapso = fields.Selection(
         selection=[
@@ -45,7 +51,7 @@ class SchoolEvaluationScore(models.Model):
         store=True
     )
 
-    student_id = fields.Many2one(comodel_name='school.student', string='Estudiante', required=True)
+    student_id = fields.Many2one(comodel_name='school.student', string='Estudiante', required=True, index=True)
 
     literal_type = fields.Selection(string='Tipo literal', selection=[
                                                                         ('A', 'A - Superó las espectativas'),
@@ -109,22 +115,77 @@ class SchoolEvaluationScore(models.Model):
             elif not rec.evaluation_id.invisible_literal:
                 rec.state_score = 'approve' if rec.literal_type and 'C' >= rec.literal_type else 'failed'
 
+    # Campos que cambian el aporte de la nota a school.student.subject.aggregate
+    _aggregate_fields = {'score', 'literal_type', 'observation', 'evaluation_id', 'student_id'}
+
     def write(self, vals):
+        if self.env.context.get('school_bulk_scores'):
+            # school.evaluation.submit_scores actualiza acumulados y dashboard una sola vez
+            return super().write(vals)
+        Aggregate = self.env['school.student.subject.aggregate']
+        track = bool(self._aggregate_fields & set(vals))
+        removed = Aggregate._score_contributions(self) if track else []
         res = super().write(vals)
-        # Actualizar rendimiento del estudiante cuando se modifican las calificaciones
-        if 'score' in vals or 'literal_type' in vals or 'observation' in vals:
-            students_to_update = self.mapped('student_id.student_id').filtered(lambda s: s)
-            if students_to_update:
-                students_to_update._update_performance_json()
+        # Actualizar por delta los acumulados (y con ellos el rendimiento del estudiante)
+        if track:
+            Aggregate._apply_deltas(removed, Aggregate._score_contributions(self))
+        self.mapped('year_id')._on_dashboard_data_changed()
         return res
 
     @api.model_create_multi
     def create(self, vals_list):
         res = super().create(vals_list)
-        # Actualizar rendimiento del estudiante cuando se crean nuevas calificaciones
-        students_to_update = res.mapped('student_id.student_id').filtered(lambda s: s)
-        if students_to_update:
-            students_to_update._update_performance_json()
+        if self.env.context.get('school_bulk_scores'):
+            return res
+        # Sumar las nuevas calificaciones a los acumulados del estudiante
+        Aggregate = self.env['school.student.subject.aggregate']
+        Aggregate._apply_deltas([], Aggregate._score_contributions(res))
+        res.mapped('year_id')._on_dashboard_data_changed()
+        return res
+
+    # Campos que school.evaluation.submit_scores escribe directamente por SQL
+    _submitted_fields = ['score', 'literal_type', 'observation']
+
+    def _write_submitted_scores(self, values_by_score):
+        """Escribe en una sola sentencia los valores enviados de cada línea
+        ({línea: vals} con claves de _submitted_fields; las que faltan se
+        conservan). Las validaciones las hace submit_scores antes."""
+        self.check_access('write')
+        self.flush_model(self._submitted_fields)
+        rows = []
+        params = []
+        for score, vals in values_by_score.items():
+            rows.append("(%s, %s, %s::float8, %s, %s::varchar, %s, %s::text)")
+            params.append(score.id)
+            for name in self._submitted_fields:
+                # convert_to_column sanea el HTML de la observación como write()
+                params += [name in vals, self._fields[name].convert_to_column(vals.get(name), score)]
+        self.env.cr.execute(f"""
+            UPDATE school_evaluation_score AS sc
+               SET score = CASE WHEN v.set_score THEN v.score ELSE sc.score END,
+                   literal_type = CASE WHEN v.set_literal THEN v.literal_type ELSE sc.literal_type END,
+                   observation = CASE WHEN v.set_observation THEN v.observation ELSE sc.observation END,
+                   write_uid = %s,
+                   write_date = now() at time zone 'UTC'
+              FROM (VALUES {', '.join(rows)})
+                   AS v(id, set_score, score, set_literal, literal_type, set_observation, observation)
+             WHERE sc.id = v.id
+        """, [self.env.uid] + params)
+        # Los campos calculados (puntos, estado, estado de la nota) se recalculan por el ORM
+        self.invalidate_recordset(self._submitted_fields + ['write_uid', 'write_date'])
+        self.modified(self._submitted_fields)
+
+    def unlink(self):
+        if self.env.context.get('school_bulk_scores'):
+            # Quien elimina en lote se encarga de acumulados y dashboard
+            # (p. ej. las líneas en borrador de un estudiante no aportan nada)
+            return super().unlink()
+        Aggregate = self.env['school.student.subject.aggregate']
+        removed = Aggregate._score_contributions(self)
+        years = self.mapped('year_id')
+        res = super().unlink()
+        Aggregate._apply_deltas(removed, [])
+        years._on_dashboard_data_changed()
         return res
 
 
@@ -85,6 +85,28 @@ class SchoolMentionSection(models.Model):
         string='Horarios'
     )
     
+    weekly_schedule_json = fields.Json(
+        string='Horario Semanal (JSON)',
+        compute='_compute_weekly_schedule_json',
+        store=True,
+    )
+
+    @api.depends('display_name', 'schedule_ids', 'schedule_ids.active', 'schedule_ids.day_of_week',
+                 'schedule_ids.start_time', 'schedule_ids.end_time', 'schedule_ids.classroom',
+                 'schedule_ids.color', 'schedule_ids.subject_id', 'schedule_ids.subject_id.subject_id.name',
+                 'schedule_ids.professor_id', 'schedule_ids.professor_id.name',
+                 'schedule_ids.professor_ids', 'schedule_ids.professor_ids.name')
+    def _compute_weekly_schedule_json(self):
+        """Grilla semanal de la mención; se recalcula al cambiar sus horarios"""
+        Schedule = self.env['school.schedule']
+        for record in self:
+            record.weekly_schedule_json = {
+                'schedule_type': 'subject',
+                'education_level': 'mention',
+                'section_name': record.display_name,
+                'schedules': Schedule._weekly_grid(record.schedule_ids, 'subject'),
+            }
+    
     # Evaluations for this mention
     evaluation_ids = fields.One2many(
         comodel_name='school.evaluation',
@@ -113,7 +135,8 @@ class SchoolMentionSection(models.Model):
     
     @api.depends('subject_ids', 'student_ids', 'evaluation_ids', 
                  'evaluation_ids.evaluation_score_ids.points_20',
-                 'evaluation_ids.evaluation_score_ids.state_score')
+                 'evaluation_ids.evaluation_score_ids.state_score',
+                 'evaluation_ids.evaluation_score_ids.state')
     def _compute_subjects_average_json(self):
         """Calcula los promedios de todas las materias de la mención"""
         for record in self:
@@ -127,7 +150,8 @@ class SchoolMentionSection(models.Model):
                 scores = self.env['school.evaluation.score'].search([
                     ('student_id', '=', student.id),
                     ('mention_section_id', '=', record.id),
-                    ('is_mention_score', '=', True)
+                    ('is_mention_score', '=', True),
+                    ('state', '!=', 'draft'),
                 ])
                 
                 for score in scores:
@@ -196,7 +220,8 @@ class SchoolMentionSection(models.Model):
 
     @api.depends('student_ids', 'evaluation_ids',
                  'evaluation_ids.evaluation_score_ids.points_20',
-                 'evaluation_ids.evaluation_score_ids.state_score')
+                 'evaluation_ids.evaluation_score_ids.state_score',
+                 'evaluation_ids.evaluation_score_ids.state')
     def _compute_students_average_json(self):
         """Calcula los promedios de estudiantes en la mención"""
         for record in self:
@@ -214,7 +239,8 @@ class SchoolMentionSection(models.Model):
                 scores = self.env['school.evaluation.score'].search([
                     ('student_id', '=', student.id),
                     ('mention_section_id', '=', record.id),
-                    ('is_mention_score', '=', True)
+                    ('is_mention_score', '=', True),
+                    ('state', '!=', 'draft'),
                 ])
                 
                 if scores:
@@ -261,7 +287,8 @@ class SchoolMentionSection(models.Model):
             record.students_average_json = result
 
     @api.depends('student_ids', 'evaluation_ids',
-                 'evaluation_ids.evaluation_score_ids.points_20')
+                 'evaluation_ids.evaluation_score_ids.points_20',
+                 'evaluation_ids.evaluation_score_ids.state')
     def _compute_top_students_json(self):
         """Calcula los top 5 estudiantes con mejor promedio en la mención"""
         for record in self:
@@ -274,7 +301,8 @@ class SchoolMentionSection(models.Model):
                 scores = self.env['school.evaluation.score'].search([
                     ('student_id', '=', student.id),
                     ('mention_section_id', '=', record.id),
-                    ('is_mention_score', '=', True)
+                    ('is_mention_score', '=', True),
+                    ('state', '!=', 'draft'),
                 ])
                 
                 if not scores:
@@ -343,7 +371,9 @@ class SchoolMentionSection(models.Model):
                 # Set lapso_inscripcion from year's current_lapso
                 if 'lapso_inscripcion' not in vals:
                     vals['lapso_inscripcion'] = year.current_lapso or '1'
-        return super().create(vals_list)
+        res = super().create(vals_list)
+        res.mapped('year_id')._on_dashboard_data_changed()
+        return res
     
     def write(self, vals):
         for record in self:
@@ -352,7 +382,10 @@ class SchoolMentionSection(models.Model):
                     f"No se puede modificar la mención inscrita porque el año escolar "
                     f"'{record.year_id.name}' está finalizado."
                 )
-        return super().write(vals)
+        years = self.mapped('year_id')
+        res = super().write(vals)
+        (years | self.mapped('year_id'))._on_dashboard_data_changed()
+        return res
     
     def unlink(self):
         for record in self:
@@ -376,4 +409,7 @@ class SchoolMentionSection(models.Model):
                     "materia(s) asignada(s)."
                 )
         
-        return super().unlink()
+        years = self.mapped('year_id')
+        res = super().unlink()
+        years._on_dashboard_data_changed()
+        return res
@@ -63,7 +63,15 @@ class SchoolProfessor(models.Model):
             if 'year_id' in vals and 'lapso_inscripcion' not in vals:
                 year = self.env['school.year'].browse(vals['year_id'])
                 vals['lapso_inscripcion'] = year.current_lapso or '1'
-        return super().create(vals_list)
+        res = super().create(vals_list)
+        res.mapped('year_id')._on_dashboard_data_changed()
+        return res
+    
+    def write(self, vals):
+        years = self.mapped('year_id')
+        res = super().write(vals)
+        (years | self.mapped('year_id'))._on_dashboard_data_changed()
+        return res
     
     def unlink(self):
         """Prevent deletion of professors with assigned subjects, evaluations, or sections"""
@@ -93,4 +101,7 @@ class SchoolProfessor(models.Model):
                     f"Elimine primero las asignaciones de secciones."
                 )
         
-        return super().unlink()
+        years = self.mapped('year_id')
+        res = super().unlink()
+        years._on_dashboard_data_changed()
+        return res
@@ -1,6 +1,60 @@
+from bisect import bisect_left
+from collections import defaultdict
+
 from odoo import _, api, fields, models, exceptions
 
 
+class ScheduleConflictIndex:
+    """Índice de intervalos por recurso (sección, mención, profesor o aula) y día.
+
+    Los intervalos de cada (recurso, día) se ordenan por hora de inicio y se
+    guarda, para cada prefijo, los dos intervalos que terminan más tarde. Así
+    saber si un bloque choca es una búsqueda binaria: entre los intervalos que
+    empiezan antes de que termine el bloque, basta ver si el que termina más
+    tarde (sin contar el propio horario) termina después de que empiece.
+    """
+
+    def __init__(self):
+        self._intervals = defaultdict(list)
+        self._starts = {}
+        self._latest = {}
+        # Horarios aún no guardados por referencia sintética, p. ej. ('tpl', fila)
+        self.records = {}
+
+    def add(self, key, day, start, end, ref):
+        slot = (key, day)
+        self._intervals[slot].append((start, end, ref))
+        self._starts.pop(slot, None)
+        self._latest.pop(slot, None)
+
+    def _prepare(self, slot):
+        intervals = sorted(self._intervals.get(slot, ()), key=lambda interval: interval[0])
+        latest = []
+        first = second = None
+        for _start, end, ref in intervals:
+            if first is None or end > first[0]:
+                first, second = (end, ref), first
+            elif second is None or end > second[0]:
+                second = (end, ref)
+            latest.append((first, second))
+        self._starts[slot] = [interval[0] for interval in intervals]
+        self._latest[slot] = latest
+
+    def find(self, key, day, start, end, exclude=None):
+        """Referencia de un intervalo que se solapa con [start, end) o None"""
+        slot = (key, day)
+        if slot not in self._starts:
+            self._prepare(slot)
+        position = bisect_left(self._starts[slot], end)
+        if not position:
+            return None
+        for candidate in self._latest[slot][position - 1]:
+            if candidate is None or candidate[1] == exclude:
+                continue
+            return candidate[1] if candidate[0] > start else None
+        return None
+
+
 class SchoolSchedule(models.Model):
     _name = 'school.schedule'
     _description = 'School Schedule'
@@ -215,6 +269,13 @@ class SchoolSchedule(models.Model):
         for record in self:
             record.attendance_count = len(record.attendance_ids)
 
+    def write(self, vals):
+        res = super().write(vals)
+        if 'section_id' in vals:
+            # Las asistencias sin sección de estudiante la toman del horario
+            self.env['school.attendance']._mark_rollup_dates([('schedule_id', 'in', self.ids)])
+        return res
+
     # Constraints y validaciones
     @api.constrains('start_time', 'end_time')
     def _check_times(self):
@@ -259,43 +320,6 @@ class SchoolSchedule(models.Model):
                         "es obligatorio seleccionar al menos un profesor"
                     )
 
-    @api.constrains('section_id', 'day_of_week', 'start_time', 'end_time', 'subject_id')
-    def _check_section_overlap(self):
-        """Valida que no haya solapamiento de horarios para la misma sección"""
-        for record in self:
-            if not record.active:
-                continue
-                
-            domain = [
-                ('section_id', '=', record.section_id.id),
-                ('day_of_week', '=', record.day_of_week),
-                ('id', '!=', record.id),
-                ('active', '=', True),
-            ]
-            
-            overlapping = self.search(domain)
-            
-            for schedule in overlapping:
-                # Verificar solapamiento de horarios
-                if self._times_overlap(
-                    record.start_time, record.end_time,
-                    schedule.start_time, schedule.end_time
-                ):
-                    # Mensaje diferenciado por nivel educativo
-                    if record.education_level == 'secundary':
-                        conflict_msg = f"la materia {schedule.subject_id.subject_id.name}"
-                    else:
-                        profs = ', '.join(schedule.professor_ids.mapped('name'))
-                        conflict_msg = f"clase con {profs}"
-                    
-                    raise exceptions.ValidationError(
-                        f"Conflicto de horario: La sección {record.section_id.section_id.name} ya tiene "
-                        f"{conflict_msg} programada el "
-                        f"{dict(record._fields['day_of_week'].selection)[record.day_of_week]} "
-                        f"de {self._float_to_time_string(schedule.start_time)} a "
-                        f"{self._float_to_time_string(schedule.end_time)}"
-                    )
-    
     @api.constrains('section_id', 'mention_section_id')
     def _check_section_or_mention(self):
         """Validate that either section_id or mention_section_id is set, but not both"""
@@ -309,113 +333,190 @@ class SchoolSchedule(models.Model):
                     "El horario solo puede pertenecer a una Sección o a una Mención, no a ambas."
                 )
     
-    @api.constrains('section_id', 'mention_section_id', 'day_of_week', 'start_time', 'end_time')
-    def _check_student_mention_overlap(self):
-        """Validate no overlap between section and mention schedules for same students"""
-        for record in self:
-            if not record.active:
-                continue
-            
-            # Check cross-schedule conflicts only for sections that can have mentions
-            if record.section_id and record.section_id.section_id.has_medio_tecnico:
-                # Get all students in this section who have a mention
-                students_with_mentions = record.section_id.student_ids.filtered(
-                    lambda s: s.mention_section_id and s.current and s.state == 'done'
+    @api.constrains('section_id', 'mention_section_id', 'subject_id', 'professor_id', 'professor_ids',
+                    'day_of_week', 'start_time', 'end_time', 'classroom', 'active')
+    def _check_schedule_conflicts(self):
+        """Valida solapamientos de sección, mención, estudiantes con mención,
+        profesores y aulas con un solo índice de intervalos para todo el lote
+        """
+        records = self.filtered('active')
+        crossings = {}
+        # Un índice por año escolar: aulas y profesores se repiten entre años
+        for year, year_records in records.grouped('year_id').items():
+            index = self._build_conflict_index(
+                set(year_records.mapped('day_of_week')),
+                domain=[('year_id', '=', year.id)],
+            )
+            for record in year_records:
+                conflicts = record._find_conflicts(index, crossings, first_only=True)
+                if conflicts:
+                    raise exceptions.ValidationError(conflicts[0])
+
+    def _conflict_keys(self):
+        """Recursos que ocupa el horario: [(tipo, id o nombre)]"""
+        self.ensure_one()
+        keys = []
+        if self.section_id:
+            keys.append(('section', self.section_id.id))
+        if self.mention_section_id:
+            keys.append(('mention', self.mention_section_id.id))
+        for professor in self.professor_id | self.professor_ids:
+            keys.append(('professor', professor.id))
+        classroom = (self.classroom or '').strip().lower()
+        if classroom:
+            keys.append(('classroom', classroom))
+        return keys
+
+    @api.model
+    def _build_conflict_index(self, days, domain=None, extra=None):
+        """Índice con los horarios activos de los días dados (una sola búsqueda).
+        extra: [(referencia, horario)] de horarios aún no guardados (p. ej. una
+        plantilla) que también ocupan recursos. Los NewId no sirven de referencia
+        (son falsos y no son iguales a sí mismos): se usan tuplas como ('tpl', fila).
+        """
+        index = ScheduleConflictIndex()
+        if not days:
+            return index
+        schedules = self.search_fetch(
+            [('day_of_week', 'in', list(days)), ('active', '=', True)] + (domain or []),
+            ['section_id', 'mention_section_id', 'professor_id', 'professor_ids',
+             'day_of_week', 'start_time', 'end_time', 'classroom'],
+        )
+        extra = list(extra or [])
+        for ref, schedule in [(schedule.id, schedule) for schedule in schedules] + extra:
+            for key in schedule._conflict_keys():
+                index.add(key, schedule.day_of_week, schedule.start_time, schedule.end_time, ref)
+        index.records.update(extra)
+        return index
+
+    def _conflict_schedule(self, index, ref):
+        """Horario de una referencia devuelta por el índice"""
+        return index.records.get(ref) or self.browse(ref)
+
+    def _student_crossings(self, crossings):
+        """Menciones de los estudiantes de la sección o secciones de los
+        estudiantes de la mención: {id: primer estudiante}. Se calcula una vez
+        por sección/mención y se guarda en crossings.
+        """
+        self.ensure_one()
+        if self.section_id:
+            cache_key = ('section', self.section_id.id)
+            if cache_key not in crossings:
+                result = {}
+                if self.section_id.section_id.has_medio_tecnico:
+                    for student in self.section_id.student_ids:
+                        if student.mention_section_id and student.current and student.state == 'done':
+                            result.setdefault(student.mention_section_id.id, student)
+                crossings[cache_key] = result
+        else:
+            cache_key = ('mention', self.mention_section_id.id)
+            if cache_key not in crossings:
+                result = {}
+                for student in self.mention_section_id.student_ids:
+                    if student.section_id and student.current and student.state == 'done':
+                        result.setdefault(student.section_id.id, student)
+                crossings[cache_key] = result
+        return crossings[cache_key]
+
+    def _find_conflicts(self, index, crossings, first_only=False, own_ref=None):
+        """Mensajes de los choques del horario contra el índice.
+        own_ref: referencia del propio horario en el índice (por defecto su id)
+        """
+        self.ensure_one()
+        own_ref = self.id if own_ref is None else own_ref
+        messages = []
+        day = self.day_of_week
+        day_name = dict(self._fields['day_of_week'].selection)[day]
+        start, end = self.start_time, self.end_time
+        own_range = f"{self._float_to_time_string(start)}-{self._float_to_time_string(end)}"
+
+        # Sección o mención
+        if self.section_id:
+            ref = index.find(('section', self.section_id.id), day, start, end, exclude=own_ref)
+            if ref is not None:
+                schedule = self._conflict_schedule(index, ref)
+                if self.education_level == 'secundary':
+                    conflict_msg = f"la materia {schedule.subject_id.subject_id.name}"
+                else:
+                    profs = ', '.join(schedule.professor_ids.mapped('name'))
+                    conflict_msg = f"clase con {profs}"
+                messages.append(
+                    f"Conflicto de horario: La sección {self.section_id.section_id.name} ya tiene "
+                    f"{conflict_msg} programada el {day_name} "
+                    f"de {self._float_to_time_string(schedule.start_time)} a "
+                    f"{self._float_to_time_string(schedule.end_time)}"
                 )
-                
-                for student in students_with_mentions:
-                    # Get this student's mention schedules
-                    mention_schedules = self.search([
-                        ('mention_section_id', '=', student.mention_section_id.id),
-                        ('day_of_week', '=', record.day_of_week),
-                        ('active', '=', True)
-                    ])
-                    
-                    for m_schedule in mention_schedules:
-                        if self._times_overlap(
-                            record.start_time, record.end_time,
-                            m_schedule.start_time, m_schedule.end_time
-                        ):
-                            raise exceptions.ValidationError(
-                                f"Conflicto de horario para el estudiante {student.student_id.name}: "
-                                f"El horario de la sección {record.section_id.section_id.name} "
-                                f"({self._float_to_time_string(record.start_time)}-{self._float_to_time_string(record.end_time)}) "
-                                f"se solapa con el horario de su mención "
-                                f"({self._float_to_time_string(m_schedule.start_time)}-{self._float_to_time_string(m_schedule.end_time)}) "
-                                f"el {dict(record._fields['day_of_week'].selection)[record.day_of_week]}."
-                            )
-            
-            # If this is a mention schedule, check against all sections with students in this mention
-            elif record.mention_section_id:
-                students_in_mention = record.mention_section_id.student_ids.filtered(
-                    lambda s: s.section_id and s.current and s.state == 'done'
+        elif self.mention_section_id:
+            ref = index.find(('mention', self.mention_section_id.id), day, start, end, exclude=own_ref)
+            if ref is not None:
+                schedule = self._conflict_schedule(index, ref)
+                messages.append(
+                    f"Conflicto de horario: La mención {self.mention_section_id.display_name} ya tiene "
+                    f"clase programada el {day_name} "
+                    f"de {self._float_to_time_string(schedule.start_time)} a "
+                    f"{self._float_to_time_string(schedule.end_time)}"
                 )
-                
-                for student in students_in_mention:
-                    # Get this student's section schedules
-                    section_schedules = self.search([
-                        ('section_id', '=', student.section_id.id),
-                        ('day_of_week', '=', record.day_of_week),
-                        ('active', '=', True)
-                    ])
-                    
-                    for s_schedule in section_schedules:
-                        if self._times_overlap(
-                            record.start_time, record.end_time,
-                            s_schedule.start_time, s_schedule.end_time
-                        ):
-                            raise exceptions.ValidationError(
-                                f"Conflicto de horario para el estudiante {student.student_id.name}: "
-                                f"El horario de la mención ({self._float_to_time_string(record.start_time)}-{self._float_to_time_string(record.end_time)}) "
-                                f"se solapa con el horario de su sección {student.section_id.section_id.name} "
-                                f"({self._float_to_time_string(s_schedule.start_time)}-{self._float_to_time_string(s_schedule.end_time)}) "
-                                f"el {dict(record._fields['day_of_week'].selection)[record.day_of_week]}."
-                            )
-
-    @api.constrains('professor_id', 'professor_ids', 'day_of_week', 'start_time', 'end_time')
-    def _check_professor_overlap(self):
-        """Valida que los profesores no tengan clases solapadas (validación cruzada)"""
-        for record in self:
-            if not record.active:
+        if first_only and messages:
+            return messages
+
+        # Estudiantes que cursan sección y mención a la vez
+        if self.section_id or self.mention_section_id:
+            other_type = 'mention' if self.section_id else 'section'
+            for other_id, student in self._student_crossings(crossings).items():
+                ref = index.find((other_type, other_id), day, start, end, exclude=own_ref)
+                if ref is None:
+                    continue
+                schedule = self._conflict_schedule(index, ref)
+                other_range = (f"{self._float_to_time_string(schedule.start_time)}-"
+                               f"{self._float_to_time_string(schedule.end_time)}")
+                if self.section_id:
+                    messages.append(
+                        f"Conflicto de horario para el estudiante {student.student_id.name}: "
+                        f"El horario de la sección {self.section_id.section_id.name} ({own_range}) "
+                        f"se solapa con el horario de su mención ({other_range}) el {day_name}."
+                    )
+                else:
+                    messages.append(
+                        f"Conflicto de horario para el estudiante {student.student_id.name}: "
+                        f"El horario de la mención ({own_range}) "
+                        f"se solapa con el horario de su sección {student.section_id.section_id.name} "
+                        f"({other_range}) el {day_name}."
+                    )
+                if first_only:
+                    return messages
+
+        # Profesores (de la materia en Media General o asignados en Primaria/Preescolar)
+        professors = self.env['school.professor']
+        if self.education_level == 'secundary' or self.mention_section_id:
+            professors |= self.professor_id
+        if self.education_level in ['primary', 'pre']:
+            professors |= self.professor_ids
+        for professor in professors:
+            ref = index.find(('professor', professor.id), day, start, end, exclude=own_ref)
+            if ref is None:
                 continue
-            
-            # Recopilar todos los profesores involucrados
-            professors_to_check = self.env['school.professor']
-            
-            # Media General: revisar profesor de la materia
-            if record.education_level == 'secundary' and record.professor_id:
-                professors_to_check |= record.professor_id
-            
-            # Primaria/Preescolar: revisar todos los profesores asignados
-            if record.education_level in ['primary', 'pre'] and record.professor_ids:
-                professors_to_check |= record.professor_ids
-            
-            # Validar cada profesor
-            for professor in professors_to_check:
-                # Buscar horarios donde este profesor participe
-                domain = [
-                    '|',
-                        ('professor_id', '=', professor.id),  # Como profesor de materia
-                        ('professor_ids', 'in', [professor.id]),  # Como profesor general
-                    ('day_of_week', '=', record.day_of_week),
-                    ('id', '!=', record.id),
-                    ('active', '=', True),
-                ]
-                
-                overlapping = self.search(domain)
-                
-                for schedule in overlapping:
-                    if self._times_overlap(
-                        record.start_time, record.end_time,
-                        schedule.start_time, schedule.end_time
-                    ):
-                        raise exceptions.ValidationError(
-                            f"Conflicto de horario para el profesor {professor.name}: "
-                            f"ya tiene clase con la sección {schedule.section_id.section_id.name} el "
-                            f"{dict(record._fields['day_of_week'].selection)[record.day_of_week]} "
-                            f"de {self._float_to_time_string(schedule.start_time)} a "
-                            f"{self._float_to_time_string(schedule.end_time)}"
-                        )
+            schedule = self._conflict_schedule(index, ref)
+            messages.append(
+                f"Conflicto de horario para el profesor {professor.name}: "
+                f"ya tiene clase con la sección {schedule.section_id.section_id.name or schedule.mention_section_id.display_name} el "
+                f"{day_name} de {self._float_to_time_string(schedule.start_time)} a "
+                f"{self._float_to_time_string(schedule.end_time)}"
+            )
+            if first_only:
+                return messages
+
+        # Aula
+        classroom = (self.classroom or '').strip()
+        if classroom:
+            ref = index.find(('classroom', classroom.lower()), day, start, end, exclude=own_ref)
+            if ref is not None:
+                schedule = self._conflict_schedule(index, ref)
+                messages.append(
+                    f"Conflicto de horario: el aula {classroom} ya está ocupada el {day_name} "
+                    f"de {self._float_to_time_string(schedule.start_time)} a "
+                    f"{self._float_to_time_string(schedule.end_time)}"
+                )
+        return messages
 
     def _times_overlap(self, start1, end1, start2, end2):
         """Verifica si dos rangos de tiempo se solapan"""
@@ -452,69 +553,116 @@ class SchoolSchedule(models.Model):
             }
         }
 
+    def _weekly_grid_entry(self, schedule_type):
+        """Datos de un horario para el widget de visualización"""
+        self.ensure_one()
+        entry = {
+            'id': self.id,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'start_time_str': self._float_to_time_string(self.start_time),
+            'end_time_str': self._float_to_time_string(self.end_time),
+            'classroom': self.classroom or '',
+            'color': self.color,
+            'duration': self.duration,
+            'professor_ids': (self.professor_id | self.professor_ids).ids,
+        }
+        
+        # Datos específicos por tipo
+        if schedule_type == 'subject':
+            # Media General y menciones: por materia
+            entry.update({
+                'subject_name': self.subject_id.subject_id.name if self.subject_id else '',
+                'professor_name': self.professor_id.name if self.professor_id else '',
+            })
+        else:
+            # Primaria/Preescolar: por profesor(es)
+            entry.update({
+                'professors_names': ', '.join(self.professor_ids.mapped('name')),
+                'professor_count': len(self.professor_ids),
+            })
+        return entry
+
+    @api.model
+    def _weekly_grid(self, schedules, schedule_type):
+        """Horarios agrupados por día (7 días) y ordenados por hora de inicio"""
+        weekly_data = {day: [] for day, _label in self._fields['day_of_week'].selection}
+        for schedule in schedules.filtered('active').sorted('start_time'):
+            weekly_data[schedule.day_of_week].append(schedule._weekly_grid_entry(schedule_type))
+        return weekly_data
+
     @api.model
     def get_weekly_schedule_enhanced(self, section_id):
         """
         Obtiene el horario semanal completo de una sección
         Formato optimizado para el widget de visualización con soporte para 7 días
         y diferenciación por tipo de horario (materia vs profesores)
+        
+        La grilla se guarda en school.section.weekly_schedule_json y se
+        recalcula solo cuando cambian los horarios de la sección.
         """
-        section = self.env['school.section'].browse(section_id)
-        schedules = self.search([
-            ('section_id', '=', section_id),
-            ('active', '=', True)
-        ])
+        return self.env['school.section'].browse(section_id).weekly_schedule_json
+
+    @api.model
+    def get_weekly_schedules(self, section_ids=None, mention_section_ids=None, professor_ids=None):
+        """
+        Grillas semanales de muchas secciones, menciones y profesores en una
+        sola llamada (vista de docentes y horario de todo el plantel).
         
-        weekly_data = {
-            '0': [],  # Lunes
-            '1': [],  # Martes
-            '2': [],  # Miércoles
-            '3': [],  # Jueves
-            '4': [],  # Viernes
-            '5': [],  # Sábado
-            '6': [],  # Domingo
-        }
+        :return: dict con 'sections', 'mentions' y 'professors', cada uno
+            {id: grilla}. La grilla de un profesor junta los horarios de todas
+            sus secciones y menciones, con el nombre de cada una.
+        """
+        Section = self.env['school.section']
+        MentionSection = self.env['school.mention.section']
+        requested_sections = set(section_ids or [])
+        requested_mentions = set(mention_section_ids or [])
+        section_ids = set(requested_sections)
+        mention_section_ids = set(requested_mentions)
+        professors = self.env['school.professor'].browse(professor_ids or []).exists()
         
-        schedule_type = 'subject' if section.type == 'secundary' else 'teacher'
+        # Secciones y menciones donde dan clase los profesores pedidos
+        if professors:
+            for section, mention in self._read_group(
+                ['|', ('professor_id', 'in', professors.ids), ('professor_ids', 'in', professors.ids)],
+                ['section_id', 'mention_section_id'],
+            ):
+                if section:
+                    section_ids.add(section.id)
+                if mention:
+                    mention_section_ids.add(mention.id)
         
-        for schedule in schedules:
-            schedule_data = {
-                'id': schedule.id,
-                'start_time': schedule.start_time,
-                'end_time': schedule.end_time,
-                'start_time_str': schedule._float_to_time_string(schedule.start_time),
-                'end_time_str': schedule._float_to_time_string(schedule.end_time),
-                'classroom': schedule.classroom or '',
-                'color': schedule.color,
-                'duration': schedule.duration,
-            }
-            
-            # Datos específicos por tipo
-            if section.type == 'secundary':
-                # Media General: por materia
-                schedule_data.update({
-                    'subject_name': schedule.subject_id.subject_id.name if schedule.subject_id else '',
-                    'professor_name': schedule.professor_id.name if schedule.professor_id else '',
-                })
-            else:
-                # Primaria/Preescolar: por profesor(es)
-                professors_names = ', '.join(schedule.professor_ids.mapped('name'))
-                schedule_data.update({
-                    'professors_names': professors_names,
-                    'professor_count': len(schedule.professor_ids),
-                })
-            
-            weekly_data[schedule.day_of_week].append(schedule_data)
+        sections = Section.search_fetch([('id', 'in', list(section_ids))], ['weekly_schedule_json', 'name'])
+        mentions = MentionSection.search_fetch(
+            [('id', 'in', list(mention_section_ids))], ['weekly_schedule_json', 'display_name'])
         
-        # Ordenar cada día por hora de inicio
-        for day in weekly_data:
-            weekly_data[day] = sorted(weekly_data[day], key=lambda x: x['start_time'])
+        professor_grids = {
+            professor.id: {
+                'professor_name': professor.name,
+                'schedules': {day: [] for day, _label in self._fields['day_of_week'].selection},
+            }
+            for professor in professors
+        }
+        owners = [(section, section.name) for section in sections] + \
+                 [(mention, mention.display_name) for mention in mentions]
+        for owner, owner_name in owners:
+            grid = owner.weekly_schedule_json or {}
+            for day, entries in (grid.get('schedules') or {}).items():
+                for entry in entries:
+                    for professor_id in entry.get('professor_ids', []):
+                        if professor_id in professor_grids:
+                            professor_grids[professor_id]['schedules'][day].append(
+                                dict(entry, owner_name=owner_name, owner_model=owner._name, owner_id=owner.id))
+        for grid in professor_grids.values():
+            for day in grid['schedules']:
+                grid['schedules'][day].sort(key=lambda entry: entry['start_time'])
         
         return {
-            'schedule_type': schedule_type,
-            'education_level': section.type,
-            'section_name': section.section_id.name,
-            'schedules': weekly_data
+            'sections': {section.id: section.weekly_schedule_json
+                         for section in sections if section.id in requested_sections},
+            'mentions': {mention.id: mention.weekly_schedule_json
+                         for mention in mentions if mention.id in requested_mentions},
+            'professors': professor_grids,
         }
 
     @api.model
@@ -523,39 +671,129 @@ class SchoolSchedule(models.Model):
         Valida si un profesor está disponible en un horario específico
         Retorna True si está disponible, False si tiene conflicto
         """
-        domain = [
+        index = self._build_conflict_index([day_of_week], domain=[
             '|',
                 ('professor_id', '=', professor_id),
                 ('professor_ids', 'in', [professor_id]),
-            ('day_of_week', '=', day_of_week),
-            ('active', '=', True),
-        ]
+        ])
+        conflict_id = index.find(('professor', professor_id), day_of_week, start_time, end_time,
+                                 exclude=exclude_schedule_id)
+        if conflict_id:
+            schedule = self.browse(conflict_id)
+            return {
+                'available': False,
+                'conflict_schedule': schedule.id,
+                'conflict_section': schedule.section_id.section_id.name,
+                'conflict_time': f"{schedule._float_to_time_string(schedule.start_time)} - {schedule._float_to_time_string(schedule.end_time)}"
+            }
         
-        if exclude_schedule_id:
-            domain.append(('id', '!=', exclude_schedule_id))
+        return {'available': True}
+
+
+    @api.model
+    def _professor_availability(self, year, professors, slots, days):
+        """Ocupación de los profesores por día y bloque de tiempo con una sola
+        búsqueda de horarios: {professor_id: {(día, slot_id): horario que
+        ocupa el bloque o None}}. La usan la matriz de disponibilidad y el
+        generador de horarios.
+        """
+        if not professors:
+            return {}
+        index = self._build_conflict_index(days, domain=[
+            ('year_id', '=', year.id),
+            '|',
+                ('professor_id', 'in', professors.ids),
+                ('professor_ids', 'in', professors.ids),
+        ])
+        return {
+            professor.id: {
+                (day, slot.id): index.find(('professor', professor.id), day, slot.start_time, slot.end_time)
+                for day in days
+                for slot in slots
+            }
+            for professor in professors
+        }
+
+    @api.model
+    def get_professor_availability_matrix(self, year_id, professor_ids=None, education_level='secundary', days=None):
+        """
+        Matriz profesor × día × bloque de tiempo de un año escolar en una sola llamada
         
-        existing_schedules = self.search(domain)
+        :param year_id: ID del año escolar
+        :param professor_ids: profesores a consultar (por defecto todos los del año)
+        :param education_level: nivel de los bloques de tiempo (school.time.slot)
+        :param days: días a consultar (por defecto lunes a viernes)
+        :return: dict con days, slots y professors; cada profesor trae
+            availability {día: {slot_id: True o datos del horario que lo ocupa}}
+            y free_count
+        """
+        year = self.env['school.year'].browse(year_id).exists()
+        if not year:
+            raise exceptions.UserError("El año escolar solicitado no existe.")
+        days = [str(day) for day in (days or ['0', '1', '2', '3', '4'])]
+        Professor = self.env['school.professor']
+        professors = Professor.browse(professor_ids).exists() if professor_ids \
+            else Professor.search([('year_id', '=', year.id)])
+        slots = self.env['school.time.slot'].search([
+            ('education_level', '=', education_level),
+            ('is_break', '=', False),
+            ('active', '=', True),
+        ], order='sequence, start_time')
         
-        for schedule in existing_schedules:
-            if self._times_overlap(start_time, end_time, schedule.start_time, schedule.end_time):
-                return {
-                    'available': False,
-                    'conflict_schedule': schedule.id,
-                    'conflict_section': schedule.section_id.section_id.name,
-                    'conflict_time': f"{schedule._float_to_time_string(schedule.start_time)} - {schedule._float_to_time_string(schedule.end_time)}"
-                }
+        busy = self._professor_availability(year, professors, slots, days)
+        busy_schedules = self.browse({
+            schedule_id for cells in busy.values() for schedule_id in cells.values() if schedule_id
+        })
+        day_names = dict(self._fields['day_of_week'].selection)
+        result = []
+        for professor in professors:
+            availability = {}
+            free_count = 0
+            for day in days:
+                cells = availability[day] = {}
+                for slot in slots:
+                    schedule_id = busy[professor.id][(day, slot.id)]
+                    if schedule_id:
+                        schedule = self.browse(schedule_id).with_prefetch(busy_schedules._ids)
+                        cells[slot.id] = {
+                            'schedule_id': schedule.id,
+                            'section': schedule.section_id.section_id.name or schedule.mention_section_id.display_name,
+                            'time': f"{schedule._float_to_time_string(schedule.start_time)} - {schedule._float_to_time_string(schedule.end_time)}",
+                        }
+                    else:
+                        cells[slot.id] = True
+                        free_count += 1
+            result.append({
+                'id': professor.id,
+                'name': professor.name,
+                'availability': availability,
+                'free_count': free_count,
+            })
         
-        return {'available': True}
-
+        return {
+            'year_id': year.id,
+            'days': [{'key': day, 'name': day_names[day]} for day in days],
+            'slots': [{
+                'id': slot.id,
+                'name': slot.name,
+                'start_time': slot.start_time,
+                'end_time': slot.end_time,
+                'time_range': slot.time_range,
+            } for slot in slots],
+            'professors': result,
+        }
 
     @api.model
     def create_from_template(self, section_id, template_data):
         """
         Crea horarios desde una plantilla
         template_data: lista de diccionarios con la configuración
-        """
-        created_schedules = self.env['school.schedule']
         
+        Toda la plantilla se valida en memoria contra los horarios existentes
+        y contra sí misma; si hay conflictos se informan todos juntos y no se
+        crea ningún horario.
+        """
+        vals_list = []
         for data in template_data:
             vals = {
                 'section_id': section_id,
@@ -569,6 +807,38 @@ class SchoolSchedule(models.Model):
             if 'time_slot_id' in data:
                 vals['time_slot_id'] = data['time_slot_id']
             
-            created_schedules |= self.create(vals)
+            vals_list.append(vals)
+        
+        if not vals_list:
+            return self.env['school.schedule']
+        
+        new_schedules = [self.new(vals) for vals in vals_list]
+        errors = []
+        valid = []
+        for position, schedule in enumerate(new_schedules, start=1):
+            try:
+                schedule._check_times()
+                schedule._check_required_fields()
+                schedule._check_section_or_mention()
+            except exceptions.ValidationError as error:
+                errors.append(f"Fila {position}: {error.args[0]}")
+                continue
+            valid.append((position, schedule))
+        
+        # Un solo índice con los horarios existentes más los de la plantilla
+        index = self._build_conflict_index(
+            {schedule.day_of_week for _position, schedule in valid},
+            domain=[('year_id', '=', self.env['school.section'].browse(section_id).year_id.id)],
+            extra=[(('tpl', position), schedule) for position, schedule in valid],
+        )
+        crossings = {}
+        for position, schedule in valid:
+            for message in schedule._find_conflicts(index, crossings, own_ref=('tpl', position)):
+                errors.append(f"Fila {position}: {message}")
+        
+        if errors:
+            raise exceptions.ValidationError(
+                "No se creó ningún horario de la plantilla:\n" + "\n".join(errors)
+            )
         
-        return created_schedules
+        return self.create(vals_list)
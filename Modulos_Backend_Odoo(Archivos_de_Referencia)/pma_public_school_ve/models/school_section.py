@@ -47,6 +47,31 @@ class SchoolSection(models.Model):
 
     student_ids = fields.One2many(comodel_name='school.student', inverse_name='section_id', string='Estudiantes', readonly=True)
 
+    schedule_ids = fields.One2many(comodel_name='school.schedule', inverse_name='section_id', string='Horarios')
+
+    weekly_schedule_json = fields.Json(
+        string='Horario Semanal (JSON)',
+        compute='_compute_weekly_schedule_json',
+        store=True,
+    )
+
+    @api.depends('type', 'section_id', 'section_id.name', 'schedule_ids', 'schedule_ids.active', 'schedule_ids.day_of_week',
+                 'schedule_ids.start_time', 'schedule_ids.end_time', 'schedule_ids.classroom',
+                 'schedule_ids.color', 'schedule_ids.subject_id', 'schedule_ids.subject_id.subject_id.name',
+                 'schedule_ids.professor_id', 'schedule_ids.professor_id.name',
+                 'schedule_ids.professor_ids', 'schedule_ids.professor_ids.name')
+    def _compute_weekly_schedule_json(self):
+        """Grilla semanal del widget de horarios; se recalcula al cambiar los horarios"""
+        Schedule = self.env['school.schedule']
+        for record in self:
+            schedule_type = 'subject' if record.type == 'secundary' else 'teacher'
+            record.weekly_schedule_json = {
+                'schedule_type': schedule_type,
+                'education_level': record.type,
+                'section_name': record.section_id.name,
+                'schedules': Schedule._weekly_grid(record.schedule_ids, schedule_type),
+            }
+
     current = fields.Boolean(string='Actual', related='year_id.current', store=True)
     
     lapso_inscripcion = fields.Selection(
@@ -82,6 +107,7 @@ class SchoolSection(models.Model):
     @api.depends('subject_ids', 'student_ids', 'student_ids.evaluation_score_ids', 
                  'student_ids.evaluation_score_ids.points_20', 
                  'student_ids.evaluation_score_ids.state_score',
+                 'student_ids.evaluation_score_ids.state',
                  'type', 'year_id')
     def _compute_subjects_average_json(self):
         """Calcula los promedios de todas las materias para media general"""
@@ -98,7 +124,8 @@ class SchoolSection(models.Model):
             
             for student in record.student_ids.filtered(lambda s: s.current and s.state == 'done'):
                 for score in student.evaluation_score_ids:
-                    if not score.subject_id or score.evaluation_id.invisible_score:
+                    # Las líneas sin calificar (borrador) no cuentan en el promedio
+                    if score.state == 'draft' or not score.subject_id or score.evaluation_id.invisible_score:
                         continue
                     
                     subject_id = score.subject_id.id
@@ -174,7 +201,7 @@ class SchoolSection(models.Model):
             record.subjects_average_json = result
 
     @api.depends('student_ids', 'student_ids.general_performance_json', 
-                 'student_ids.evaluation_score_ids', 'type', 'year_id')
+                 'student_ids.evaluation_score_ids', 'student_ids.evaluation_score_ids.state', 'type', 'year_id')
     def _compute_students_average_json(self):
         """Calcula los promedios de estudiantes en general (media general y primaria)"""
         for record in self:
@@ -279,10 +306,13 @@ class SchoolSection(models.Model):
             
             record.students_average_json = result
 
-    @api.depends('student_ids', 'student_ids.general_performance_json', 
-                 'student_ids.evaluation_score_ids', 'type', 'year_id')
+    @api.depends('student_ids', 'student_ids.general_average', 'student_ids.literal_average',
+                 'student_ids.use_literal', 'student_ids.total_subjects', 'student_ids.general_state',
+                 'student_ids.state', 'student_ids.evaluation_score_ids.state', 'type', 'year_id')
     def _compute_top_students_json(self):
         """Calcula los top 5 estudiantes con mejor promedio"""
+        Student = self.env['school.student']
+        literal_weights = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
         for record in self:
             if record.type not in ['secundary', 'primary']:
                 record.top_students_json = {}
@@ -296,38 +326,39 @@ class SchoolSection(models.Model):
             
             evaluation_type = evaluation_config.type_evaluation if evaluation_config else '20'
             
-            students_data = []
+            # Top 5 ordenado en la base de datos: por literal si la sección se
+            # evalúa con literales, si no por el promedio general indexado
+            order = 'literal_average asc, id' if evaluation_type == 'literal' else 'general_average desc, id'
+            top_students = Student.search_fetch([
+                ('section_id', '=', record._origin.id),
+                ('current', '=', True),
+                ('state', '=', 'done'),
+                ('total_subjects', '>', 0),
+            ], ['student_id', 'general_average', 'literal_average', 'general_state', 'use_literal'],
+                order=order, limit=5) if record._origin.id else Student
             
-            for student in record.student_ids.filtered(lambda s: s.current and s.state == 'done'):
-                perf_data = student.general_performance_json
-                if not perf_data or perf_data.get('total_subjects', 0) == 0:
-                    continue
-                
-                if perf_data.get('use_literal'):
+            students_data = []
+            for student in top_students:
+                if student.use_literal:
                     # Para literales, convertir a numérico aproximado
-                    literal = perf_data.get('literal_average', 'E')
-                    literal_weights = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
-                    avg = literal_weights.get(literal, 0)
+                    avg = literal_weights.get(student.literal_average or 'E', 0)
                 else:
-                    avg = perf_data.get('general_average', 0)
+                    avg = student.general_average
                 
                 students_data.append({
                     'student_id': student.student_id.id,
                     'student_name': student.student_id.name,
                     'average': avg,
-                    'literal_average': perf_data.get('literal_average'),
-                    'state': perf_data.get('general_state', 'failed'),
-                    'use_literal': perf_data.get('use_literal', False),
+                    'literal_average': student.literal_average or None,
+                    'state': student.general_state or 'failed',
+                    'use_literal': student.use_literal,
                 })
-            
-            # Ordenar por promedio descendente y tomar top 5
             students_data.sort(key=lambda x: x['average'], reverse=True)
-            top_5 = students_data[:5]
             
             result = {
                 'evaluation_type': evaluation_type,
                 'section_type': record.type,
-                'top_students': top_5,
+                'top_students': students_data,
             }
             
             record.top_students_json = result
@@ -338,7 +369,15 @@ class SchoolSection(models.Model):
             if 'year_id' in vals and 'lapso_inscripcion' not in vals:
                 year = self.env['school.year'].browse(vals['year_id'])
                 vals['lapso_inscripcion'] = year.current_lapso or '1'
-        return super().create(vals_list)
+        res = super().create(vals_list)
+        res.mapped('year_id')._on_dashboard_data_changed()
+        return res
+    
+    def write(self, vals):
+        years = self.mapped('year_id')
+        res = super().write(vals)
+        (years | self.mapped('year_id'))._on_dashboard_data_changed()
+        return res
     
     def unlink(self):
         """Prevent deletion of enrolled sections with related records or in finished years"""
@@ -372,4 +411,7 @@ class SchoolSection(models.Model):
                     f"evaluación(ones) registrada(s). Elimine primero las evaluaciones."
                 )
         
-        return super().unlink()
\ No newline at end of file
+        years = self.mapped('year_id')
+        res = super().unlink()
+        years._on_dashboard_data_changed()
+        return res
\ No newline at end of file
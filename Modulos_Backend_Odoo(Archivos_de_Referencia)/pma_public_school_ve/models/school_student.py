@@ -8,6 +8,12 @@ class SchoolStudent(models.Model):
 
     _order = 'inscription_date DESC, student_id DESC'
 
+    # Una inscripción vigente por estudiante y año escolar (las canceladas no cuentan)
+    _enrollment_unique_idx = models.UniqueIndex(
+        "(student_id, year_id) WHERE state != 'cancel'",
+        "No se puede crear la inscripción: el estudiante ya está inscrito en el año escolar seleccionado.",
+    )
+
     def _default_year(self):
         year_id = self.env['school.year'].search([('current', '=', True)], limit=1)
         return year_id.id if year_id else False
@@ -133,15 +139,22 @@ class SchoolStudent(models.Model):
 
     evaluation_score_ids = fields.One2many(comodel_name='school.evaluation.score', inverse_name='student_id', string='Puntajes de evaluaciones', readonly=True)
 
+    aggregate_ids = fields.One2many(
+        comodel_name='school.student.subject.aggregate',
+        inverse_name='student_id',
+        string='Acumulados por materia',
+        readonly=True
+    )
+
     evaluation_scores_json = fields.Json(
         string='Puntajes de evaluaciones (JSON)',
-        compute='_compute_evaluation_scores_json',
+        compute='_compute_grades',
         store=True,
     )
     
     mention_scores_json = fields.Json(
         string='Notas de Mención (JSON)',
-        compute='_compute_mention_scores_json',
+        compute='_compute_grades',
         store=True,
         help='Notas de las materias de la mención técnica'
     )
@@ -252,313 +265,315 @@ class SchoolStudent(models.Model):
     )
 
 
-    @api.depends('evaluation_score_ids.points_20', 
-                 'evaluation_score_ids.state_score', 'evaluation_score_ids.subject_id',
-                 'section_id.type', 'year_id.evalution_type_secundary')
-    def _compute_evaluation_scores_json(self):
-        """Calcula los promedios por materia para estudiantes de media general."""
+    @api.depends('aggregate_ids.points_sum', 'aggregate_ids.score_count', 'aggregate_ids.failed_count',
+                 'aggregate_ids.last_literal', 'aggregate_ids.mention_section_id',
+                 'section_id.type', 'year_id', 'year_id.evalution_type_secundary',
+                 'year_id.evalution_type_primary', 'mention_section_id', 'mention_state')
+    def _compute_grades(self):
+        """Calificaciones del estudiante en una sola pasada.
+
+        Agrupa una vez por materia los acumulados de notas y llena con ese
+        resultado los JSON de notas (media general y mención), el rendimiento
+        general y las columnas indexadas de rendimiento. Los acumulados, las
+        materias y el mecanismo de evaluación se precargan para todo el lote.
+        """
+        self.mapped('aggregate_ids.subject_id.subject_id.name')
+        self.mapped('year_id.evalution_type_primary.type_evaluation')
+        self.mapped('year_id.evalution_type_secundary.type_evaluation')
+
         for record in self:
-            if record.section_id.type != 'secundary':
-                record.evaluation_scores_json = {}
-                continue
+            primary_config = record.year_id.evalution_type_primary
+            primary_type = primary_config.type_evaluation if primary_config else False
+            subjects = record._subjects_from_aggregates(record.aggregate_ids, primary_type)
+
+            record.evaluation_scores_json = record._grade_evaluation_scores(subjects)
+
+            mention_perf = {}
+            if record.mention_section_id and record.mention_state == 'enrolled':
+                # Solo acumulados de notas de la mención inscrita
+                mention_aggregates = record.aggregate_ids.filtered(
+                    lambda a: a.is_mention and a.mention_section_id == record.mention_section_id
+                )
+                mention_perf = record._grade_mention_scores(
+                    record._subjects_from_aggregates(mention_aggregates, primary_type))
+            record.mention_scores_json = mention_perf
+
+            perf = record._grade_general_performance(subjects)
+            record.general_performance_json = perf
+
+            # Columnas indexadas (copia del JSON) para ordenar, contar y filtrar en la base de datos
+            record.general_average = perf.get('general_average') or 0.0
+            record.general_state = perf.get('general_state') or False
+            record.literal_average = perf.get('literal_average') or False
+            record.use_literal = bool(perf.get('use_literal'))
+            record.total_subjects = perf.get('total_subjects') or 0
+            record.subjects_failed = perf.get('subjects_failed') or 0
+            record.mention_average = (mention_perf.get('general_average') or 0.0) if mention_perf.get('subjects') else 0.0
+
+    def _subjects_from_aggregates(self, aggregates, primary_type):
+        """Agrupa por materia los acumulados (student, subject, lapso).
+
+        :return: lista en orden de la primera nota de cada materia con points,
+            count, failed (notas reprobadas), literal (último literal) y la
+            visibilidad de puntaje/literal según el mecanismo del año
+        """
+        subjects = {}
+        for aggregate in aggregates:
+            subject = aggregate.subject_id
+            if subject.id not in subjects:
+                score_visible, literal_visible = aggregate._visibility(primary_type)
+                subjects[subject.id] = {
+                    'subject_id': subject.id,
+                    'subject_name': subject.subject_id.name,
+                    'score_visible': score_visible,
+                    'literal_visible': literal_visible,
+                    'points': 0.0,
+                    'count': 0,
+                    'failed': 0,
+                    'literal': False,
+                    'literal_score_id': 0,
+                }
+            data = subjects[subject.id]
+            data['points'] += aggregate.points_sum
+            data['count'] += aggregate.score_count
+            data['failed'] += aggregate.failed_count
+            if aggregate.last_literal and aggregate.last_literal_score_id > data['literal_score_id']:
+                data['literal'] = aggregate.last_literal
+                data['literal_score_id'] = aggregate.last_literal_score_id
+        return list(subjects.values())
+
+    def _grade_subject_averages(self, subjects, result):
+        """Promedio y estado por materia (base 20) y promedio general en result"""
+        min_score = 10  # Siempre base 20
+        total_average = 0.0
+        subject_count = 0
+        all_approved = True
+        
+        for subject_data in subjects:
+            if subject_data['score_visible'] and subject_data['count']:
+                # Calcular promedio de la materia
+                subject_average = subject_data['points'] / subject_data['count']
+                subject_approved = subject_average >= min_score and not subject_data['failed']
                 
-            # Obtener el tipo de evaluación configurado
-            evaluation_type = record.year_id.evalution_type_secundary.type_evaluation if record.year_id.evalution_type_secundary else '20'
-            min_score = 10  # Siempre base 20
-            
-            # Agrupar notas por materia
-            subjects_data = {}
-            
-            for score in record.evaluation_score_ids:
-                if not score.subject_id or score.evaluation_id.invisible_score:
-                    continue
-                    
-                subject_id = score.subject_id.id
+                result['subjects'].append({
+                    'subject_id': subject_data['subject_id'],
+                    'subject_name': subject_data['subject_name'],
+                    'average': round(subject_average, 2),
+                    'state': 'approve' if subject_approved else 'failed',
+                    'num_evaluations': subject_data['count']
+                })
                 
-                if subject_id not in subjects_data:
-                    subjects_data[subject_id] = {
-                        'subject_id': subject_id,
-                        'subject_name': score.subject_id.subject_id.name,
-                        'scores': [],
-                        'states': []
-                    }
+                total_average += subject_average
+                subject_count += 1
                 
-                # Agregar el puntaje (siempre base 20)
-                score_value = score.points_20
-                subjects_data[subject_id]['scores'].append(score_value)
-                subjects_data[subject_id]['states'].append(score.state_score)
-            
-            # Calcular promedios y estado general
-            result = {
-                'evaluation_type': evaluation_type,
-                'subjects': [],
-                'general_average': 0.0,
-                'general_state': 'approve'
-            }
-            
-            total_average = 0.0
-            subject_count = 0
-            all_approved = True
-            
-            for subject_data in subjects_data.values():
-                if subject_data['scores']:
-                    # Calcular promedio de la materia
-                    subject_average = sum(subject_data['scores']) / len(subject_data['scores'])
-                    subject_approved = subject_average >= min_score and 'failed' not in subject_data['states']
-                    
-                    result['subjects'].append({
-                        'subject_id': subject_data['subject_id'],
-                        'subject_name': subject_data['subject_name'],
-                        'average': round(subject_average, 2),
-                        'state': 'approve' if subject_approved else 'failed',
-                        'num_evaluations': len(subject_data['scores'])
-                    })
-                    
-                    total_average += subject_average
-                    subject_count += 1
-                    
-                    if not subject_approved:
-                        all_approved = False
-            
-            # Calcular promedio general
-            if subject_count > 0:
-                result['general_average'] = round(total_average / subject_count, 2)
-                result['general_state'] = 'approve' if all_approved and result['general_average'] >= min_score else 'failed'
-            
-            record.evaluation_scores_json = result
-    
-    @api.depends('evaluation_score_ids.points_20', 
-                 'evaluation_score_ids.state_score', 'evaluation_score_ids.subject_id',
-                 'evaluation_score_ids.is_mention_score', 'mention_section_id')
-    def _compute_mention_scores_json(self):
-        """Calcula los promedios por materia de la mención técnica."""
-        for record in self:
-            # Solo calcular si el estudiante tiene mención inscrita
-            if not record.mention_section_id or record.mention_state != 'enrolled':
-                record.mention_scores_json = {}
-                continue
-            
-            min_score = 10  # Base 20
-            
-            # Agrupar notas por materia de mención
-            subjects_data = {}
-            
-            # Filtrar solo notas de mención
-            mention_scores = record.evaluation_score_ids.filtered(
-                lambda s: s.is_mention_score and s.mention_section_id == record.mention_section_id
-            )
-            
-            for score in mention_scores:
-                if not score.subject_id or score.evaluation_id.invisible_score:
-                    continue
-                    
-                subject_id = score.subject_id.id
-                
-                if subject_id not in subjects_data:
-                    subjects_data[subject_id] = {
-                        'subject_id': subject_id,
-                        'subject_name': score.subject_id.subject_id.name,
-                        'scores': [],
-                        'states': []
-                    }
-                
-                score_value = score.points_20
-                subjects_data[subject_id]['scores'].append(score_value)
-                subjects_data[subject_id]['states'].append(score.state_score)
-            
-            # Calcular promedios y estado
-            result = {
-                'evaluation_type': '20',
-                'mention_name': record.mention_section_id.mention_id.name if record.mention_section_id else '',
-                'subjects': [],
-                'general_average': 0.0,
-                'general_state': 'approve'
-            }
-            
-            total_average = 0.0
-            subject_count = 0
-            all_approved = True
-            
-            for subject_data in subjects_data.values():
-                if subject_data['scores']:
-                    subject_average = sum(subject_data['scores']) / len(subject_data['scores'])
-                    subject_approved = subject_average >= min_score and 'failed' not in subject_data['states']
-                    
-                    result['subjects'].append({
-                        'subject_id': subject_data['subject_id'],
-                        'subject_name': subject_data['subject_name'],
-                        'average': round(subject_average, 2),
-                        'state': 'approve' if subject_approved else 'failed',
-                        'num_evaluations': len(subject_data['scores'])
-                    })
-                    
-                    total_average += subject_average
-                    subject_count += 1
-                    
-                    if not subject_approved:
-                        all_approved = False
-            
-            if subject_count > 0:
-                result['general_average'] = round(total_average / subject_count, 2)
-                result['general_state'] = 'approve' if all_approved and result['general_average'] >= min_score else 'failed'
-            
-            record.mention_scores_json = result
+                if not subject_approved:
+                    all_approved = False
+        
+        # Calcular promedio general
+        if subject_count > 0:
+            result['general_average'] = round(total_average / subject_count, 2)
+            result['general_state'] = 'approve' if all_approved and result['general_average'] >= min_score else 'failed'
+        return result
+
+    def _grade_evaluation_scores(self, subjects):
+        """Promedios por materia para estudiantes de media general (evaluation_scores_json)"""
+        self.ensure_one()
+        if self.section_id.type != 'secundary':
+            return {}
+        
+        # Obtener el tipo de evaluación configurado
+        evaluation_type = self.year_id.evalution_type_secundary.type_evaluation if self.year_id.evalution_type_secundary else '20'
+        return self._grade_subject_averages(subjects, {
+            'evaluation_type': evaluation_type,
+            'subjects': [],
+            'general_average': 0.0,
+            'general_state': 'approve'
+        })
+
+    def _grade_mention_scores(self, subjects):
+        """Promedios por materia de la mención técnica (mention_scores_json)"""
+        self.ensure_one()
+        return self._grade_subject_averages(subjects, {
+            'evaluation_type': '20',
+            'mention_name': self.mention_section_id.mention_id.name if self.mention_section_id else '',
+            'subjects': [],
+            'general_average': 0.0,
+            'general_state': 'approve'
+        })
 
     general_performance_json = fields.Json(
         string='Rendimiento General (JSON)',
-        compute='_compute_general_performance_json',
+        compute='_compute_grades',
         store=True,
         readonly=True,
     )
     
-    @api.depends('evaluation_score_ids', 'evaluation_score_ids.points_20',
-                 'evaluation_score_ids.literal_type', 'evaluation_score_ids.state_score', 
-                 'evaluation_score_ids.subject_id', 'section_id.type', 'year_id')
-    def _compute_general_performance_json(self):
-        for record in self:
-            # Solo aplicar para media general y primaria
-            if record.section_id.type not in ['secundary', 'primary']:
-                record.general_performance_json = {}
-                continue
-            
-            # Determinar el tipo de evaluación según la sección
-            if record.section_id.type == 'secundary':
-                evaluation_config = record.year_id.evalution_type_secundary
-            else:  # primary
-                evaluation_config = record.year_id.evalution_type_primary
-            
-            evaluation_type = evaluation_config.type_evaluation if evaluation_config else '20'
-            
-            # Agrupar notas por materia
-            subjects_data = {}
+    def _grade_general_performance(self, subjects_data):
+        """Rendimiento general del estudiante (general_performance_json)"""
+        self.ensure_one()
+        # Solo aplicar para media general y primaria
+        if self.section_id.type not in ['secundary', 'primary']:
+            return {}
+        
+        # Determinar el tipo de evaluación según la sección
+        if self.section_id.type == 'secundary':
+            evaluation_config = self.year_id.evalution_type_secundary
+        else:  # primary
+            evaluation_config = self.year_id.evalution_type_primary
+        
+        evaluation_type = evaluation_config.type_evaluation if evaluation_config else '20'
+        
+        # Calcular promedio general
+        result = {
+            'evaluation_type': evaluation_type,
+            'section_type': self.section_id.type,
+            'total_subjects': 0,
+            'subjects_approved': 0,
+            'subjects_failed': 0,
+            'general_average': 0.0,
+            'general_state': 'approve',
+            'use_literal': False,
+            'literal_average': None,
+        }
+        
+        # Verificar si se usa sistema literal
+        use_literal = any(
+            subject_data['literal'] and subject_data['literal_visible']
+            for subject_data in subjects_data
+        )
+        result['use_literal'] = use_literal
+        
+        if use_literal:
+            # Cálculo basado en literales
+            all_literals = []
+            for subject_data in subjects_data:
+                if subject_data['literal'] and subject_data['literal_visible']:
+                    # El último literal registrado de la materia
+                    subject_literal = subject_data['literal']
+                    all_literals.append(subject_literal)
+                    
+                    # Determinar si aprobó la materia (A, B, C = aprobado)
+                    if subject_literal in ['A', 'B', 'C']:
+                        result['subjects_approved'] += 1
+                    else:
+                        result['subjects_failed'] += 1
+                    result['total_subjects'] += 1
             
-            for score in record.evaluation_score_ids:
-                if not score.subject_id:
-                    continue
-                
-                subject_id = score.subject_id.id
+            if all_literals:
+                # Calcular literal promedio (el más común o promedio ponderado)
+                literal_weights = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
+                avg_weight = sum(literal_weights.get(lit, 0) for lit in all_literals) / len(all_literals)
                 
-                if subject_id not in subjects_data:
-                    subjects_data[subject_id] = {
-                        'subject_name': score.subject_id.subject_id.name,
-                        'scores_20': [],
-                        'scores_100': [],
-                        'literal_types': [],
-                        'states': []
-                    }
+                # Convertir peso promedio a literal
+                if avg_weight >= 4.5:
+                    result['literal_average'] = 'A'
+                elif avg_weight >= 3.5:
+                    result['literal_average'] = 'B'
+                elif avg_weight >= 2.5:
+                    result['literal_average'] = 'C'
+                elif avg_weight >= 1.5:
+                    result['literal_average'] = 'D'
+                else:
+                    result['literal_average'] = 'E'
                 
-                # Agregar datos según el tipo de evaluación (siempre base 20)
-                if not score.evaluation_id.invisible_score:
-                    subjects_data[subject_id]['scores_20'].append(score.points_20)
+                # Estado general basado en literales
+                result['general_state'] = 'approve' if result['literal_average'] in ['A', 'B', 'C'] else 'failed'
+        
+        else:
+            # Cálculo basado en puntuaciones numéricas
+            total_average = 0.0
+            subject_count = 0
+            
+            for subject_data in subjects_data:
+                # Las notas siempre se acumulan en base 20
+                if evaluation_type == '20' and subject_data['score_visible'] and subject_data['count']:
+                    subject_avg = subject_data['points'] / subject_data['count']
+                    min_score = 10
+                else:
+                    continue
                 
-                if not score.evaluation_id.invisible_literal:
-                    if score.literal_type:
-                        subjects_data[subject_id]['literal_types'].append(score.literal_type)
+                total_average += subject_avg
+                subject_count += 1
+                result['total_subjects'] += 1
                 
-                subjects_data[subject_id]['states'].append(score.state_score)
+                # Determinar si aprobó la materia
+                if subject_avg >= min_score and not subject_data['failed']:
+                    result['subjects_approved'] += 1
+                else:
+                    result['subjects_failed'] += 1
             
             # Calcular promedio general
-            result = {
-                'evaluation_type': evaluation_type,
-                'section_type': record.section_id.type,
-                'total_subjects': 0,
-                'subjects_approved': 0,
-                'subjects_failed': 0,
-                'general_average': 0.0,
-                'general_state': 'approve',
-                'use_literal': False,
-                'literal_average': None,
-            }
-            
-            # Verificar si se usa sistema literal
-            use_literal = any(
-                score.literal_type and not score.evaluation_id.invisible_literal 
-                for score in record.evaluation_score_ids
-            )
-            result['use_literal'] = use_literal
-            
-            if use_literal:
-                # Cálculo basado en literales
-                all_literals = []
-                for subject_data in subjects_data.values():
-                    if subject_data['literal_types']:
-                        # Obtener el literal más frecuente o el último
-                        subject_literal = subject_data['literal_types'][-1]
-                        all_literals.append(subject_literal)
-                        
-                        # Determinar si aprobó la materia (A, B, C = aprobado)
-                        if subject_literal in ['A', 'B', 'C']:
-                            result['subjects_approved'] += 1
-                        else:
-                            result['subjects_failed'] += 1
-                        result['total_subjects'] += 1
-                
-                if all_literals:
-                    # Calcular literal promedio (el más común o promedio ponderado)
-                    literal_weights = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
-                    avg_weight = sum(literal_weights.get(lit, 0) for lit in all_literals) / len(all_literals)
-                    
-                    # Convertir peso promedio a literal
-                    if avg_weight >= 4.5:
-                        result['literal_average'] = 'A'
-                    elif avg_weight >= 3.5:
-                        result['literal_average'] = 'B'
-                    elif avg_weight >= 2.5:
-                        result['literal_average'] = 'C'
-                    elif avg_weight >= 1.5:
-                        result['literal_average'] = 'D'
-                    else:
-                        result['literal_average'] = 'E'
-                    
-                    # Estado general basado en literales
-                    result['general_state'] = 'approve' if result['literal_average'] in ['A', 'B', 'C'] else 'failed'
-            
-            else:
-                # Cálculo basado en puntuaciones numéricas
-                total_average = 0.0
-                subject_count = 0
-                
-                for subject_data in subjects_data.values():
-                    if evaluation_type == '20' and subject_data['scores_20']:
-                        subject_avg = sum(subject_data['scores_20']) / len(subject_data['scores_20'])
-                        min_score = 10
-                    elif evaluation_type == '100' and subject_data['scores_100']:
-                        subject_avg = sum(subject_data['scores_100']) / len(subject_data['scores_100'])
-                        min_score = 50
-                    else:
-                        continue
-                    
-                    total_average += subject_avg
-                    subject_count += 1
-                    result['total_subjects'] += 1
-                    
-                    # Determinar si aprobó la materia
-                    if subject_avg >= min_score and 'failed' not in subject_data['states']:
-                        result['subjects_approved'] += 1
-                    else:
-                        result['subjects_failed'] += 1
+            if subject_count > 0:
+                result['general_average'] = round(total_average / subject_count, 2)
                 
-                # Calcular promedio general
-                if subject_count > 0:
-                    result['general_average'] = round(total_average / subject_count, 2)
-                    
-                    # Determinar estado general
-                    min_score = 10 if evaluation_type == '20' else 50
-                    if result['general_average'] >= min_score and result['subjects_failed'] == 0:
-                        result['general_state'] = 'approve'
-                    else:
-                        result['general_state'] = 'failed'
-            
-            # Calcular porcentaje de aprobación
-            if result['total_subjects'] > 0:
-                result['approval_percentage'] = round(
-                    (result['subjects_approved'] / result['total_subjects']) * 100, 2
-                )
-            else:
-                result['approval_percentage'] = 0.0
-            
-            record.general_performance_json = result
+                # Determinar estado general
+                min_score = 10 if evaluation_type == '20' else 50
+                if result['general_average'] >= min_score and result['subjects_failed'] == 0:
+                    result['general_state'] = 'approve'
+                else:
+                    result['general_state'] = 'failed'
+        
+        # Calcular porcentaje de aprobación
+        if result['total_subjects'] > 0:
+            result['approval_percentage'] = round(
+                (result['subjects_approved'] / result['total_subjects']) * 100, 2
+            )
+        else:
+            result['approval_percentage'] = 0.0
+        
+        return result
+
+    # Métricas de rendimiento como columnas indexadas (copia de
+    # general_performance_json y mention_scores_json, ver _compute_grades)
+    general_average = fields.Float(
+        string='Promedio general',
+        compute='_compute_grades',
+        store=True,
+        index=True,
+    )
+
+    general_state = fields.Selection(
+        string='Estado general',
+        selection=[('approve', 'Aprobado'), ('failed', 'Reprobado')],
+        compute='_compute_grades',
+        store=True,
+        index=True,
+    )
+
+    literal_average = fields.Selection(
+        string='Literal promedio',
+        selection=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D'), ('E', 'E')],
+        compute='_compute_grades',
+        store=True,
+        index=True,
+    )
 
+    use_literal = fields.Boolean(
+        string='Evaluado con literales',
+        compute='_compute_grades',
+        store=True,
+    )
+
+    total_subjects = fields.Integer(
+        string='Materias evaluadas',
+        compute='_compute_grades',
+        store=True,
+    )
+
+    subjects_failed = fields.Integer(
+        string='Materias reprobadas',
+        compute='_compute_grades',
+        store=True,
+        index=True,
+    )
+
+    mention_average = fields.Float(
+        string='Promedio de mención',
+        compute='_compute_grades',
+        store=True,
+        index=True,
+        help='Promedio de las materias de la mención técnica (0 si no tiene notas de mención)'
+    )
 
     @api.depends('student_id')
     def _compute_parent_ids(self):
@@ -605,7 +620,9 @@ class SchoolStudent(models.Model):
         res = super().create(vals_list)
         for student in res:
             student.student_id._update_sizes_json()
-            student.student_id._update_performance_json()
+        # El rendimiento se recalcula una sola vez al confirmar la transacción
+        self.env['school.student.grade.queue']._enqueue(res)
+        res.mapped('year_id')._on_dashboard_data_changed()
         return res
     
     def write(self, vals):
@@ -627,9 +644,18 @@ class SchoolStudent(models.Model):
         if size_fields & changed_fields:
             self.mapped('student_id')._update_sizes_json()
         
-        # Actualizar rendimiento si es necesario
+        # Actualizar rendimiento si es necesario (una sola vez al confirmar la transacción)
         if performance_fields & changed_fields:
-            self.mapped('student_id')._update_performance_json()
+            self.env['school.student.grade.queue']._enqueue(self)
+        
+        # Campos que afectan el dashboard del año escolar
+        dashboard_fields = {'state', 'year_id', 'section_id', 'student_id', 'mention_state', 'mention_section_id'}
+        if dashboard_fields & changed_fields:
+            self.mapped('year_id')._on_dashboard_data_changed()
+        
+        # Sus asistencias cambian de sección en el conteo diario
+        if 'section_id' in changed_fields:
+            self.env['school.attendance']._mark_rollup_dates([('student_id', 'in', self.ids)])
         
         return res
 
@@ -757,20 +783,6 @@ class SchoolStudent(models.Model):
         })
 
 
-    @api.constrains('student_id', 'year_id')
-    def _check_student_unique_enrollment_per_year(self):
-        for rec in self:
-            if not rec.student_id or not rec.year_id:
-                continue
-            existing = self.env['school.student'].search([
-                ('student_id', '=', rec.student_id.id),
-                ('year_id', '=', rec.year_id.id),
-                ('id', '!=', rec.id),
-                ('state', '!=', 'cancel'),
-            ], limit=1)
-            if existing:
-                raise exceptions.ValidationError("No se puede crear la inscripción: el estudiante ya está inscrito en el año escolar seleccionado.")
-    
     def unlink(self):
         """Prevent deletion of enrolled students with evaluation scores or in finished years"""
         for record in self:
@@ -781,12 +793,18 @@ class SchoolStudent(models.Model):
                     f"'{record.year_id.name}' está finalizado."
                 )
             
-            # Check for evaluation scores
-            if record.evaluation_score_ids:
+            # Check for evaluation scores (las líneas sin calificar no cuentan)
+            qualified_scores = record.evaluation_score_ids.filtered(lambda score: score.state != 'draft')
+            if qualified_scores:
                 raise exceptions.UserError(
                     f"No se puede eliminar al estudiante '{record.student_id.name}' de la sección '{record.section_id.name}' "
-                    f"porque tiene {len(record.evaluation_score_ids)} puntaje(s) de evaluación registrado(s). "
+                    f"porque tiene {len(qualified_scores)} puntaje(s) de evaluación registrado(s). "
                     f"Elimine primero todos los puntajes de evaluación."
                 )
         
-        return super().unlink()
+        # Las líneas en borrador que crean las evaluaciones se eliminan con el estudiante
+        self.mapped('evaluation_score_ids').with_context(school_bulk_scores=True).unlink()
+        years = self.mapped('year_id')
+        res = super().unlink()
+        years._on_dashboard_data_changed()
+        return res
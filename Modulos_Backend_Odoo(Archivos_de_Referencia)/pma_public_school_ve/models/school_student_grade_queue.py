@@ -0,0 +1,121 @@
+from odoo import api, fields, models
+
+
+# Modo de recálculo del rendimiento: 'commit' (al confirmar la transacción)
+# o 'cron' (cola persistida que procesa el cron en lotes)
+GRADE_RECOMPUTE_MODE_PARAM = 'pma_public_school_ve.grade_recompute_mode'
+
+
+class SchoolStudentGradeQueue(models.Model):
+    """Cola de estudiantes con el rendimiento pendiente de recalcular.
+
+    Los cambios de notas e inscripciones no recalculan el rendimiento del
+    estudiante en cada escritura: se acumulan los estudiantes afectados en
+    un conjunto por transacción y se recalculan una sola vez al confirmar.
+    Con el parámetro GRADE_RECOMPUTE_MODE_PARAM en 'cron' el conjunto se
+    guarda en esta tabla y el cron lo procesa en segundo plano.
+    """
+    _name = 'school.student.grade.queue'
+    _description = 'Student Grade Recompute Queue'
+    _order = 'queued_at, id'
+
+    student_id = fields.Many2one(
+        comodel_name='school.student',
+        string='Estudiante',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    queued_at = fields.Datetime(string='En cola desde', readonly=True)
+
+    # Restricción real de la base de datos: la usa el ON CONFLICT de _flush_pending
+    _student_unique = models.Constraint(
+        'unique(student_id)',
+        'El estudiante ya está en la cola de recálculo.',
+    )
+
+    @api.model
+    def _enqueue(self, students):
+        """Agrega estudiantes al conjunto pendiente de la transacción actual"""
+        students = students.filtered('id')
+        if not students:
+            return
+        precommit = self.env.cr.precommit
+        pending = precommit.data.get('school.student.grade.queue')
+        if pending is None:
+            pending = precommit.data['school.student.grade.queue'] = set()
+            precommit.add(self._flush_pending)
+        pending.update(students.ids)
+
+    @api.model
+    def _flush_pending(self):
+        """Procesa el conjunto pendiente (se ejecuta una vez, al confirmar)"""
+        student_ids = self.env.cr.precommit.data.pop('school.student.grade.queue', None)
+        if not student_ids:
+            return
+        mode = self.env['ir.config_parameter'].sudo().get_param(GRADE_RECOMPUTE_MODE_PARAM, 'commit')
+        if mode == 'cron':
+            self.env.cr.execute("""
+                INSERT INTO school_student_grade_queue (student_id, queued_at, create_uid, write_uid, create_date, write_date)
+                     SELECT id, now() at time zone 'UTC', %s, %s, now() at time zone 'UTC', now() at time zone 'UTC'
+                       FROM school_student
+                      WHERE id IN %s
+                ON CONFLICT (student_id) DO NOTHING
+            """, [self.env.uid, self.env.uid, tuple(student_ids)])
+            cron = self.env.ref('pma_public_school_ve.ir_cron_drain_grade_queue', raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+            return
+        self._recompute_students(self.env['school.student'].browse(student_ids))
+        # Los hooks de precommit corren después del último flush de la transacción
+        self.env.flush_all()
+
+    @api.model
+    def _recompute_students(self, students):
+        """Recalcula el rendimiento (y lo que depende de él) de los estudiantes"""
+        students = students.exists()
+        if not students:
+            return
+        students.invalidate_recordset(['aggregate_ids'])
+        students.modified(['aggregate_ids'])
+        # El dashboard persistido pudo calcularse con el rendimiento anterior
+        # (en modo cron la cola se procesa después de la escritura que la llenó)
+        students.mapped('year_id')._on_dashboard_data_changed()
+
+    @api.model
+    def _drain(self, limit=None):
+        """Procesa la cola persistida por lotes. Devuelve la cantidad procesada."""
+        queue = self.sudo().search([], limit=limit)
+        students = queue.student_id
+        self._recompute_students(students)
+        self.env.flush_all()
+        queue.unlink()
+        return len(students)
+
+    @api.model
+    def _cron_drain_grade_queue(self, batch_size=500):
+        """Procesa la cola en lotes; se vuelve a agendar si quedan pendientes"""
+        self._drain(limit=batch_size)
+        if self.sudo().search_count([], limit=1):
+            self.env.ref('pma_public_school_ve.ir_cron_drain_grade_queue')._trigger()
+
+    @api.model
+    def get_queue_status(self):
+        """Profundidad de la cola para administradores"""
+        oldest = self.sudo().search([], limit=1)
+        return {
+            'mode': self.env['ir.config_parameter'].sudo().get_param(GRADE_RECOMPUTE_MODE_PARAM, 'commit'),
+            'pending': self.sudo().search_count([]),
+            'oldest': oldest.queued_at,
+        }
+
+    def action_drain_queue(self):
+        """Botón de administradores: procesa los seleccionados o toda la cola"""
+        if self:
+            self._recompute_students(self.student_id)
+            self.env.flush_all()
+            self.unlink()
+        else:
+            self._drain()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
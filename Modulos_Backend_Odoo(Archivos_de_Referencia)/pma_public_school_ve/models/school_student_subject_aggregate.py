@@ -0,0 +1,239 @@
+from odoo import api, fields, models
+
+
+class SchoolStudentSubjectAggregate(models.Model):
+    """Acumulado de notas por estudiante, materia y lapso.
+
+    Se mantiene por deltas desde school.evaluation.score (create, write y
+    unlink) para que los JSON de rendimiento del estudiante se armen con unas
+    pocas filas en lugar de recorrer todo el historial de notas.
+    """
+    _name = 'school.student.subject.aggregate'
+    _description = 'Student Subject Score Aggregate'
+    _order = 'id'
+
+    student_id = fields.Many2one(
+        comodel_name='school.student',
+        string='Estudiante',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+
+    subject_id = fields.Many2one(
+        comodel_name='school.subject',
+        string='Materia',
+        required=True,
+        ondelete='cascade'
+    )
+
+    lapso = fields.Selection(
+        selection=[
+            ('1', 'Primer Lapso'),
+            ('2', 'Segundo Lapso'),
+            ('3', 'Tercer Lapso')
+        ],
+        string='Lapso',
+        required=True
+    )
+
+    year_id = fields.Many2one(comodel_name='school.year', string='Año escolar')
+
+    type = fields.Selection(string='Tipo', selection=[
+                                    ('secundary', 'Media general'),
+                                    ('primary', 'Primaria'),
+                                    ('pre', 'Preescolar')])
+
+    is_mention = fields.Boolean(string='Es de Mención')
+
+    mention_section_id = fields.Many2one(comodel_name='school.mention.section', string='Mención')
+
+    points_sum = fields.Float(string='Suma de puntajes (Base 20)', readonly=True)
+
+    score_count = fields.Integer(string='Cantidad de notas', readonly=True)
+
+    failed_count = fields.Integer(string='Notas reprobadas', readonly=True)
+
+    last_literal = fields.Selection(
+        selection=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D'), ('E', 'E')],
+        string='Último literal',
+        readonly=True
+    )
+
+    last_literal_score_id = fields.Integer(string='Nota del último literal', readonly=True)
+
+    # Restricción real de la base de datos: la usa el ON CONFLICT de _apply_deltas
+    _student_subject_lapso_unique = models.Constraint(
+        'unique(student_id, subject_id, lapso)',
+        'Ya existe un acumulado para este estudiante, materia y lapso.',
+    )
+
+    def _visibility(self, primary_evaluation_type):
+        """(puntaje visible, literal visible) con el mismo criterio que
+        school.evaluation._compute_invisible_calification
+        """
+        self.ensure_one()
+        if self.is_mention or self.type == 'secundary':
+            return True, False
+        if self.type == 'primary':
+            if primary_evaluation_type == 'literal':
+                return False, True
+            return True, False
+        return False, False
+
+    @api.model
+    def _score_contributions(self, scores):
+        """Aporte de cada nota a su acumulado: [(clave, valores)]"""
+        contributions = []
+        for score in scores:
+            # Las líneas sin calificar (borrador) no cuentan en el rendimiento
+            if not score.student_id or not score.subject_id or not score.lapso or score.state != 'qualified':
+                continue
+            key = (score.student_id.id, score.subject_id.id, score.lapso)
+            contributions.append((key, {
+                'year_id': score.year_id.id or None,
+                'type': score.type or None,
+                'is_mention': bool(score.is_mention_score),
+                'mention_section_id': score.mention_section_id.id or None,
+                'points': score.points_20 or 0.0,
+                'failed': 1 if score.state_score == 'failed' else 0,
+                'literal': bool(score.literal_type),
+            }))
+        return contributions
+
+    @api.model
+    def _apply_deltas(self, removed, added):
+        """Resta los aportes viejos y suma los nuevos con un solo upsert"""
+        deltas = {}
+        literal_keys = set()
+        for sign, contributions in ((-1, removed), (1, added)):
+            for key, values in contributions:
+                delta = deltas.setdefault(key, dict(values, points=0.0, count=0, failed=0))
+                if sign > 0:
+                    delta.update({name: values[name] for name in ('year_id', 'type', 'is_mention', 'mention_section_id')})
+                delta['points'] += sign * values['points']
+                delta['count'] += sign
+                delta['failed'] += sign * values['failed']
+                if values['literal']:
+                    literal_keys.add(key)
+        if not deltas:
+            return
+
+        self.env['school.evaluation.score'].flush_model(['student_id', 'subject_id', 'lapso', 'literal_type'])
+        rows = []
+        params = []
+        for (student_id, subject_id, lapso), delta in deltas.items():
+            rows.append("(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')")
+            params.extend([
+                student_id, subject_id, lapso, delta['year_id'], delta['type'], delta['is_mention'],
+                delta['mention_section_id'], delta['points'], delta['count'], delta['failed'],
+                self.env.uid, self.env.uid,
+            ])
+        self.env.cr.execute(f"""
+            INSERT INTO school_student_subject_aggregate AS agg
+                   (student_id, subject_id, lapso, year_id, type, is_mention, mention_section_id,
+                    points_sum, score_count, failed_count, create_uid, write_uid, create_date, write_date)
+            VALUES {', '.join(rows)}
+            ON CONFLICT (student_id, subject_id, lapso) DO UPDATE
+               SET points_sum = agg.points_sum + EXCLUDED.points_sum,
+                   score_count = agg.score_count + EXCLUDED.score_count,
+                   failed_count = agg.failed_count + EXCLUDED.failed_count,
+                   year_id = EXCLUDED.year_id,
+                   type = EXCLUDED.type,
+                   is_mention = EXCLUDED.is_mention,
+                   mention_section_id = EXCLUDED.mention_section_id,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+         RETURNING id, student_id, subject_id, lapso
+        """, params)
+        touched = self.env.cr.fetchall()
+        literal_ids = tuple(row[0] for row in touched if row[1:] in literal_keys)
+
+        if literal_ids:
+            # El último literal no se puede restar: se busca solo en las filas afectadas
+            self.env.cr.execute("""
+                UPDATE school_student_subject_aggregate agg
+                   SET last_literal = lit.literal_type,
+                       last_literal_score_id = lit.id
+                  FROM school_student_subject_aggregate a
+             LEFT JOIN LATERAL (
+                        SELECT sc.id, sc.literal_type
+                          FROM school_evaluation_score sc
+                         WHERE sc.student_id = a.student_id
+                           AND sc.subject_id = a.subject_id
+                           AND sc.lapso = a.lapso
+                           AND sc.literal_type IS NOT NULL
+                           AND sc.state = 'qualified'
+                      ORDER BY sc.id DESC
+                         LIMIT 1
+                   ) lit ON TRUE
+                 WHERE agg.id = a.id
+                   AND a.id IN %s
+            """, [literal_ids])
+
+        self.env.cr.execute("""
+            DELETE FROM school_student_subject_aggregate
+             WHERE id IN %s AND score_count <= 0
+        """, [tuple(row[0] for row in touched)])
+
+        self._notify_students(self.env['school.student'].browse({row[1] for row in touched}))
+
+    @api.model
+    def _rebuild_rows(self, student_ids=None):
+        """Recalcula por SQL los acumulados de los estudiantes dados (None = todos)"""
+        self.env['school.evaluation.score'].flush_model()
+        where = ''
+        params = [self.env.uid, self.env.uid]
+        if student_ids is not None:
+            if not student_ids:
+                return
+            self.env.cr.execute(
+                "DELETE FROM school_student_subject_aggregate WHERE student_id IN %s", [tuple(student_ids)])
+            where = 'AND sc.student_id IN %s'
+            params.append(tuple(student_ids))
+        else:
+            self.env.cr.execute("DELETE FROM school_student_subject_aggregate")
+
+        self.env.cr.execute(f"""
+            INSERT INTO school_student_subject_aggregate
+                   (student_id, subject_id, lapso, year_id, type, is_mention, mention_section_id,
+                    points_sum, score_count, failed_count, last_literal, last_literal_score_id,
+                    create_uid, write_uid, create_date, write_date)
+            SELECT sc.student_id, sc.subject_id, sc.lapso,
+                   MAX(sc.year_id), MAX(sc.type), BOOL_OR(COALESCE(sc.is_mention_score, FALSE)),
+                   MAX(sc.mention_section_id),
+                   COALESCE(SUM(sc.points_20), 0),
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE sc.state_score = 'failed'),
+                   (ARRAY_AGG(sc.literal_type ORDER BY sc.id DESC) FILTER (WHERE sc.literal_type IS NOT NULL))[1],
+                   MAX(sc.id) FILTER (WHERE sc.literal_type IS NOT NULL),
+                   %s, %s, now() at time zone 'UTC', now() at time zone 'UTC'
+              FROM school_evaluation_score sc
+             WHERE sc.student_id IS NOT NULL
+               AND sc.subject_id IS NOT NULL
+               AND sc.lapso IS NOT NULL
+               AND sc.state = 'qualified'
+               {where}
+          GROUP BY sc.student_id, sc.subject_id, sc.lapso
+          ORDER BY MIN(sc.id)
+        """, params)
+
+    @api.model
+    def _rebuild(self, students):
+        """Recalcula los acumulados de los estudiantes y sus JSON de rendimiento.
+        Se usa cuando cambia algo que mueve o reevalúa notas sin pasar por
+        school.evaluation.score.write (materia/lapso de la evaluación,
+        mecanismo de evaluación del año).
+        """
+        students = students.exists()
+        if not students:
+            return
+        self._rebuild_rows(students.ids)
+        self._notify_students(students)
+
+    @api.model
+    def _notify_students(self, students):
+        """Invalida la caché y encola el recálculo del rendimiento de los estudiantes"""
+        self.invalidate_model()
+        students.invalidate_recordset(['aggregate_ids'])
+        self.env['school.student.grade.queue']._enqueue(students)
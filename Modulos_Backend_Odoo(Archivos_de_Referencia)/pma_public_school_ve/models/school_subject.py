@@ -95,6 +95,12 @@ class SchoolSubject(models.Model):
         required=True
     )
 
+    weekly_hours = fields.Integer(
+        string='Bloques semanales',
+        default=0,
+        help='Cantidad de bloques por semana que el generador de horarios debe asignar a la materia'
+    )
+
     available_professor_ids = fields.Many2many(
         comodel_name='school.professor', 
         string='Profesores disponibles', 
@@ -122,6 +128,18 @@ class SchoolSubject(models.Model):
                     "La materia solo puede pertenecer a una Sección o a una Mención, no a ambas."
                 )
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        res.mapped('year_id')._on_dashboard_data_changed()
+        return res
+    
+    def write(self, vals):
+        years = self.mapped('year_id')
+        res = super().write(vals)
+        (years | self.mapped('year_id'))._on_dashboard_data_changed()
+        return res
+    
     def unlink(self):
         """Prevent deletion of assigned subjects with evaluations or scores"""
         for record in self:
@@ -141,4 +159,7 @@ class SchoolSubject(models.Model):
                     f"porque tiene {len(scores)} puntaje(s) de evaluación registrado(s). Elimine primero los puntajes."
                 )
         
-        return super().unlink()
+        years = self.mapped('year_id')
+        res = super().unlink()
+        years._on_dashboard_data_changed()
+        return res
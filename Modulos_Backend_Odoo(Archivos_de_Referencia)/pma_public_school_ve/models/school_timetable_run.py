@@ -0,0 +1,298 @@
+import logging
+import random
+import time
+from collections import defaultdict
+
+from odoo import api, fields, models, exceptions
+
+from .school_schedule import ScheduleConflictIndex
+
+_logger = logging.getLogger(__name__)
+
+# Días hábiles en los que el generador reparte los bloques (lunes a viernes)
+WEEKDAYS = ['0', '1', '2', '3', '4']
+
+
+class SchoolTimetableRun(models.Model):
+    """Generación automática de horarios de un año escolar.
+
+    Reparte los bloques semanales de cada materia (school.subject.weekly_hours)
+    de las secciones de Media General y de las menciones en los bloques de
+    tiempo del nivel, sin chocar con la sección, el profesor, los estudiantes
+    que cursan sección y mención a la vez ni la cantidad de aulas disponibles.
+    Corre en segundo plano (cron) con un tiempo límite y solo completa los
+    bloques que faltan: los horarios ya cargados se respetan.
+    """
+    _name = 'school.timetable.run'
+    _description = 'School Timetable Generation Run'
+    _order = 'id desc'
+
+    name = fields.Char(string='Nombre', compute='_compute_name', store=True)
+
+    @api.depends('year_id')
+    def _compute_name(self):
+        for record in self:
+            record.name = f"Generación de horarios - {record.year_id.name or ''}"
+
+    year_id = fields.Many2one(
+        comodel_name='school.year',
+        string='Año Escolar',
+        required=True,
+        ondelete='cascade',
+        default=lambda self: self.env['school.year'].search([('current', '=', True)], limit=1)
+    )
+
+    state = fields.Selection(
+        selection=[
+            ('draft', 'Borrador'),
+            ('queued', 'En cola'),
+            ('running', 'Generando'),
+            ('done', 'Generado'),
+            ('applied', 'Aplicado'),
+            ('failed', 'Fallido'),
+        ],
+        string='Estado',
+        default='draft',
+        required=True,
+        readonly=True
+    )
+
+    time_budget = fields.Integer(
+        string='Tiempo límite (segundos)',
+        default=30,
+        help='Tiempo máximo de búsqueda; se devuelve la mejor solución encontrada'
+    )
+
+    classroom_count = fields.Integer(
+        string='Aulas disponibles',
+        default=0,
+        help='Cantidad máxima de clases simultáneas en un mismo bloque (0 = sin límite)'
+    )
+
+    # Métricas de calidad
+    total_blocks = fields.Integer(string='Bloques pedidos', readonly=True)
+    placed_blocks = fields.Integer(string='Bloques asignados', readonly=True)
+    unplaced_blocks = fields.Integer(string='Bloques sin asignar', readonly=True)
+    coverage = fields.Float(string='Cobertura (%)', readonly=True)
+    same_day_repeats = fields.Integer(
+        string='Repeticiones en el mismo día',
+        readonly=True,
+        help='Bloques de una materia asignados en un día en el que la materia ya tenía clase'
+    )
+    attempts = fields.Integer(string='Intentos', readonly=True)
+    elapsed = fields.Float(string='Duración (segundos)', readonly=True)
+
+    result_json = fields.Json(string='Horarios propuestos', readonly=True)
+
+    log = fields.Text(string='Detalle', readonly=True)
+
+    def action_generate(self):
+        """Encola la generación y dispara el cron"""
+        self.write({'state': 'queued', 'log': False})
+        cron = self.env.ref('pma_public_school_ve.ir_cron_timetable_generator', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def action_apply(self):
+        """Crea los horarios propuestos en un solo lote (se validan de nuevo al crear)"""
+        for run in self:
+            if run.state != 'done':
+                raise exceptions.UserError("Solo se pueden aplicar generaciones terminadas.")
+            self.env['school.schedule'].create(run.result_json or [])
+            run.state = 'applied'
+
+    def action_reset(self):
+        self.write({'state': 'draft'})
+
+    @api.model
+    def _cron_process_runs(self):
+        """Procesa una generación en cola; se vuelve a agendar si quedan más"""
+        run = self.search([('state', '=', 'queued')], order='id', limit=1)
+        if not run:
+            return
+        run.state = 'running'
+        try:
+            with self.env.cr.savepoint():
+                run._solve()
+        except Exception as error:
+            _logger.exception("Falló la generación de horarios %s", run.id)
+            run.write({'state': 'failed', 'log': str(error)})
+        if self.search_count([('state', '=', 'queued')], limit=1):
+            self.env.ref('pma_public_school_ve.ir_cron_timetable_generator')._trigger()
+
+    def _prepare_problem(self):
+        """Datos del año: bloques de tiempo, bloques por asignar, ocupación existente"""
+        self.ensure_one()
+        year = self.year_id
+        Schedule = self.env['school.schedule']
+
+        slots = self.env['school.time.slot'].search_fetch([
+            ('education_level', '=', 'secundary'),
+            ('is_break', '=', False),
+            ('active', '=', True),
+        ], ['start_time', 'end_time'], order='start_time')
+        if not slots:
+            raise exceptions.UserError("No hay bloques de tiempo de Media General para generar horarios.")
+
+        subjects = self.env['school.subject'].search([
+            ('year_id', '=', year.id),
+            ('weekly_hours', '>', 0),
+            '|', ('section_id.type', '=', 'secundary'), ('mention_section_id', '!=', False),
+        ])
+        existing_counts = dict(Schedule._read_group(
+            [('subject_id', 'in', subjects.ids), ('active', '=', True)], ['subject_id'], ['__count']))
+
+        # Estudiantes que cursan sección y mención: una clase de la sección
+        # no puede coincidir con una de la mención y viceversa
+        crossings = defaultdict(set)
+        students = self.env['school.student'].search_fetch([
+            ('year_id', '=', year.id),
+            ('state', '=', 'done'),
+            ('section_id', '!=', False),
+            ('mention_section_id', '!=', False),
+        ], ['section_id', 'mention_section_id'])
+        for student in students:
+            crossings[('section', student.section_id.id)].add(('mention', student.mention_section_id.id))
+            crossings[('mention', student.mention_section_id.id)].add(('section', student.section_id.id))
+
+        # Bloques libres de cada profesor: los más ocupados se asignan primero
+        availability = Schedule._professor_availability(year, subjects.professor_id, slots, WEEKDAYS)
+        free_cells = {
+            professor_id: sum(1 for schedule_id in cells.values() if not schedule_id)
+            for professor_id, cells in availability.items()
+        }
+
+        blocks = []
+        for subject in subjects:
+            owner = ('mention', subject.mention_section_id.id) if subject.mention_section_id \
+                else ('section', subject.section_id.id)
+            for _i in range(subject.weekly_hours - existing_counts.get(subject, 0)):
+                blocks.append({
+                    'subject': subject,
+                    'owner': owner,
+                    'professor': ('professor', subject.professor_id.id) if subject.professor_id else None,
+                    'crossings': crossings.get(owner, set()),
+                    'free_cells': free_cells.get(subject.professor_id.id, len(slots) * len(WEEKDAYS)),
+                })
+
+        # Horarios ya cargados del año: ocupan recursos y aulas
+        existing = Schedule.search_fetch(
+            [('year_id', '=', year.id), ('active', '=', True), ('day_of_week', 'in', WEEKDAYS)],
+            ['section_id', 'mention_section_id', 'professor_id', 'professor_ids',
+             'day_of_week', 'start_time', 'end_time', 'classroom'],
+        )
+        base_entries = []
+        occupancy = defaultdict(int)
+        for schedule in existing:
+            for key in schedule._conflict_keys():
+                base_entries.append((key, schedule.day_of_week, schedule.start_time, schedule.end_time, schedule.id))
+            for position, slot in enumerate(slots):
+                if schedule.start_time < slot.end_time and schedule.end_time > slot.start_time:
+                    occupancy[(schedule.day_of_week, position)] += 1
+        return slots, blocks, base_entries, occupancy
+
+    def _solve_attempt(self, slots, blocks, base_entries, occupancy, rng):
+        """Asignación voraz: primero los bloques más restringidos, repartiendo
+        cada materia en días distintos. Devuelve (asignados, sin asignar).
+        """
+        index = ScheduleConflictIndex()
+        for entry in base_entries:
+            index.add(*entry)
+        occupancy = defaultdict(int, occupancy)
+        professor_load = defaultdict(int)
+        for block in blocks:
+            professor_load[block['professor']] += 1
+
+        # Primero los profesores con menos holgura (bloques libres menos bloques por dar)
+        ordered = sorted(blocks, key=lambda block: (
+            block['free_cells'] - professor_load[block['professor']],
+            -len(block['crossings']), rng.random()))
+        subject_days = defaultdict(set)
+        owner_day_load = defaultdict(int)
+        placed, unplaced = [], []
+        candidates = [(day, position) for day in WEEKDAYS for position in range(len(slots))]
+
+        for block in ordered:
+            subject = block['subject']
+            options = sorted(candidates, key=lambda option: (
+                option[0] in subject_days[subject.id],
+                owner_day_load[(block['owner'], option[0])],
+                rng.random(),
+            ))
+            for day, position in options:
+                slot = slots[position]
+                if self.classroom_count and occupancy[(day, position)] >= self.classroom_count:
+                    continue
+                keys = [block['owner']] + ([block['professor']] if block['professor'] else [])
+                if any(index.find(key, day, slot.start_time, slot.end_time) for key in keys):
+                    continue
+                if any(index.find(key, day, slot.start_time, slot.end_time) for key in block['crossings']):
+                    continue
+                ref = len(placed) + 1
+                for key in keys:
+                    index.add(key, day, slot.start_time, slot.end_time, ('new', ref))
+                occupancy[(day, position)] += 1
+                owner_day_load[(block['owner'], day)] += 1
+                placed.append((block, day, slot, day in subject_days[subject.id]))
+                subject_days[subject.id].add(day)
+                break
+            else:
+                unplaced.append(block)
+        return placed, unplaced
+
+    def _solve(self):
+        """Busca la mejor asignación dentro del tiempo límite y guarda las métricas"""
+        self.ensure_one()
+        started = time.monotonic()
+        deadline = started + max(self.time_budget, 1)
+        slots, blocks, base_entries, occupancy = self._prepare_problem()
+
+        # Una materia con más bloques que días hábiles repite día sí o sí
+        blocks_per_subject = defaultdict(int)
+        for block in blocks:
+            blocks_per_subject[block['subject'].id] += 1
+        min_repeats = sum(max(0, count - len(WEEKDAYS)) for count in blocks_per_subject.values())
+
+        best = None
+        attempts = 0
+        while True:
+            rng = random.Random(self.id * 1000 + attempts)
+            placed, unplaced = self._solve_attempt(slots, blocks, base_entries, occupancy, rng)
+            attempts += 1
+            repeats = sum(1 for *_block, repeated in placed if repeated)
+            score = (len(placed), -repeats)
+            if best is None or score > best[0]:
+                best = (score, placed, unplaced)
+            if (not unplaced and repeats <= min_repeats) or time.monotonic() >= deadline:
+                break
+
+        score, placed, unplaced = best
+        result = []
+        for block, day, slot, _repeated in placed:
+            owner_type, owner_id = block['owner']
+            result.append({
+                'section_id': owner_id if owner_type == 'section' else False,
+                'mention_section_id': owner_id if owner_type == 'mention' else False,
+                'subject_id': block['subject'].id,
+                'day_of_week': day,
+                'start_time': slot.start_time,
+                'end_time': slot.end_time,
+                'time_slot_id': slot.id,
+            })
+        lines = [
+            f"Sin asignar: {block['subject'].subject_id.name} "
+            f"({block['subject'].section_id.name or block['subject'].mention_section_id.display_name})"
+            for block in unplaced
+        ]
+        self.write({
+            'state': 'done',
+            'total_blocks': len(blocks),
+            'placed_blocks': len(placed),
+            'unplaced_blocks': len(unplaced),
+            'coverage': round(len(placed) * 100.0 / len(blocks), 2) if blocks else 100.0,
+            'same_day_repeats': -score[1],
+            'attempts': attempts,
+            'elapsed': round(time.monotonic() - started, 2),
+            'result_json': result,
+            'log': '\n'.join(lines) or False,
+        })
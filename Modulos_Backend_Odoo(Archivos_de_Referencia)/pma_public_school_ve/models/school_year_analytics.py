@@ -0,0 +1,1551 @@
+from collections import Counter, defaultdict
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+
+
+# Pesos de literales usados para promediar Primaria (C o mejor = aprobado)
+LITERAL_WEIGHTS = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
+# Equivalencia aproximada de literales en escala /20 (rankings y promedios de docentes)
+LITERAL_WEIGHTS_20 = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
+# Mínimo para aprobar en escala /20
+MIN_SCORE = 10
+
+LEVEL_KEYS = ('pre', 'primary', 'secundary_general', 'secundary_tecnico')
+
+# Partes de datos que se pueden cargar, en orden de dependencias
+DATA_PARTS = ('sections', 'evaluations', 'scores', 'students', 'professors')
+PART_DEPENDS = {
+    'scores': {'evaluations'},
+    'students': {'sections', 'scores'},
+}
+
+COUNT_FIELDS = (
+    'total_students_count', 'approved_students_count', 'total_sections_count', 'total_professors_count',
+    'students_pre_count', 'students_primary_count', 'students_secundary_count', 'students_tecnico_count',
+    'approved_pre_count', 'approved_primary_count', 'approved_secundary_count', 'approved_tecnico_count',
+    'sections_pre_count', 'sections_primary_count', 'sections_secundary_count',
+    'subjects_secundary_count', 'professors_primary_count', 'professors_pre_count', 'mentions_count',
+)
+
+
+def weight_to_literal(avg_weight):
+    """Convierte un peso promedio (1-5) a su literal equivalente"""
+    if avg_weight >= 4.5:
+        return 'A'
+    elif avg_weight >= 3.5:
+        return 'B'
+    elif avg_weight >= 2.5:
+        return 'C'
+    elif avg_weight >= 1.5:
+        return 'D'
+    return 'E'
+
+
+class SchoolYearAnalytics(models.AbstractModel):
+    """Motor de analíticas del dashboard del año escolar.
+
+    Carga estudiantes, notas, evaluaciones, materias, secciones y profesores
+    del año UNA sola vez en estructuras compactas (dicts) y construye todos
+    los bloques del dashboard a partir de esa única pasada. Cuando se pide
+    un solo bloque, solo se cargan las partes de datos que ese bloque usa.
+    """
+    _name = 'school.year.analytics'
+    _description = 'School Year Dashboard Analytics'
+
+    # ------------------------------------------------------------------
+    # Carga de datos
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _load_year_data(self, year, parts=None):
+        """Carga en memoria lo que necesita el dashboard de un año escolar.
+
+        :param parts: subconjunto de DATA_PARTS a cargar (None = todo). Las
+            dependencias entre partes se resuelven automáticamente.
+        """
+        year.ensure_one()
+        data = self._empty_year_data(year)
+        if not year.id:
+            # Registro nuevo (onchange): no hay nada que analizar todavía
+            return data
+
+        parts = set(DATA_PARTS if parts is None else parts)
+        # Recorrido inverso: cada parte agrega sus dependencias antes de revisarlas
+        for part in reversed(DATA_PARTS):
+            if part in parts:
+                parts |= PART_DEPENDS.get(part, set())
+        for part in DATA_PARTS:
+            if part in parts:
+                getattr(self, '_load_%s' % part)(data)
+        return data
+
+    @api.model
+    def _empty_year_data(self, year):
+        return {
+            'year': year,
+            'eval_types': {
+                'secundary': year.evalution_type_secundary.type_evaluation if year.evalution_type_secundary else False,
+                'primary': year.evalution_type_primary.type_evaluation if year.evalution_type_primary else False,
+                'pre': year.evalution_type_pree.type_evaluation if year.evalution_type_pree else False,
+            },
+            'sections': [],
+            'section_names': {},
+            'mention_sections': self.env['school.mention.section'],
+            'evaluations': {},
+            'scores': [],
+            'scores_by_evaluation': defaultdict(list),
+            'scores_by_student': defaultdict(list),
+            'students': [],
+            'students_by_id': {},
+            'active': [],
+            'groups': {key: [] for key in LEVEL_KEYS},
+            'professors': [],
+        }
+
+    @api.model
+    def _load_sections(self, data):
+        year = data['year']
+        for section in year.section_ids:
+            register = section.section_id
+            data['section_names'][section.id] = {
+                'display': register.display_name if register else '',
+                'name': register.display_name if register else section.name,
+            }
+            data['sections'].append({
+                'id': section.id,
+                'type': section.type,
+                'record': section,
+                'subject_ids': set(section.subject_ids.ids),
+                'professor_ids': set(section.professor_ids.ids),
+            })
+
+        data['mention_sections'] = self.env['school.mention.section'].search([
+            ('year_id', '=', year.id),
+            ('active', '=', True)
+        ])
+
+    @api.model
+    def _load_evaluations(self, data):
+        for ev in self.env['school.evaluation'].search([('year_id', '=', data['year'].id)]):
+            professor = ev.professor_id
+            data['evaluations'][ev.id] = {
+                'id': ev.id,
+                'name': ev.name,
+                'date': ev.evaluation_date,
+                'type': ev.type,
+                'mention_section_id': ev.mention_section_id.id,
+                'professor_id': professor.id,
+                'professor_name': professor.professor_id.name if professor else False,
+                'section_name': ev.section_id.section_id.name,
+                'subject_name': ev.subject_id.subject_id.name if ev.subject_id else False,
+                'score_average': ev.score_average,
+                'invisible_score': ev.invisible_score,
+                'invisible_literal': ev.invisible_literal,
+                'score_states': [],
+            }
+
+    @api.model
+    def _load_scores(self, data):
+        """Notas del año: una sola lectura para todo el dashboard"""
+        evaluations = data['evaluations']
+        Score = self.env['school.evaluation.score']
+        # Las líneas sin calificar (borrador) solo cuentan para el estado de
+        # su evaluación: no son notas reprobadas
+        for evaluation, count in Score._read_group(
+            [('year_id', '=', data['year'].id), ('state', '=', 'draft')], ['evaluation_id'], ['__count'],
+        ):
+            if evaluation.id in evaluations:
+                evaluations[evaluation.id]['score_states'].extend(['draft'] * count)
+        score_records = Score.search_fetch(
+            [('year_id', '=', data['year'].id), ('state', '!=', 'draft')],
+            ['evaluation_id', 'student_id', 'subject_id', 'literal_type', 'points_20', 'state'],
+        )
+        for score in score_records:
+            evaluation = evaluations.get(score.evaluation_id.id)
+            if not evaluation:
+                continue
+            register_subject = score.subject_id.subject_id
+            line = {
+                'id': score.id,
+                'evaluation': evaluation,
+                'student_id': score.student_id.id,
+                'subject_ref': score.subject_id.id,
+                'subject_id': register_subject.id,
+                'subject_name': register_subject.name if register_subject else False,
+                'literal_type': score.literal_type,
+                'points_20': score.points_20,
+            }
+            evaluation['score_states'].append(score.state)
+            data['scores'].append(line)
+            data['scores_by_student'][line['student_id']].append(line)
+            data['scores_by_evaluation'][evaluation['id']].append(line)
+
+    @api.model
+    def _load_students(self, data):
+        section_names = data['section_names']
+        for st in data['year'].student_ids:
+            perf = st.general_performance_json
+            mention_perf = st.mention_scores_json
+            section = section_names.get(st.section_id.id)
+            if section is None and st.section_id:
+                register = st.section_id.section_id
+                section = {
+                    'display': register.display_name if register else '',
+                    'name': register.display_name if register else st.section_id.name,
+                }
+            student_scores = data['scores_by_student'].get(st.id, [])
+            literals = [
+                s['literal_type'] for s in student_scores
+                if s['literal_type'] and not s['evaluation']['invisible_literal']
+            ]
+            data['students'].append({
+                'id': st.id,
+                'type': st.type,
+                'state': st.state,
+                'current': st.current,
+                'mention_state': st.mention_state,
+                'mention_id': st.mention_id.id,
+                'mention_name': st.mention_id.name,
+                'mention_section_name': st.mention_section_id.mention_id.name if st.mention_section_id else '',
+                'section_id': st.section_id.id,
+                'section_display': section['display'] if section else '',
+                'section_name': section['name'] if section else False,
+                'partner_id': st.student_id.id,
+                'name': st.student_id.name,
+                'sex': st.student_id.sex if st.student_id else False,
+                'perf': perf if isinstance(perf, dict) else {},
+                'mention_perf': mention_perf if isinstance(mention_perf, dict) else None,
+                'literal_weight': (
+                    sum(LITERAL_WEIGHTS.get(lit, 0) for lit in literals) / len(literals)
+                    if literals else None
+                ),
+                'scores': student_scores,
+            })
+
+        data['students_by_id'] = {s['id']: s for s in data['students']}
+        data['active'] = [s for s in data['students'] if s['current'] and s['state'] == 'done']
+        for student in data['active']:
+            level = self._student_level(student)
+            if level:
+                data['groups'][level].append(student)
+            student['approved'] = self._student_state(student) == 'approve'
+
+    @api.model
+    def _load_professors(self, data):
+        """Profesores del año con su carga y agregados de notas.
+
+        Servicio de analíticas de profesores: materias, evaluaciones y notas
+        se agregan por profesor en un número fijo de consultas agrupadas,
+        sin importar cuántos profesores tenga el año.
+        """
+        year = data['year']
+        professors = self.env['school.professor'].search_fetch(
+            [('year_id', '=', year.id)], ['professor_id', 'section_ids', 'subject_ids'])
+        if not professors:
+            return
+
+        subjects = self._query_professor_subjects(year)
+        evaluations = {
+            professor.id: count
+            for professor, count in self.env['school.evaluation']._read_group(
+                [('year_id', '=', year.id)], ['professor_id'], ['__count'])
+        }
+        scores = self._query_professor_scores(year)
+
+        for prof in professors:
+            prof_subjects = subjects.get(prof.id, {'count': 0, 'section_types': set(), 'has_mention': False})
+            data['professors'].append({
+                'id': prof.id,
+                'employee_id': prof.professor_id.id,
+                'name': prof.professor_id.name,
+                'section_types': prof.section_ids.mapped('type'),
+                'sections_count': len(prof.section_ids),
+                'has_register_subjects': bool(prof.subject_ids),
+                'subjects_count': prof_subjects['count'],
+                'subject_section_types': prof_subjects['section_types'],
+                'has_mention_subjects': prof_subjects['has_mention'],
+                'evaluations_count': evaluations.get(prof.id, 0),
+                'scores': scores.get(prof.id, {'points': 0.0, 'count': 0, 'by_level': {}}),
+            })
+
+    @api.model
+    def _query_professor_subjects(self, year):
+        """Materias del año por profesor: {professor_id: {count, section_types, has_mention}}"""
+        self.env['school.subject'].flush_model(['year_id', 'professor_id', 'section_id', 'mention_section_id'])
+        self.env['school.section'].flush_model(['type'])
+        self.env.cr.execute("""
+            SELECT sub.professor_id, sec.type, sub.mention_section_id IS NOT NULL, COUNT(*)
+              FROM school_subject sub
+              LEFT JOIN school_section sec ON sec.id = sub.section_id
+             WHERE sub.year_id = %s
+               AND sub.professor_id IS NOT NULL
+          GROUP BY sub.professor_id, sec.type, sub.mention_section_id IS NOT NULL
+        """, [year.id])
+
+        result = {}
+        for professor_id, section_type, is_mention, count in self.env.cr.fetchall():
+            prof = result.setdefault(professor_id, {'count': 0, 'section_types': set(), 'has_mention': False})
+            prof['count'] += count
+            if section_type:
+                prof['section_types'].add(section_type)
+            elif is_mention:
+                prof['has_mention'] = True
+        return result
+
+    @api.model
+    def _query_professor_scores(self, year):
+        """Agregados de notas por profesor y nivel del estudiante.
+
+        :return: {professor_id: {'points', 'count', 'by_level'}} donde points y
+            count cubren las notas distintas de cero (promedio del ranking) y
+            by_level[nivel] = {'count', 'points', 'literal_points'} cubre las
+            notas de estudiantes inscritos del año, con los literales
+            convertidos a escala /20 (LITERAL_WEIGHTS_20).
+        """
+        self.env['school.evaluation.score'].flush_model(
+            ['year_id', 'evaluation_id', 'student_id', 'points_20', 'literal_type', 'state'])
+        self.env['school.evaluation'].flush_model(['professor_id'])
+        self.env['school.student'].flush_model(['year_id', 'state', 'type', 'mention_state'])
+
+        literal_case = ' '.join(
+            "WHEN '%s' THEN %s" % (literal, weight) for literal, weight in LITERAL_WEIGHTS_20.items())
+        # Mismo criterio de nivel que _student_level
+        self.env.cr.execute(f"""
+            SELECT ev.professor_id,
+                   CASE WHEN st.state = 'done' AND st.year_id = %s THEN
+                        CASE st.type
+                            WHEN 'pre' THEN 'pre'
+                            WHEN 'primary' THEN 'primary'
+                            WHEN 'secundary' THEN
+                                CASE WHEN st.mention_state = 'enrolled'
+                                     THEN 'secundary_tecnico' ELSE 'secundary_general' END
+                        END
+                   END AS level,
+                   COALESCE(SUM(sc.points_20) FILTER (WHERE sc.points_20 <> 0), 0),
+                   COUNT(*) FILTER (WHERE sc.points_20 <> 0),
+                   COUNT(*),
+                   COALESCE(SUM(sc.points_20), 0),
+                   SUM(CASE sc.literal_type {literal_case} ELSE 0 END)
+              FROM school_evaluation_score sc
+              JOIN school_evaluation ev ON ev.id = sc.evaluation_id
+              LEFT JOIN school_student st ON st.id = sc.student_id
+             WHERE sc.year_id = %s
+               AND sc.state <> 'draft'
+          GROUP BY ev.professor_id, level
+        """, [year.id, year.id])
+
+        result = {}
+        for professor_id, level, points, count, lines, level_points, literal_points in self.env.cr.fetchall():
+            prof = result.setdefault(professor_id, {'points': 0.0, 'count': 0, 'by_level': {}})
+            prof['points'] += points
+            prof['count'] += count
+            if level:
+                prof['by_level'][level] = {
+                    'count': lines,
+                    'points': level_points,
+                    'literal_points': literal_points,
+                }
+        return result
+
+    @api.model
+    def _student_level(self, student):
+        """Nivel del dashboard: pre, primary, secundary_general o secundary_tecnico"""
+        if student['type'] == 'pre':
+            return 'pre'
+        if student['type'] == 'primary':
+            return 'primary'
+        if student['type'] == 'secundary':
+            if student['mention_state'] == 'enrolled':
+                return 'secundary_tecnico'
+            return 'secundary_general'
+        return False
+
+    @api.model
+    def _student_state(self, student):
+        """Estado de aprobación del estudiante según su nivel (promedio individual)"""
+        # Preescolar = todos aprobados por observación
+        if student['type'] == 'pre':
+            return 'approve'
+        # Primaria = promedio literal >= C (peso >= 2.5), sin notas = aprobado
+        if student['type'] == 'primary':
+            weight = student['literal_weight']
+            if weight is None:
+                return 'approve'
+            return 'approve' if weight >= 2.5 else 'failed'
+        # Media General y Técnico Medio = promedio >= 10
+        if student['type'] == 'secundary':
+            if student['mention_state'] == 'enrolled':
+                mention_perf = student['mention_perf']
+                if mention_perf and mention_perf.get('subjects'):
+                    avg = mention_perf.get('general_average', 0) or 0
+                    return 'approve' if avg >= MIN_SCORE else 'failed'
+            avg = student['perf'].get('general_average', 0) or 0
+            return 'approve' if avg >= MIN_SCORE else 'failed'
+        return 'failed'
+
+    @api.model
+    def _student_average(self, student):
+        return student['perf'].get('general_average', 0) or 0
+
+    @api.model
+    def _student_mention_average(self, student):
+        """Promedio de mención con fallback al promedio general"""
+        mention_perf = student['mention_perf']
+        if mention_perf and mention_perf.get('subjects'):
+            return mention_perf.get('general_average', 0) or 0
+        return self._student_average(student)
+
+    # ------------------------------------------------------------------
+    # Punto de entrada
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _dashboard_blocks(self):
+        """Bloques del dashboard: {clave: (campos, método, argumentos, partes requeridas)}.
+
+        Las claves de un solo campo coinciden con el nombre del campo en
+        school.year; los bloques que llenan varios campos usan un nombre propio.
+        """
+        return {
+            'counts': (COUNT_FIELDS, '_build_dashboard_counts', (), {'sections', 'professors'}),
+            'students_by_type': (
+                ('students_pre_ids', 'students_primary_ids',
+                 'students_secundary_general_ids', 'students_secundary_tecnico_ids'),
+                '_build_students_by_type', (), {'students'}),
+            'sections_by_type': (
+                ('sections_secundary_ids', 'sections_primary_ids_m2m', 'sections_pre_ids_m2m', 'mentions_ids'),
+                '_build_sections_by_type', (), {'sections'}),
+            'level_performance': (
+                ('secundary_performance_json', 'primary_performance_json',
+                 'pre_performance_json', 'tecnico_performance_json'),
+                '_build_level_performance', (), {'students'}),
+            'mentions_names_json': (('mentions_names_json',), '_build_mentions_names', (), {'sections'}),
+            'performance_by_level_json': (('performance_by_level_json',), '_build_performance_by_level', (), {'students'}),
+            'students_distribution_json': (('students_distribution_json',), '_build_students_distribution', (), {'students'}),
+            'sections_distribution_json': (('sections_distribution_json',), '_build_sections_distribution', (), {'sections'}),
+            'professors_distribution_json': (('professors_distribution_json',), '_build_professors_distribution', (), {'professors'}),
+            'approval_rate_json': (('approval_rate_json',), '_build_approval_rate', (), {'students'}),
+            'students_tab_json': (('students_tab_json',), '_build_students_tab', (), {'students'}),
+            'pre_observations_timeline_json': (
+                ('pre_observations_timeline_json',), '_build_pre_observations_timeline', (), {'students'}),
+            'sections_comparison_json': (('sections_comparison_json',), '_build_sections_comparison', (), {'sections'}),
+            'top_students_year_json': (('top_students_year_json',), '_build_top_students_year', (), {'students'}),
+            'professor_summary_json': (('professor_summary_json',), '_build_professor_summary', (), {'professors'}),
+            'professor_dashboard_json': (
+                ('professor_dashboard_json',), '_build_professor_dashboard', (), {'professors'}),
+            'professor_detailed_stats_json': (
+                ('professor_detailed_stats_json',), '_build_professor_detailed_stats', (), {'professors'}),
+            'difficult_subjects_json': (('difficult_subjects_json',), '_build_difficult_subjects', (), set()),
+            'evaluations_stats_json': (('evaluations_stats_json',), '_build_evaluations_stats', (), {'scores'}),
+            'recent_evaluations_json': (('recent_evaluations_json',), '_build_recent_evaluations', (), {'scores'}),
+            'pre_dashboard_json': (
+                ('pre_dashboard_json',), '_build_level_dashboard', ('pre',), {'students'}),
+            'primary_dashboard_json': (
+                ('primary_dashboard_json',), '_build_level_dashboard', ('primary',), {'students'}),
+            'secundary_general_dashboard_json': (
+                ('secundary_general_dashboard_json',), '_build_level_dashboard', ('secundary_general',), {'students'}),
+            'secundary_tecnico_dashboard_json': (
+                ('secundary_tecnico_dashboard_json',), '_build_level_dashboard', ('secundary_tecnico',), {'students'}),
+        }
+
+    @api.model
+    def _compute_dashboard_values(self, year, block_keys=None, block_filters=None):
+        """Devuelve {campo: valor} de los bloques pedidos (None = todo el dashboard).
+        Solo se cargan las partes de datos que esos bloques necesitan.
+        block_filters: {bloque: {filtro: valor}} para los bloques que aceptan
+        filtros (ej. lapso y nivel en difficult_subjects_json).
+        """
+        block_filters = block_filters or {}
+        blocks = self._dashboard_blocks()
+        if block_keys is None:
+            block_keys = list(blocks)
+
+        parts = set()
+        for key in block_keys:
+            parts |= blocks[key][3]
+        data = self._load_year_data(year, parts)
+
+        values = {}
+        for key in block_keys:
+            field_names, method, args, _parts = blocks[key]
+            result = getattr(self, method)(data, *args, **block_filters.get(key, {}))
+            if len(field_names) == 1:
+                values[field_names[0]] = result
+            else:
+                values.update(result)
+        return values
+
+    # ------------------------------------------------------------------
+    # Contadores y campos relacionales
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _build_dashboard_counts(self, data):
+        sections = data['sections']
+        students = self._count_active_students(data['year'])
+
+        def sections_of(level):
+            return [s for s in sections if s['type'] == level]
+
+        subjects_secundary = set()
+        for section in sections_of('secundary'):
+            subjects_secundary |= section['subject_ids']
+        professors_primary = set()
+        for section in sections_of('primary'):
+            professors_primary |= section['professor_ids']
+        professors_pre = set()
+        for section in sections_of('pre'):
+            professors_pre |= section['professor_ids']
+
+        return {
+            'total_students_count': students['all']['total'],
+            'total_sections_count': len(sections),
+            'total_professors_count': len(data['professors']),
+            'approved_students_count': students['all']['approved'],
+            'students_pre_count': students['pre']['total'],
+            'students_primary_count': students['primary']['total'],
+            'students_secundary_count': students['secundary_general']['total'],
+            'students_tecnico_count': students['secundary_tecnico']['total'],
+            'approved_pre_count': students['pre']['approved'],
+            'approved_primary_count': students['primary']['approved'],
+            'approved_secundary_count': students['secundary_general']['approved'],
+            'approved_tecnico_count': students['secundary_tecnico']['approved'],
+            'sections_pre_count': len(sections_of('pre')),
+            'sections_primary_count': len(sections_of('primary')),
+            'sections_secundary_count': len(sections_of('secundary')),
+            'subjects_secundary_count': len(subjects_secundary),
+            'professors_primary_count': len(professors_primary),
+            'professors_pre_count': len(professors_pre),
+            'mentions_count': len(data['mention_sections']),
+        }
+
+    @api.model
+    def _active_students_domain(self, year):
+        """Estudiantes inscritos del año en curso (mismo criterio que data['active'])"""
+        return [('year_id', '=', year.id), ('current', '=', True), ('state', '=', 'done')]
+
+    @api.model
+    def _count_active_students(self, year):
+        """Inscritos y aprobados (general_state) por nivel, en una consulta agrupada.
+
+        :return: {'all' | nivel de LEVEL_KEYS: {'total': int, 'approved': int}}
+        """
+        counts = {key: {'total': 0, 'approved': 0} for key in ('all',) + LEVEL_KEYS}
+        if not year.id:
+            return counts
+        groups = self.env['school.student']._read_group(
+            self._active_students_domain(year),
+            ['type', 'mention_state', 'general_state'],
+            ['__count'],
+        )
+        for student_type, mention_state, general_state, count in groups:
+            level = self._student_level({'type': student_type, 'mention_state': mention_state})
+            for key in ('all', level) if level else ('all',):
+                counts[key]['total'] += count
+                if general_state == 'approve':
+                    counts[key]['approved'] += count
+        return counts
+
+    @api.model
+    def _build_students_by_type(self, data):
+        Student = self.env['school.student']
+        groups = data['groups']
+        return {
+            'students_pre_ids': Student.browse([s['id'] for s in groups['pre']]),
+            'students_primary_ids': Student.browse([s['id'] for s in groups['primary']]),
+            'students_secundary_general_ids': Student.browse([s['id'] for s in groups['secundary_general']]),
+            'students_secundary_tecnico_ids': Student.browse([s['id'] for s in groups['secundary_tecnico']]),
+        }
+
+    @api.model
+    def _build_sections_by_type(self, data):
+        Section = self.env['school.section']
+
+        def sections_of(level):
+            return Section.browse([s['id'] for s in data['sections'] if s['type'] == level])
+
+        return {
+            'sections_secundary_ids': sections_of('secundary'),
+            'sections_primary_ids_m2m': sections_of('primary'),
+            'sections_pre_ids_m2m': sections_of('pre'),
+            'mentions_ids': data['mention_sections'],
+        }
+
+    @api.model
+    def _build_mentions_names(self, data):
+        return {
+            'mentions': [
+                {
+                    'id': m.id,
+                    'name': m.mention_id.name,  # Solo el nombre de la mención, sin año
+                    'student_count': m.student_count
+                }
+                for m in data['mention_sections']
+            ]
+        }
+
+    # ------------------------------------------------------------------
+    # Rendimiento y aprobación
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _build_performance_by_level(self, data):
+        """Rendimiento promedio por nivel educativo, incluyendo Medio Técnico"""
+        groups = data['groups']
+        result = {'levels': []}
+
+        for level_key, level_type, level_name in [('pre', 'pre', 'Preescolar'),
+                                                  ('primary', 'primary', 'Primaria'),
+                                                  ('secundary_general', 'secundary', 'Media General')]:
+            students = groups[level_key]
+            if not students:
+                continue
+            total_students = len(students)
+
+            if level_type == 'primary':
+                # Promedio literal calculado por estudiante
+                graded = [s['literal_weight'] for s in students if s['literal_weight'] is not None]
+                approved = sum(1 for weight in graded if weight >= 2.5)
+                literal_avg = weight_to_literal(sum(graded) / len(graded)) if graded else None
+                result['levels'].append({
+                    'type': level_type,
+                    'name': level_name,
+                    'total_students': total_students,
+                    'approved_students': approved,
+                    'failed_students': total_students - approved,
+                    'average': literal_avg,
+                    'approval_rate': round((approved / total_students * 100), 2),
+                    'use_literal': True
+                })
+                continue
+
+            averages = [self._student_average(s) for s in students]
+            averages = [avg for avg in averages if avg > 0]
+            approved = sum(1 for avg in averages if avg >= MIN_SCORE)
+            # Para Preescolar, todos están aprobados (es observación)
+            if level_type == 'pre':
+                approved = total_students
+            result['levels'].append({
+                'type': level_type,
+                'name': level_name,
+                'total_students': total_students,
+                'approved_students': approved,
+                'failed_students': total_students - approved,
+                'average': round(sum(averages) / len(averages), 2) if averages else 0,
+                'approval_rate': round((approved / total_students * 100), 2)
+            })
+
+        # Medio Técnico: rendimiento de mención con fallback al promedio general
+        tecnico_students = groups['secundary_tecnico']
+        if tecnico_students:
+            total_students = len(tecnico_students)
+            averages = [self._student_mention_average(s) for s in tecnico_students]
+            averages = [avg for avg in averages if avg > 0]
+            approved = sum(1 for avg in averages if avg >= MIN_SCORE)
+            result['levels'].append({
+                'type': 'tecnico',
+                'name': 'Medio Técnico',
+                'total_students': total_students,
+                'approved_students': approved,
+                'failed_students': total_students - approved,
+                'average': round(sum(averages) / len(averages), 2) if averages else 0,
+                'approval_rate': round((approved / total_students * 100), 2)
+            })
+
+        return result
+
+    @api.model
+    def _build_students_distribution(self, data):
+        """Distribución de estudiantes por nivel (gráfico de torta) - 4 niveles"""
+        groups = data['groups']
+        return {
+            'labels': ['Preescolar', 'Primaria', 'Media General', 'Medio Técnico'],
+            'data': [len(groups[key]) for key in LEVEL_KEYS],
+            'total': len(data['active'])
+        }
+
+    @api.model
+    def _build_sections_distribution(self, data):
+        """Distribución de secciones por nivel - Técnico Medio usa las secciones de Media General"""
+        sections = data['sections']
+        return {
+            'labels': ['Preescolar', 'Primaria', 'Media General'],
+            'data': [
+                sum(1 for s in sections if s['type'] == 'pre'),
+                sum(1 for s in sections if s['type'] == 'primary'),
+                sum(1 for s in sections if s['type'] == 'secundary'),
+            ],
+            'total': len(sections)
+        }
+
+    @api.model
+    def _build_professors_distribution(self, data):
+        """Distribución de profesores por nivel - Técnico Medio se incluye en Media General"""
+        pre_count = primary_count = secundary_count = 0
+        for prof in data['professors']:
+            counted = False
+            # Asignación directa a secciones (preescolar/primaria), primera sección manda
+            for section_type in prof['section_types']:
+                if section_type == 'pre':
+                    pre_count += 1
+                    counted = True
+                    break
+                elif section_type == 'primary':
+                    primary_count += 1
+                    counted = True
+                    break
+            if not counted and prof['has_register_subjects']:
+                secundary_count += 1
+
+        return {
+            'labels': ['Preescolar', 'Primaria', 'Media General'],
+            'data': [pre_count, primary_count, secundary_count],
+            'total': len(data['professors'])
+        }
+
+    @api.model
+    def _build_approval_rate(self, data):
+        """Tasa de aprobación general del año basada en el promedio individual del estudiante"""
+        active = data['active']
+        if not active:
+            return {
+                'total': 0,
+                'approved': 0,
+                'failed': 0,
+                'rate': 0,
+                'by_level': []
+            }
+
+        levels_data = []
+        total_approved = 0
+        for level_key, level_name in [('pre', 'Preescolar'),
+                                      ('primary', 'Primaria'),
+                                      ('secundary_general', 'Media General'),
+                                      ('secundary_tecnico', 'Medio Técnico')]:
+            students = data['groups'][level_key]
+            if not students:
+                continue
+            approved = sum(1 for s in students if s['approved'])
+            total_approved += approved
+            rate = 100.0 if level_key == 'pre' else round((approved / len(students) * 100), 2)
+            levels_data.append({'name': level_name, 'rate': rate, 'count': len(students)})
+
+        return {
+            'total': len(active),
+            'approved': total_approved,
+            'failed': len(active) - total_approved,
+            'rate': round((total_approved / len(active)) * 100, 2),
+            'by_level': levels_data
+        }
+
+    @api.model
+    def _build_students_tab(self, data):
+        """Estadísticas y top performers para el tab de Estudiantes"""
+        active = data['active']
+        if not active:
+            return {
+                'total': 0,
+                'by_gender': {'M': 0, 'F': 0},
+                'by_state': {'done': 0, 'draft': 0, 'cancel': 0},
+                'by_level': [],
+                'top_performers': [],
+                'at_risk': []
+            }
+
+        current_students = [s for s in data['students'] if s['current']]
+        state_counter = Counter(s['state'] for s in current_students)
+        gender_counter = Counter(s['sex'] for s in current_students if s['partner_id'])
+        approved_count = sum(1 for s in active if s['approved'])
+        groups = data['groups']
+
+        def student_row(student):
+            return {
+                'id': student['id'],
+                'name': student['name'] if student['partner_id'] else 'Sin nombre',
+                'section': student['section_display'],
+                'level': student['type'],
+                'average': round(self._student_average(student), 2),
+                'state': 'approve' if student['approved'] else 'failed'
+            }
+
+        # Top 10 y en riesgo (sin preescolar - no tiene notas numéricas), ordenados
+        # en la base de datos por el promedio general indexado
+        Student = self.env['school.student']
+        students_by_id = data['students_by_id']
+        scorable_domain = self._active_students_domain(data['year']) + [
+            ('type', 'in', ['primary', 'secundary']),
+            ('general_average', '>', 0),
+        ]
+        top_ids = Student.search(scorable_domain, order='general_average desc, id', limit=10).ids
+        top_performers = [student_row(students_by_id[sid]) for sid in top_ids if sid in students_by_id]
+
+        # Top 10 en riesgo (promedios más bajos, excluyendo los top performers)
+        risk_ids = Student.search(
+            scorable_domain + [('id', 'not in', top_ids)], order='general_average asc, id', limit=10).ids
+        at_risk = [student_row(students_by_id[sid]) for sid in risk_ids if sid in students_by_id]
+
+        return {
+            'total': len(active),
+            'by_gender': {'M': gender_counter.get('M', 0), 'F': gender_counter.get('F', 0)},
+            'by_approval': {'approved': approved_count, 'failed': len(active) - approved_count},
+            'by_state': {
+                'done': state_counter.get('done', 0),
+                'draft': state_counter.get('draft', 0),
+                'cancel': state_counter.get('cancel', 0)
+            },
+            'by_level': [
+                {'name': 'Preescolar', 'count': len(groups['pre']), 'color': '#FFB300'},
+                {'name': 'Primaria', 'count': len(groups['primary']), 'color': '#43A047'},
+                {'name': 'Media General', 'count': len(groups['secundary_general']), 'color': '#1E88E5'},
+                {'name': 'Medio Técnico', 'count': len(groups['secundary_tecnico']), 'color': '#8E24AA'}
+            ],
+            'top_performers': top_performers,
+            'at_risk': at_risk
+        }
+
+    @api.model
+    def _build_pre_observations_timeline(self, data):
+        """Timeline de las últimas observaciones de preescolar"""
+        year = data['year']
+        scores = self.env['school.evaluation.score'].search([
+            ('year_id', '=', year.id),
+            ('type', '=', 'pre'),
+            ('observation', '!=', False),
+            ('observation', '!=', '')
+        ], order='write_date desc', limit=15)
+
+        timeline = []
+        for score in scores:
+            # Convertir write_date de UTC a zona horaria del usuario
+            local_date = fields.Datetime.context_timestamp(self, score.write_date) if score.write_date else None
+            student = data['students_by_id'].get(score.student_id.id)
+            evaluation = data['evaluations'].get(score.evaluation_id.id)
+            observation = score.observation
+            timeline.append({
+                'id': score.id,
+                'student_name': student['name'] if student and student['partner_id'] else 'Estudiante',
+                'section': student['section_display'] if student else '',
+                'observation': year._strip_html(observation[:200] + '...' if len(observation or '') > 200 else observation),
+                'date': local_date.strftime('%d/%m/%Y %I:%M %p') if local_date else '',
+                'professor': score.evaluation_id.professor_id.name if score.evaluation_id.professor_id else '',
+                'evaluation_name': evaluation['name'] if evaluation else ''
+            })
+
+        return {
+            'total': len(timeline),
+            'timeline': timeline
+        }
+
+    @api.model
+    def _build_sections_comparison(self, data):
+        """Comparación de rendimiento - mejor sección por nivel"""
+        sections_by_type = {'primary': [], 'secundary': [], 'tecnico': []}
+
+        def section_row(section_id, name, level_type, type_name, stats):
+            return {
+                'section_id': section_id,
+                'section_name': name,
+                'type': level_type,
+                'type_name': type_name,
+                'average': stats.get('general_average', 0),
+                'total_students': stats.get('total_students', 0),
+                'approved_students': stats.get('approved_students', 0),
+                'failed_students': stats.get('failed_students', 0),
+                'approval_rate': round((stats.get('approved_students', 0) /
+                                        stats.get('total_students', 1) * 100), 2)
+            }
+
+        for section in data['sections']:
+            if section['type'] not in ['secundary', 'primary']:
+                continue
+            record = section['record']
+            stats = record.students_average_json
+            if not stats or stats.get('total_students', 0) == 0:
+                continue
+            sections_by_type[section['type']].append(section_row(
+                record.id,
+                record.section_id.display_name if record.section_id else record.name,
+                section['type'],
+                'Primaria' if section['type'] == 'primary' else 'Media General',
+                stats,
+            ))
+
+        for mention_section in data['mention_sections']:
+            stats = mention_section.students_average_json
+            if not stats or stats.get('total_students', 0) == 0:
+                continue
+            sections_by_type['tecnico'].append(section_row(
+                mention_section.id, mention_section.mention_id.name, 'tecnico', 'Medio Técnico', stats,
+            ))
+
+        result = {'sections': []}
+        for level_type in ['primary', 'secundary', 'tecnico']:
+            if sections_by_type[level_type]:
+                sections_by_type[level_type].sort(key=lambda x: x['average'], reverse=True)
+                result['sections'].append(sections_by_type[level_type][0])
+        return result
+
+    @api.model
+    def _build_top_students_year(self, data):
+        """Top 9 del año - 3 por nivel (Primaria, Media General, Medio Técnico)"""
+
+        def get_student_avg(student, use_mention=False, is_primary=False):
+            if use_mention:
+                mention_perf = student['mention_perf']
+                if mention_perf and mention_perf.get('subjects'):
+                    return mention_perf.get('general_average', 0)
+            perf = student['perf']
+            if perf.get('use_literal'):
+                literal = perf.get('literal_average', 'A' if is_primary else 'E')
+                return LITERAL_WEIGHTS_20.get(literal, 18 if is_primary else 0)
+            return perf.get('general_average', 18 if is_primary else 0)
+
+        def build_student_data(student, use_mention=False):
+            if use_mention:
+                mention_perf = student['mention_perf']
+                if mention_perf and mention_perf.get('subjects'):
+                    return {
+                        'student_id': student['partner_id'],
+                        'student_name': student['name'],
+                        'section': student['mention_section_name'],
+                        'average': mention_perf.get('general_average', 0),
+                        'literal_average': None,
+                        'state': mention_perf.get('general_state', 'failed'),
+                        'use_literal': False
+                    }
+            perf = student['perf']
+            if not perf or perf.get('total_subjects', 0) == 0:
+                return None
+            return {
+                'student_id': student['partner_id'],
+                'student_name': student['name'],
+                'section': student['section_display'],
+                'average': get_student_avg(student),
+                'literal_average': perf.get('literal_average'),
+                'state': perf.get('general_state', 'failed'),
+                'use_literal': perf.get('use_literal', False)
+            }
+
+        groups = data['groups']
+        result = {'top_primary': [], 'top_secundary': [], 'top_tecnico': []}
+
+        # Primaria: siempre aprobado con literal (evaluación por observación)
+        primary_sorted = sorted(groups['primary'], key=lambda s: get_student_avg(s, is_primary=True), reverse=True)
+        for student in primary_sorted[:3]:
+            result['top_primary'].append({
+                'student_id': student['partner_id'],
+                'student_name': student['name'],
+                'section': student['section_display'],
+                'average': 18,
+                'literal_average': 'A',
+                'state': 'approve',
+                'use_literal': True
+            })
+
+        secundary_sorted = sorted(groups['secundary_general'], key=get_student_avg, reverse=True)
+        for student in secundary_sorted[:3]:
+            row = build_student_data(student)
+            if row and row['average'] > 0:
+                result['top_secundary'].append(row)
+
+        tecnico_sorted = sorted(groups['secundary_tecnico'], key=lambda s: get_student_avg(s, use_mention=True), reverse=True)
+        for student in tecnico_sorted[:3]:
+            row = build_student_data(student, use_mention=True)
+            if row and row['average'] > 0:
+                result['top_tecnico'].append(row)
+
+        return result
+
+    # ------------------------------------------------------------------
+    # Profesores
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _build_professor_summary(self, data):
+        """Resumen de profesores y su carga académica"""
+        professors_data = [{
+            'professor_id': prof['employee_id'],
+            'professor_name': prof['name'],
+            'sections_count': prof['sections_count'],
+            'subjects_count': prof['subjects_count'],
+            'evaluations_count': prof['evaluations_count']
+        } for prof in data['professors']]
+        return {
+            'professors': professors_data,
+            'total': len(professors_data)
+        }
+
+    @api.model
+    def _build_professor_dashboard(self, data):
+        """Dashboard consolidado de profesores con KPIs, top 5 y distribución por nivel"""
+        total_subjects = 0
+        total_evaluations = 0
+        all_points = 0.0
+        all_count = 0
+        professors_ranking = []
+        distribution = {'pre': set(), 'primary': set(), 'secundary': set(), 'tecnico': set()}
+
+        for prof in data['professors']:
+            total_subjects += prof['subjects_count']
+            total_evaluations += prof['evaluations_count']
+
+            scores = prof['scores']
+            all_points += scores['points']
+            all_count += scores['count']
+
+            professors_ranking.append({
+                'professor_id': prof['employee_id'],
+                'professor_name': prof['name'],
+                'average': round(scores['points'] / scores['count'], 1) if scores['count'] else 0.0,
+                'evaluations_count': prof['evaluations_count'],
+                'subjects_count': prof['subjects_count'],
+                'sections_count': prof['sections_count']
+            })
+
+            # Un profesor cuenta en un nivel si tiene al menos una sección o materia ahí
+            for section_type in prof['section_types']:
+                if section_type in ('pre', 'primary'):
+                    distribution[section_type].add(prof['id'])
+            for section_type in prof['subject_section_types']:
+                if section_type in ('pre', 'primary', 'secundary'):
+                    distribution[section_type].add(prof['id'])
+            if prof['has_mention_subjects']:
+                distribution['tecnico'].add(prof['id'])
+
+        professors_ranking.sort(key=lambda x: (x['average'], x['evaluations_count']), reverse=True)
+
+        return {
+            'total_professors': len(data['professors']),
+            'total_subjects': total_subjects,
+            'total_evaluations': total_evaluations,
+            'general_average': round(all_points / all_count, 1) if all_count else 0.0,
+            'top_professors': professors_ranking[:5],
+            'distribution_by_level': {key: len(ids) for key, ids in distribution.items()},
+            'all_professors': professors_ranking
+        }
+
+    @api.model
+    def _build_professor_detailed_stats(self, data):
+        """Estadísticas de profesores agrupadas por tipo de estudiante"""
+        eval_types = data['eval_types']
+        category_eval_type = {
+            'secundary_general': eval_types['secundary'] or '20',
+            'secundary_tecnico': eval_types['secundary'] or '20',
+            'primary': eval_types['primary'] or '20',
+            'pre': eval_types['pre'] or 'literal',
+        }
+
+        professors_data = []
+        for prof in data['professors']:
+            stats_by_type = {}
+            for category in LEVEL_KEYS:
+                level = prof['scores']['by_level'].get(category)
+                if not level or not level['count']:
+                    stats_by_type[category] = {'count': 0, 'average': 0}
+                    continue
+                if category_eval_type[category] == 'literal':
+                    total = level['literal_points']
+                else:
+                    total = level['points']
+                stats_by_type[category] = {
+                    'count': level['count'],
+                    'average': round(total / level['count'], 2),
+                }
+
+            professors_data.append({
+                'professor_id': prof['employee_id'],
+                'professor_name': prof['name'],
+                'total_evaluations': prof['evaluations_count'],
+                'sections_count': prof['sections_count'],
+                'stats_by_type': stats_by_type
+            })
+
+        return {
+            'professors': professors_data,
+            'total': len(professors_data)
+        }
+
+    # ------------------------------------------------------------------
+    # Materias y evaluaciones
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _build_difficult_subjects(self, data, lapso=None, level=None, offset=0, limit=10):
+        """Materias con mayor índice de reprobación"""
+        return self._query_difficult_subjects(data['year'], lapso=lapso, level=level, offset=offset, limit=limit)
+
+    @api.model
+    def _query_difficult_subjects(self, year, lapso=None, level=None, offset=0, limit=10):
+        """Índice de dificultad por materia, agregado en la base de datos.
+
+        Primero se promedian las notas de cada estudiante por materia y luego
+        se cuentan, por materia, los estudiantes con promedio reprobado. Solo
+        se consideran notas visibles (no literales) y mayores a cero. El orden
+        y la página se resuelven en la misma consulta.
+
+        :param year: registro school.year
+        :param lapso: '1', '2' o '3' para limitar a un lapso (None = todo el año)
+        :param level: uno de LEVEL_KEYS para limitar a un nivel (None = todos)
+        :param offset: materias a saltar (paginación)
+        :param limit: cantidad de materias a devolver (None = todas)
+        :return: dict con 'subjects' (la página) y 'total' (todas las materias)
+        """
+        if level and level not in LEVEL_KEYS:
+            raise UserError(f"Nivel desconocido: '{level}'.")
+
+        self.env['school.evaluation.score'].flush_model(
+            ['year_id', 'lapso', 'type', 'subject_id', 'student_id', 'evaluation_id',
+             'points_20', 'is_mention_score', 'state'])
+        self.env['school.evaluation'].flush_model(['type', 'is_mention_evaluation'])
+        self.env['school.subject'].flush_model(['subject_id'])
+        self.env['school.register.subject'].flush_model(['name'])
+        self.env['school.year'].flush_model(['evalution_type_primary'])
+        self.env['school.evaluation.type'].flush_model(['type_evaluation'])
+
+        conditions = []
+        params = [year.id]
+        if lapso:
+            conditions.append("sc.lapso = %s")
+            params.append(lapso)
+        if level == 'secundary_tecnico':
+            conditions.append("sc.is_mention_score")
+        elif level == 'secundary_general':
+            conditions.append("sc.type = 'secundary' AND NOT COALESCE(sc.is_mention_score, FALSE)")
+        elif level:
+            conditions.append("sc.type = %s AND NOT COALESCE(sc.is_mention_score, FALSE)")
+            params.append(level)
+        extra = ''.join(f" AND {condition}" for condition in conditions)
+        params += [MIN_SCORE, MIN_SCORE]
+
+        # Misma regla que school.evaluation.invisible_score: en Primaria solo
+        # cuentan las notas si el año no evalúa con literales
+        per_subject = f"""
+            WITH per_student AS (
+                SELECT NULLIF(rs.name, '') AS subject_name,
+                       SUM(sc.points_20) AS points,
+                       COUNT(*) AS scores
+                  FROM school_evaluation_score sc
+                  JOIN school_evaluation ev ON ev.id = sc.evaluation_id
+                  JOIN school_subject sub ON sub.id = sc.subject_id
+                  LEFT JOIN school_register_subject rs ON rs.id = sub.subject_id
+                  JOIN school_year y ON y.id = sc.year_id
+                  LEFT JOIN school_evaluation_type pt ON pt.id = y.evalution_type_primary
+                 WHERE sc.year_id = %s
+                   AND sc.state <> 'draft'
+                   AND sc.points_20 > 0
+                   AND (ev.is_mention_evaluation
+                        OR ev.type = 'secundary'
+                        OR (ev.type = 'primary' AND pt.type_evaluation IS DISTINCT FROM 'literal'))
+                   {extra}
+              GROUP BY NULLIF(rs.name, ''), sc.student_id
+            ), per_subject AS (
+                SELECT subject_name,
+                       COUNT(*) AS total_students,
+                       COUNT(*) FILTER (WHERE points / scores < %s) AS failed_students,
+                       ROUND((COUNT(*) FILTER (WHERE points / scores < %s))::numeric * 100 / COUNT(*), 2)
+                           AS failure_rate,
+                       ROUND(SUM(points)::numeric / SUM(scores), 2) AS average
+                  FROM per_student
+              GROUP BY subject_name
+            )
+        """
+
+        # Índice compuesto (0-100): 50% promedio bajo + 50% tasa de reprobación
+        self.env.cr.execute(f"""
+            {per_subject}
+            SELECT subject_name, total_students, failed_students, failure_rate, average,
+                   ROUND(CASE WHEN average <= 20 THEN (20 - average) / 20 * 100 ELSE 0 END * 0.5
+                         + failure_rate * 0.5, 2) AS difficulty_index,
+                   COUNT(*) OVER ()
+              FROM per_subject
+          ORDER BY difficulty_index DESC, subject_name
+             LIMIT %s OFFSET %s
+        """, params + [limit, offset])
+        rows = self.env.cr.fetchall()
+
+        if rows:
+            total = rows[0][-1]
+        elif offset:
+            # Página fuera de rango: el total no viaja en ninguna fila
+            self.env.cr.execute(f"{per_subject} SELECT COUNT(*) FROM per_subject", params)
+            total = self.env.cr.fetchone()[0]
+        else:
+            total = 0
+
+        difficult_subjects = [{
+            'subject_name': subject_name or 'Sin nombre',
+            'total_students': total_students,
+            'failed_students': failed_students,
+            'failure_rate': float(failure_rate),
+            'average': float(average),
+            'difficulty_index': float(difficulty_index),
+        } for subject_name, total_students, failed_students, failure_rate, average, difficulty_index, _total in rows]
+        return {'subjects': difficult_subjects, 'total': total}
+
+    @api.model
+    def _evaluation_state(self, evaluation):
+        """Mismo criterio que school.evaluation._compute_state, desde las notas cargadas"""
+        states = evaluation['score_states']
+        if not states:
+            return 'draft'
+        if all(state == 'qualified' for state in states):
+            return 'all'
+        if all(state == 'draft' for state in states):
+            return 'draft'
+        return 'partial'
+
+    @api.model
+    def _build_evaluations_stats(self, data):
+        """Estadísticas generales de evaluaciones"""
+        evaluations = list(data['evaluations'].values())
+        states = Counter(self._evaluation_state(ev) for ev in evaluations)
+        return {
+            'total': len(evaluations),
+            'qualified': states.get('all', 0),
+            'partial': states.get('partial', 0),
+            'draft': states.get('draft', 0),
+            'by_type': {
+                'pre': sum(1 for ev in evaluations if ev['type'] == 'pre'),
+                'primary': sum(1 for ev in evaluations if ev['type'] == 'primary'),
+                # Media General: secundary SIN mención; Técnico Medio: con mención
+                'secundary': sum(1 for ev in evaluations if ev['type'] == 'secundary' and not ev['mention_section_id']),
+                'tecnico': sum(1 for ev in evaluations if ev['mention_section_id'])
+            }
+        }
+
+    @api.model
+    def _build_recent_evaluations(self, data):
+        """Evaluaciones recientes (últimas 20)"""
+        recent = self.env['school.evaluation'].search([
+            ('year_id', '=', data['year'].id)
+        ], order='evaluation_date desc', limit=20)
+
+        evals_data = []
+        for ev_id in recent.ids:
+            ev = data['evaluations'][ev_id]
+            evals_data.append({
+                'id': ev['id'],
+                'name': ev['name'],
+                'date': ev['date'].strftime('%Y-%m-%d') if ev['date'] else '',
+                'professor': ev['professor_name'],
+                'section': ev['section_name'],
+                'subject': ev['subject_name'] or 'N/A',
+                'state': self._evaluation_state(ev),
+                'average': ev['score_average']
+            })
+        return {'evaluations': evals_data}
+
+    # ------------------------------------------------------------------
+    # Rendimiento por nivel (widgets general_performance_graph)
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _build_level_performance(self, data):
+        groups = data['groups']
+        eval_types = data['eval_types']
+        return {
+            'secundary_performance_json': self._level_performance(
+                'secundary', groups['secundary_general'], eval_types['secundary'] or '20'),
+            'primary_performance_json': self._level_performance(
+                'primary', groups['primary'], eval_types['primary'] or '20'),
+            'pre_performance_json': self._level_performance(
+                'pre', groups['pre'], eval_types['pre'] or '20'),
+            'tecnico_performance_json': self._tecnico_performance(
+                groups['secundary_tecnico'], eval_types['secundary'] or '20'),
+        }
+
+    @api.model
+    def _level_performance(self, level_type, students, evaluation_type):
+        """Rendimiento del nivel contando ESTUDIANTES (no notas individuales)"""
+        if not students:
+            return {}
+        total_students = len(students)
+
+        if level_type == 'primary':
+            literal_distribution = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'E': 0}
+            graded = [s['literal_weight'] for s in students if s['literal_weight'] is not None]
+            for weight in graded:
+                literal_distribution[weight_to_literal(weight)] += 1
+            students_approved = sum(1 for weight in graded if weight >= 2.5)
+            overall_avg_weight = sum(graded) / len(graded) if graded else 0
+            literal_avg = weight_to_literal(overall_avg_weight) if graded else None
+            return {
+                'evaluation_type': 'literal',
+                'section_type': level_type,
+                'total_subjects': total_students,  # Total de ESTUDIANTES
+                'subjects_approved': students_approved,
+                'subjects_failed': len(graded) - students_approved,
+                'general_average': round(overall_avg_weight * 4, 1),  # Escala aproximada 20
+                'general_state': 'approve' if literal_avg in ['A', 'B', 'C'] else 'failed',
+                'use_literal': True,
+                'literal_average': literal_avg,
+                'approval_percentage': round((students_approved / total_students) * 100, 2),
+                'literal_distribution': literal_distribution
+            }
+
+        min_score = 10 if evaluation_type == '20' else 50
+        averages = [avg for avg in (self._student_average(s) for s in students) if avg > 0]
+        # Estudiante sin promedio = reprobado
+        return self._performance_summary(level_type, evaluation_type, total_students, averages, min_score)
+
+    @api.model
+    def _tecnico_performance(self, students, evaluation_type):
+        """Rendimiento de Técnico Medio usando el promedio de mención de cada estudiante"""
+        if not students:
+            return {}
+        min_score = 10 if evaluation_type == '20' else 50
+        averages = []
+        for student in students:
+            mention_perf = student['mention_perf']
+            if not mention_perf or not mention_perf.get('subjects'):
+                continue
+            avg = mention_perf.get('general_average', 0)
+            if avg and avg > 0:
+                averages.append(avg)
+        return self._performance_summary('tecnico', evaluation_type, len(students), averages, min_score)
+
+    @api.model
+    def _performance_summary(self, section_type, evaluation_type, total_students, averages, min_score):
+        students_approved = sum(1 for avg in averages if avg >= min_score)
+        avg = round(sum(averages) / len(averages), 2) if averages else 0.0
+        return {
+            'evaluation_type': evaluation_type,
+            'section_type': section_type,
+            'total_subjects': total_students,  # Total de ESTUDIANTES
+            'subjects_approved': students_approved,
+            'subjects_failed': total_students - students_approved,
+            'general_average': avg,
+            'general_state': 'approve' if avg >= min_score else 'failed',
+            'use_literal': False,
+            'literal_average': None,
+            'approval_percentage': round((students_approved / total_students) * 100, 2),
+        }
+
+    # ------------------------------------------------------------------
+    # Dashboards por nivel (widget level_dashboard)
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _build_level_dashboard(self, data, level_type):
+        """Dashboard de un nivel: rendimiento, aprobación y top 3 por sección/mención"""
+        students = data['groups'][level_type]
+        if not students:
+            return {
+                'total_students': 0,
+                'approved_count': 0,
+                'failed_count': 0,
+                'approval_rate': 0,
+                'performance_data': [],
+                'top_students_by_section': [],
+                'evaluation_type': '20',
+                'use_literal': False
+            }
+
+        eval_types = data['eval_types']
+        if level_type in ['secundary_general', 'secundary_tecnico']:
+            evaluation_type = eval_types['secundary'] or '20'
+        else:
+            evaluation_type = eval_types[level_type] or '20'
+        use_literal = evaluation_type == 'literal' or level_type == 'primary'  # Primaria siempre literal
+
+        # Preescolar: todos aprobados por observación
+        if level_type == 'pre':
+            approved_count = len(students)
+        else:
+            approved_count = sum(1 for s in students if s['approved'])
+
+        if level_type in ['pre', 'primary']:
+            performance_data = self._performance_by_evaluation(students, evaluation_type)
+        else:
+            performance_data = self._performance_by_subject(students, evaluation_type)
+
+        if level_type == 'pre':
+            top_students_by_section = []  # Sin notas en preescolar
+            sections_count = sum(1 for s in data['sections'] if s['type'] == 'pre')
+        elif level_type == 'secundary_tecnico':
+            top_students_by_section = self._top_students_by_mention(students, evaluation_type, use_literal)
+            sections_count = len(data['mention_sections'])
+        else:
+            top_students_by_section = self._top_students_by_section(students, evaluation_type, use_literal, level_type)
+            sections_count = len(top_students_by_section)
+
+        return {
+            'level_type': level_type,
+            'total_students': len(students),
+            'approved_count': approved_count,
+            'failed_count': len(students) - approved_count,
+            'approval_rate': round((approved_count / len(students)) * 100, 2),
+            'sections_count': sections_count,
+            'performance_data': performance_data,
+            'top_students_by_section': top_students_by_section,
+            'evaluation_type': evaluation_type,
+            'use_literal': use_literal
+        }
+
+    @api.model
+    def _accumulate_score(self, bucket, line, evaluation_type, counter_key):
+        bucket[counter_key] += 1
+        if evaluation_type == 'literal' and line['literal_type']:
+            bucket['literal_scores'].append(line['literal_type'])
+            if line['literal_type'] in ['A', 'B', 'C']:
+                bucket['approved_count'] += 1
+        else:
+            bucket['scores'].append(line['points_20'])
+            if line['points_20'] >= MIN_SCORE:  # Siempre base 20
+                bucket['approved_count'] += 1
+
+    @api.model
+    def _finalize_buckets(self, buckets, evaluation_type, counter_key, sort_key):
+        result = []
+        for bucket in buckets.values():
+            if evaluation_type == 'literal' and bucket['literal_scores']:
+                # Moda para literales
+                bucket['average'] = Counter(bucket['literal_scores']).most_common(1)[0][0]
+            elif bucket['scores']:
+                bucket['average'] = round(sum(bucket['scores']) / len(bucket['scores']), 2)
+            else:
+                bucket['average'] = 0
+            bucket['approval_rate'] = round((bucket['approved_count'] / bucket[counter_key]) * 100, 2) if bucket[counter_key] > 0 else 0
+            result.append(bucket)
+        result.sort(key=lambda x: x[sort_key])
+        return result
+
+    @api.model
+    def _performance_by_evaluation(self, students, evaluation_type):
+        """Rendimiento agrupado por evaluación (preescolar/primaria)"""
+        buckets = {}
+        for student in students:
+            for line in student['scores']:
+                evaluation = line['evaluation']
+                bucket = buckets.get(evaluation['id'])
+                if bucket is None:
+                    bucket = buckets[evaluation['id']] = {
+                        'evaluation_id': evaluation['id'],
+                        'evaluation_name': evaluation['name'],
+                        'professor_name': evaluation['professor_name'] if evaluation['professor_id'] else 'N/A',
+                        'scores': [],
+                        'literal_scores': [],
+                        'total_students': 0,
+                        'approved_count': 0
+                    }
+                self._accumulate_score(bucket, line, evaluation_type, 'total_students')
+        return self._finalize_buckets(buckets, evaluation_type, 'total_students', 'evaluation_name')
+
+    @api.model
+    def _performance_by_subject(self, students, evaluation_type):
+        """Rendimiento agrupado por materia (media general/técnico)"""
+        buckets = {}
+        for student in students:
+            for line in student['scores']:
+                if not line['subject_ref']:
+                    continue
+                bucket = buckets.get(line['subject_id'])
+                if bucket is None:
+                    bucket = buckets[line['subject_id']] = {
+                        'subject_id': line['subject_id'],
+                        'subject_name': line['subject_name'],
+                        'scores': [],
+                        'literal_scores': [],
+                        'total_evaluations': 0,
+                        'approved_count': 0
+                    }
+                self._accumulate_score(bucket, line, evaluation_type, 'total_evaluations')
+        return self._finalize_buckets(buckets, evaluation_type, 'total_evaluations', 'subject_name')
+
+    @api.model
+    def _top_students_by_section(self, students, evaluation_type, use_literal, level_type=''):
+        """Top 3 estudiantes por sección"""
+        is_primary = level_type == 'primary'
+        sections_data = {}
+        for student in students:
+            section = sections_data.get(student['section_id'])
+            if section is None:
+                section = sections_data[student['section_id']] = {
+                    'section_id': student['section_id'],
+                    'section_name': student['section_name'],
+                    'students': []
+                }
+
+            perf = student['perf']
+            if use_literal or is_primary:
+                if is_primary:
+                    # Literal calculado directamente desde las notas (sin subject_id en primaria)
+                    weight = student['literal_weight']
+                    literal = weight_to_literal(weight) if weight is not None else 'E'
+                    state = 'approve' if weight is not None and literal in ['A', 'B', 'C'] else 'failed'
+                else:
+                    literal = perf.get('literal_average', 'E')
+                    state = perf.get('general_state', 'failed')
+                sort_value = LITERAL_WEIGHTS.get(literal, 0)
+                display_value = literal
+            else:
+                sort_value = perf.get('general_average', 0)
+                suffix = '/20' if evaluation_type == '20' else '/100'
+                display_value = f"{sort_value}{suffix}"
+                state = perf.get('general_state', 'failed')
+
+            section['students'].append({
+                'student_id': student['partner_id'],
+                'student_name': student['name'],
+                'enrollment_id': student['id'],
+                'average': display_value,
+                'literal_average': display_value if (use_literal or is_primary) else None,
+                'sort_value': sort_value,
+                'state': state,
+                'use_literal': use_literal or is_primary
+            })
+
+        return self._top_3(sections_data, 'section_name')
+
+    @api.model
+    def _top_students_by_mention(self, students, evaluation_type, use_literal):
+        """Top 3 estudiantes por mención (Técnico Medio)"""
+        mentions_data = {}
+        for student in students:
+            if not student['mention_id']:
+                continue
+            mention = mentions_data.get(student['mention_id'])
+            if mention is None:
+                mention = mentions_data[student['mention_id']] = {
+                    'section_id': student['mention_id'],  # Claves section_* por compatibilidad con el widget
+                    'section_name': student['mention_name'],
+                    'mention_id': student['mention_id'],
+                    'mention_name': student['mention_name'],
+                    'students': []
+                }
+
+            perf = student['mention_perf']
+            if perf is None:
+                perf = student['perf']
+            if use_literal:
+                literal = perf.get('literal_average', 'E')
+                sort_value = LITERAL_WEIGHTS.get(literal, 0)
+                display_value = literal
+            else:
+                sort_value = perf.get('general_average', 0)
+                suffix = '/20' if evaluation_type == '20' else '/100'
+                display_value = f"{sort_value}{suffix}"
+
+            mention['students'].append({
+                'student_id': student['partner_id'],
+                'student_name': student['name'],
+                'enrollment_id': student['id'],
+                'average': display_value,
+                'sort_value': sort_value,
+                'state': perf.get('general_state', 'failed'),
+                'use_literal': use_literal
+            })
+
+        return self._top_3(mentions_data, 'mention_name')
+
+    @api.model
+    def _top_3(self, groups, sort_key):
+        result = []
+        for group in groups.values():
+            group['students'].sort(key=lambda x: x['sort_value'], reverse=True)
+            group['top_3'] = group['students'][:3]
+            del group['students']  # Solo se conserva el top 3
+            result.append(group)
+        result.sort(key=lambda x: x[sort_key])
+        return result
@@ -0,0 +1,167 @@
+from odoo import api, fields, models
+
+
+class SchoolYearDashboard(models.Model):
+    """Resumen persistido del dashboard de un año escolar (una fila por año y lapso).
+
+    Los campos *_json de school.year se sirven desde aquí mientras la fila
+    esté al día. Los cambios en notas, inscripciones, secciones, evaluaciones,
+    profesores, materias o menciones marcan la fila del lapso actual como pendiente y disparan el cron que la
+    recalcula en segundo plano. El cron solo recalcula las filas pendientes.
+    """
+    _name = 'school.year.dashboard'
+    _description = 'School Year Dashboard Snapshot'
+    _order = 'year_id desc, lapso desc'
+
+    year_id = fields.Many2one(
+        comodel_name='school.year',
+        string='Año escolar',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+
+    lapso = fields.Selection(
+        selection=[
+            ('1', 'Primer Lapso'),
+            ('2', 'Segundo Lapso'),
+            ('3', 'Tercer Lapso')
+        ],
+        string='Lapso',
+        required=True
+    )
+
+    payload = fields.Json(string='Datos del dashboard', readonly=True)
+
+    dirty = fields.Boolean(
+        string='Pendiente de actualizar',
+        default=True,
+        index=True,
+        help='Indica que hubo cambios en el año desde el último cálculo del resumen'
+    )
+
+    computed_at = fields.Datetime(string='Calculado el', readonly=True)
+
+    _year_lapso_unique = models.Constraint(
+        'unique(year_id, lapso)',
+        'Ya existe un resumen del dashboard para este año escolar y lapso.',
+    )
+
+    @api.model
+    def _get_snapshots(self, years):
+        """Filas del lapso actual de cada año: {year_id: snapshot}"""
+        if not years:
+            return {}
+        snapshots = self.sudo().search([('year_id', 'in', years.ids)])
+        current_lapso = {year.id: year.current_lapso or '1' for year in years}
+        return {
+            snapshot.year_id.id: snapshot
+            for snapshot in snapshots
+            if snapshot.lapso == current_lapso[snapshot.year_id.id]
+        }
+
+    @api.model
+    def _get_fresh_payloads(self, years):
+        """Payloads al día del lapso actual: {year_id: payload}"""
+        return {
+            year_id: snapshot.payload
+            for year_id, snapshot in self._get_snapshots(years).items()
+            if not snapshot.dirty and snapshot.payload
+        }
+
+    @api.model
+    def _mark_dirty(self, years):
+        """Marca como pendiente el resumen del lapso actual y agenda su recálculo"""
+        years = years.exists() if years else years
+        if not years:
+            return
+        snapshots = self._get_snapshots(years)
+        clean = self.browse([s.id for s in snapshots.values() if not s.dirty]).sudo()
+        if clean:
+            clean.write({'dirty': True})
+        missing = years.filtered(lambda year: year.id not in snapshots)
+        if missing:
+            self._create_dirty_snapshots(missing)
+        if clean or missing:
+            self._trigger_refresh()
+
+    @api.model
+    def _create_dirty_snapshots(self, years):
+        """Crea, ya pendientes, las filas del lapso actual que falten.
+        Si otra transacción la crea a la vez se conserva esa (sin error)."""
+        self.flush_model()
+        self.env.cr.execute(f"""
+            INSERT INTO school_year_dashboard (year_id, lapso, dirty, create_uid, write_uid, create_date, write_date)
+            VALUES {', '.join(["(%s, %s, TRUE, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')"] * len(years))}
+            ON CONFLICT (year_id, lapso) DO NOTHING
+        """, [value for year in years for value in (year.id, year.current_lapso or '1', self.env.uid, self.env.uid)])
+        self.invalidate_model()
+
+    @api.model
+    def _trigger_refresh(self):
+        """Agenda el cron de recálculo una sola vez por transacción"""
+        data = self.env.cr.precommit.data
+        if data.get('school.year.dashboard.triggered'):
+            return
+        cron = self.env.ref('pma_public_school_ve.ir_cron_refresh_year_dashboard', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+            data['school.year.dashboard.triggered'] = True
+
+    @api.model
+    def _payload_from_values(self, year, values):
+        """Convierte los valores del motor de analíticas a un JSON serializable"""
+        payload = {}
+        for name, value in values.items():
+            if year._fields[name].type == 'many2many':
+                value = value.ids
+            payload[name] = value
+        return payload
+
+    @api.model
+    def _values_from_payload(self, year, payload):
+        """Convierte un payload almacenado a valores asignables en school.year.
+        Devuelve None si el payload no cubre todos los campos del dashboard
+        (p. ej. calculado antes de agregar un campo nuevo).
+        """
+        if not payload:
+            return None
+        values = {}
+        for name in year._dashboard_field_names():
+            if name not in payload:
+                return None
+            value = payload[name]
+            field = year._fields[name]
+            if field.type == 'many2many':
+                value = self.env[field.comodel_name].browse(value or [])
+            values[name] = value
+        return values
+
+    def _refresh(self):
+        """Recalcula y guarda el resumen de estas filas.
+        No es incremental: cada fila pendiente recalcula el dashboard completo
+        (_compute_dashboard_values); lo que se evita es recalcular las filas
+        que no cambiaron y hacerlo en cada lectura.
+        """
+        Analytics = self.env['school.year.analytics']
+        for snapshot in self:
+            year = snapshot.year_id
+            snapshot.write({
+                'payload': self._payload_from_values(year, Analytics._compute_dashboard_values(year)),
+                'dirty': False,
+                'computed_at': fields.Datetime.now(),
+            })
+
+    @api.model
+    def _cron_refresh_dashboards(self):
+        """Recalcula solo los resúmenes pendientes del lapso actual de cada año"""
+        # Los años en curso sin fila (instalación o cambio de lapso) la reciben pendiente
+        active_years = self.env['school.year'].search([('state', '=', 'active')])
+        snapshots = self._get_snapshots(active_years)
+        missing = active_years.filtered(lambda year: year.id not in snapshots)
+        if missing:
+            self._create_dirty_snapshots(missing)
+
+        # Las filas de lapsos ya cerrados se conservan como histórico
+        dirty = self.sudo().search([('dirty', '=', True)])
+        dirty.filtered(lambda s: s.lapso == (s.year_id.current_lapso or '1'))._refresh()